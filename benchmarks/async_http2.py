@@ -0,0 +1,167 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+"""Throughput and connection count of ``AsyncFirecrest`` over HTTP/1.1 and
+HTTP/2 against a local TLS server.
+
+The server is started in a background thread with ``hypercorn`` and a
+self-signed certificate that is created with the ``openssl`` command line
+tool. Extra requirements::
+
+    pip install hypercorn pyfirecrest[http2]
+
+Usage::
+
+    python benchmarks/async_http2.py --requests 2000 --max-connections 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import tempfile
+import threading
+import time
+
+import httpx
+from hypercorn.asyncio import serve
+from hypercorn.config import Config
+
+import firecrest
+
+
+SERVICES = json.dumps({
+    "description": "List of services with status and description.",
+    "out": [
+        {
+            "description": "server up & flask running",
+            "service": "utilities",
+            "status": "available",
+        }
+    ],
+}).encode()
+
+
+class Server:
+    def __init__(self, certfile, keyfile, port):
+        self.connections = set()
+        self.http_versions = set()
+        self._config = Config()
+        self._config.bind = [f"127.0.0.1:{port}"]
+        self._config.certfile = certfile
+        self._config.keyfile = keyfile
+        self._config.accesslog = None
+        self._config.errorlog = None
+        self._loop = asyncio.new_event_loop()
+        self._stop = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    async def app(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+
+        # Every HTTP/2 stream of the same connection has the same client
+        # address, so this counts TCP connections
+        self.connections.add(tuple(scope["client"]))
+        self.http_versions.add(scope["http_version"])
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json")],
+        })
+        await send({"type": "http.response.body", "body": SERVICES})
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._stop = asyncio.Event()
+        self._loop.run_until_complete(
+            serve(self.app, self._config, shutdown_trigger=self._stop.wait)
+        )
+
+    def start(self):
+        self._thread.start()
+        time.sleep(1)
+
+    def stop(self):
+        self._loop.call_soon_threadsafe(self._stop.set)
+        self._thread.join()
+
+    def reset(self):
+        self.connections.clear()
+        self.http_versions.clear()
+
+
+class Authorization:
+    def get_access_token(self):
+        return "token"
+
+
+async def run(url, num_requests, http2, limits):
+    client = firecrest.AsyncFirecrest(
+        firecrest_url=url,
+        authorization=Authorization(),
+        verify=False,
+        http2=http2,
+        limits=limits,
+    )
+    client.time_between_calls = {k: 0 for k in client.time_between_calls}
+    client.disable_client_logging = True
+    start = time.perf_counter()
+    await asyncio.gather(*(client.all_services() for _ in range(num_requests)))
+    elapsed = time.perf_counter() - start
+    await client.close_session()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--max-connections", type=int, default=100)
+    parser.add_argument("--max-keepalive-connections", type=int, default=20)
+    parser.add_argument("--port", type=int, default=8443)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        certfile = os.path.join(tmpdir, "cert.pem")
+        keyfile = os.path.join(tmpdir, "key.pem")
+        subprocess.run(
+            [
+                "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+                "-keyout", keyfile, "-out", certfile, "-days", "1",
+                "-subj", "/CN=localhost",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        server = Server(certfile, keyfile, args.port)
+        server.start()
+        limits = httpx.Limits(
+            max_connections=args.max_connections,
+            max_keepalive_connections=args.max_keepalive_connections,
+        )
+        url = f"https://127.0.0.1:{args.port}"
+        print(f"{'mode':<10}{'req/s':>12}{'connections':>14}  protocol")
+        for http2 in (False, True):
+            server.reset()
+            elapsed = asyncio.run(run(url, args.requests, http2, limits))
+            print(
+                f"{'HTTP/2' if http2 else 'HTTP/1.1':<10}"
+                f"{args.requests / elapsed:>12.1f}"
+                f"{len(server.connections):>14}  "
+                f"{','.join(sorted(server.http_versions))}"
+            )
+
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+"""Client-side overhead of ``Firecrest`` and ``AsyncFirecrest`` on large
+``ls`` and ``sacct`` responses.
+
+The responses are served from memory by ``InMemoryTransport`` and
+``AsyncInMemoryTransport``, so no socket is opened and the measured time is
+spent only in the client: building the request, checking the response and
+decoding the JSON body. The time of a plain ``json.loads`` of the same body
+is reported for comparison.
+
+Usage::
+
+    python benchmarks/client_overhead.py --entries 100000 --repeat 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import firecrest
+
+
+class Authorization:
+    def get_access_token(self):
+        return "VALID_TOKEN"
+
+
+def ls_payload(entries):
+    return {
+        "description": "List of contents",
+        "output": [
+            {
+                "group": "group",
+                "last_modified": "2021-08-11T11:58:09",
+                "link_target": "",
+                "name": f"file_{i}.txt",
+                "permissions": "rw-r--r--",
+                "size": str(i),
+                "type": "-",
+                "user": "user",
+            }
+            for i in range(entries)
+        ],
+    }
+
+
+def sacct_payload(entries):
+    return {
+        "tasks": {
+            "acct": {
+                "status": "200",
+                "description": "Finished successfully",
+                "data": [
+                    {
+                        "jobid": str(i),
+                        "name": f"job_{i}",
+                        "nodelist": "nid0[0001-0004]",
+                        "nodes": "4",
+                        "partition": "normal",
+                        "start_time": "2022-03-29T14:39:51",
+                        "state": "COMPLETED",
+                        "time": "00:12:01",
+                        "time_left": "2022-03-29T14:51:52",
+                        "user": "user",
+                    }
+                    for i in range(entries)
+                ],
+            }
+        }
+    }
+
+
+def register(transport, entries):
+    ls = ls_payload(entries)
+    sacct = sacct_payload(entries)
+    transport.add_response("GET", "/utilities/ls", json=ls)
+    transport.add_response("GET", "/compute/acct", json={"task_id": "acct"})
+    transport.add_response("GET", "/tasks", json=sacct)
+    return (
+        len(json.dumps(ls).encode()),
+        len(json.dumps(sacct).encode()),
+    )
+
+
+def report(label, elapsed, repeat, size, baseline):
+    per_call = elapsed / repeat
+    print(
+        f"{label:<24} {per_call * 1000:9.2f} ms/call "
+        f"{size / per_call / 1e6:9.1f} MB/s "
+        f"{per_call / baseline:6.2f}x json.loads"
+    )
+
+
+def baseline(size_entries, repeat, payload):
+    body = json.dumps(payload(size_entries)).encode()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        json.loads(body)
+
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_sync(entries, repeat, ls_base, sacct_base):
+    transport = firecrest.InMemoryTransport()
+    ls_size, sacct_size = register(transport, entries)
+    client = firecrest.Firecrest(
+        "http://firecrest.test", Authorization(), transport=transport
+    )
+    client.set_api_version("1.16.0")
+    client.polling_sleep_times = []
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        client.list_files("cluster", "/home/user")
+
+    report("Firecrest ls", time.perf_counter() - start, repeat, ls_size,
+           ls_base)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        client.poll("cluster")
+
+    report("Firecrest sacct", time.perf_counter() - start, repeat,
+           sacct_size, sacct_base)
+
+
+async def bench_async(entries, repeat, ls_base, sacct_base):
+    transport = firecrest.AsyncInMemoryTransport()
+    ls_size, sacct_size = register(transport, entries)
+    client = firecrest.AsyncFirecrest(
+        "http://firecrest.test", Authorization(), transport=transport
+    )
+    client.set_api_version("1.16.0")
+    client.time_between_calls = {k: 0 for k in client.time_between_calls}
+    client.polling_sleep_times = []
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await client.list_files("cluster", "/home/user")
+
+    report("AsyncFirecrest ls", time.perf_counter() - start, repeat, ls_size,
+           ls_base)
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        await client.poll("cluster")
+
+    report("AsyncFirecrest sacct", time.perf_counter() - start, repeat,
+           sacct_size, sacct_base)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=100_000,
+                        help="number of files and jobs in the responses")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    ls_base = baseline(args.entries, args.repeat, ls_payload)
+    sacct_base = baseline(args.entries, args.repeat, sacct_payload)
+    print(f"{args.entries} entries, {args.repeat} calls per method")
+    bench_sync(args.entries, args.repeat, ls_base, sacct_base)
+    asyncio.run(bench_async(args.entries, args.repeat, ls_base, sacct_base))
+
+
+if __name__ == "__main__":
+    main()
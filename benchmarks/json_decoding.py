@@ -0,0 +1,106 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+"""Decoding time of ``ls`` (``LsFile``) and ``sacct`` (``JobAcct``) responses
+of increasing size, with the standard library decoder and with orjson.
+
+The first table compares the decoders alone, the second one the
+``list_files`` and ``poll`` calls of a ``Firecrest`` client, with the
+responses served from memory by ``InMemoryTransport``.
+
+Usage::
+
+    pip install pyfirecrest[fast-json]
+    python benchmarks/json_decoding.py --sizes 100 1000 10000 100000
+"""
+import argparse
+import json
+import time
+
+import firecrest
+
+from client_overhead import Authorization, ls_payload, register, sacct_payload
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
+
+
+def decoders():
+    ret = {"json": json.loads}
+    if orjson is not None:
+        ret["orjson"] = orjson.loads
+    else:
+        print("orjson is not installed, only `json` will be measured")
+
+    return ret
+
+
+def timed(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def bench_decoders(sizes, repeat):
+    print(f"{'payload':<8} {'entries':>8} {'MB':>7}", end="")
+    for name in decoders():
+        print(f" {name + ' ms':>10}", end="")
+
+    print()
+    for payload_name, payload in (("LsFile", ls_payload),
+                                  ("JobAcct", sacct_payload)):
+        for size in sizes:
+            body = json.dumps(payload(size)).encode()
+            print(f"{payload_name:<8} {size:>8} {len(body) / 1e6:>7.2f}", end="")
+            for loads in decoders().values():
+                print(f" {timed(lambda: loads(body), repeat):>10.2f}", end="")
+
+            print()
+
+
+def bench_client(sizes, repeat):
+    print(f"\n{'call':<10} {'entries':>8}", end="")
+    for name in decoders():
+        print(f" {name + ' ms':>10}", end="")
+
+    print()
+    for size in sizes:
+        transport = firecrest.InMemoryTransport()
+        register(transport, size)
+        client = firecrest.Firecrest(
+            "http://firecrest.test", Authorization(), transport=transport
+        )
+        client.set_api_version("1.16.0")
+        client.polling_sleep_times = []
+        for call_name, call in (
+            ("list_files", lambda: client.list_files("cluster", "/home")),
+            ("poll", lambda: client.poll("cluster")),
+        ):
+            print(f"{call_name:<10} {size:>8}", end="")
+            for loads in decoders().values():
+                client.json_decoder = loads
+                print(f" {timed(call, repeat):>10.2f}", end="")
+
+            print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[100, 1000, 10_000, 100_000],
+                        help="number of entries in the responses")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    bench_decoders(args.sizes, args.repeat)
+    bench_client(args.sizes, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+"""Achieved request rate and latency of ``AsyncFirecrest`` with many
+concurrent coroutines that share the rate limit of one microservice.
+
+The responses are served from memory by ``AsyncInMemoryTransport``, so the
+latency of each call is the time it waited for the rate limit. The token
+bucket limiter of the client is compared with the fixed spacing between
+requests that the client used before, for different burst sizes.
+
+Usage::
+
+    python benchmarks/rate_limiter.py --coroutines 1000 --rate 200
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import firecrest
+
+
+class Authorization:
+    def get_access_token(self):
+        return "VALID_TOKEN"
+
+
+def new_client(rate, burst):
+    transport = firecrest.AsyncInMemoryTransport()
+    transport.add_response("GET", "/status/services", json={"out": []})
+    client = firecrest.AsyncFirecrest(
+        "http://firecrest.test", Authorization(), transport=transport
+    )
+    client.time_between_calls["status"] = 1 / rate
+    client.burst_size["status"] = burst
+    return client
+
+
+def fixed_spacing_client(rate):
+    """Client with the previous limiter: every request waits until
+    `time_between_calls` has passed since the previous one."""
+    client = new_client(rate, 1)
+    next_request_ts = {"status": 0.0}
+
+    async def stall_request(microservice):
+        while time.time() <= next_request_ts[microservice]:
+            await asyncio.sleep(next_request_ts[microservice] - time.time())
+
+        next_request_ts[microservice] = (
+            time.time() + client.time_between_calls[microservice]
+        )
+
+    client._stall_request = stall_request
+    return client
+
+
+async def run(client, coroutines):
+    latencies = []
+
+    async def call():
+        start = time.perf_counter()
+        await client.all_services()
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(call() for _ in range(coroutines)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return (
+        coroutines / elapsed,
+        statistics.median(latencies),
+        latencies[int(0.99 * (len(latencies) - 1))],
+        latencies[-1],
+    )
+
+
+def report(label, result):
+    rate, p50, p99, worst = result
+    print(
+        f"{label:<20} {rate:9.1f} req/s  p50 {p50:7.3f} s  "
+        f"p99 {p99:7.3f} s  max {worst:7.3f} s"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--coroutines", type=int, default=1000)
+    parser.add_argument("--rate", type=float, default=200,
+                        help="target requests per second")
+    parser.add_argument("--bursts", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    print(f"{args.coroutines} coroutines, target {args.rate} req/s")
+    report(
+        "fixed spacing",
+        await run(fixed_spacing_client(args.rate), args.coroutines)
+    )
+    for burst in args.bursts:
+        report(
+            f"token bucket, burst {burst}",
+            await run(new_client(args.rate, burst), args.coroutines)
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,124 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+"""Time and number of requests to submit a sweep of jobs with a loop of
+``Firecrest.submit`` and with ``Firecrest.submit_many``.
+
+The server is simulated by ``InMemoryTransport``: every request takes
+``--latency`` seconds and every submission task is finished ``--task-time``
+seconds after the upload.
+
+Usage::
+
+    python benchmarks/submit_many.py --jobs 200 --latency 0.02
+"""
+import argparse
+import itertools
+import threading
+import time
+
+import httpx
+
+import firecrest
+
+
+class Authorization:
+    def get_access_token(self):
+        return "VALID_TOKEN"
+
+
+class SimulatedServer:
+    def __init__(self, latency, task_time):
+        self.latency = latency
+        self.task_time = task_time
+        self.ids = itertools.count()
+        self.tasks = {}
+        self.requests = {"POST": 0, "GET": 0}
+        self.lock = threading.Lock()
+
+    def upload_handler(self, request):
+        time.sleep(self.latency)
+        with self.lock:
+            self.requests["POST"] += 1
+            task_id = str(next(self.ids))
+            self.tasks[task_id] = time.perf_counter() + self.task_time
+
+        return httpx.Response(201, json={"task_id": task_id})
+
+    def tasks_handler(self, request):
+        time.sleep(self.latency)
+        with self.lock:
+            self.requests["GET"] += 1
+
+        now = time.perf_counter()
+        tasks = {}
+        for task_id in request.url.params["tasks"].split(","):
+            done = now >= self.tasks[task_id]
+            tasks[task_id] = {
+                "hash_id": task_id,
+                "status": "200" if done else "100",
+                "data": {"jobid": int(task_id)} if done else None,
+            }
+
+        return httpx.Response(200, json={"tasks": tasks})
+
+    def client(self):
+        transport = firecrest.InMemoryTransport()
+        transport.add_handler(
+            "POST", "/compute/jobs/upload", self.upload_handler
+        )
+        transport.add_handler("GET", "/tasks", self.tasks_handler)
+        client = firecrest.Firecrest(
+            "http://firecrest.test", Authorization(), transport=transport
+        )
+        client.set_api_version("1.16.0")
+        return client
+
+
+def report(label, server, elapsed, jobs):
+    print(
+        f"{label:<30} {elapsed:7.2f} s  {jobs / elapsed:7.1f} jobs/s  "
+        f"POST {server.requests['POST']:5d}  /tasks {server.requests['GET']:5d}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--jobs", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02,
+                        help="seconds per request")
+    parser.add_argument("--task-time", type=float, default=0.5,
+                        help="seconds until a submission task is finished")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    scripts = [f"#!/bin/bash\necho {i}\n" for i in range(args.jobs)]
+
+    server = SimulatedServer(args.latency, args.task_time)
+    client = server.client()
+    start = time.perf_counter()
+    for script in scripts:
+        client.submit("cluster", script_str=script)
+
+    report("loop of submit", server, time.perf_counter() - start, args.jobs)
+
+    for workers in args.workers:
+        server = SimulatedServer(args.latency, args.task_time)
+        client = server.client()
+        start = time.perf_counter()
+        client.submit_many(
+            "cluster",
+            [{"script_str": script} for script in scripts],
+            max_workers=workers,
+        )
+        report(
+            f"submit_many, {workers} workers", server,
+            time.perf_counter() - start, args.jobs
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+"""TLS handshakes and throughput of a ``Firecrest`` client that is shared by
+a thread pool, for different connection pool sizes.
+
+The server is a local threaded HTTPS server with a self-signed certificate
+that is created with the ``openssl`` command line tool. Every accepted
+connection is one TLS handshake.
+
+Usage::
+
+    python benchmarks/sync_pool.py --requests 2000
+"""
+import argparse
+import concurrent.futures
+import http.server
+import json
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+
+import firecrest
+
+
+STAT = json.dumps({
+    "description": "Process stat",
+    "output": {
+        "atime": 1653382345, "ctime": 1653382345, "dev": 2418, "gid": 1000,
+        "ino": 648577914, "mode": 33188, "mtime": 1653382345, "nlink": 1,
+        "size": 0, "uid": 25948,
+    },
+}).encode()
+
+
+class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STAT)))
+        self.end_headers()
+        self.wfile.write(STAT)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Server(http.server.ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, context):
+        super().__init__(address, Handler)
+        self.socket = context.wrap_socket(self.socket, server_side=True)
+        self.handshakes = 0
+        self._lock = threading.Lock()
+
+    def get_request(self):
+        request = super().get_request()
+        with self._lock:
+            self.handshakes += 1
+
+        return request
+
+
+class Authorization:
+    def get_access_token(self):
+        return "token"
+
+
+def run(url, num_requests, threads, pool_maxsize):
+    client = firecrest.Firecrest(
+        firecrest_url=url,
+        authorization=Authorization(),
+        verify=False,
+        pool_maxsize=pool_maxsize,
+    )
+    client.disable_client_logging = True
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(
+            lambda i: client.stat("cluster", f"/home/user/file{i}"),
+            range(num_requests)
+        ))
+
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--port", type=int, default=8444)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        certfile = os.path.join(tmpdir, "cert.pem")
+        keyfile = os.path.join(tmpdir, "key.pem")
+        subprocess.run(
+            [
+                "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+                "-keyout", keyfile, "-out", certfile, "-days", "1",
+                "-subj", "/CN=localhost",
+            ],
+            check=True,
+            capture_output=True,
+        )
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(certfile, keyfile)
+        server = Server(("127.0.0.1", args.port), context)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        url = f"https://127.0.0.1:{args.port}"
+        print(f"{'threads':>8}{'pool_maxsize':>14}{'req/s':>12}{'handshakes':>12}")
+        for threads in (1, 8, 64):
+            for pool_maxsize in sorted({10, threads}):
+                server.handshakes = 0
+                elapsed = run(url, args.requests, threads, pool_maxsize)
+                print(
+                    f"{threads:>8}{pool_maxsize:>14}"
+                    f"{args.requests / elapsed:>12.1f}{server.handshakes:>12}"
+                )
+
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+"""Number of ``/tasks`` requests and added latency of the task polling of
+``Firecrest``, with the fixed ``polling_sleep_times`` and with an
+``AdaptivePollingSchedule``.
+
+The tasks are served by ``InMemoryTransport`` and finish after a random
+time around the duration of their endpoint (``squeue`` fast, ``sacct``
+slow). The added latency is the time between the end of the task and the
+moment the client saw it. All the times, including the sleeps of both
+schedules, are multiplied by ``--scale`` so that the benchmark runs fast.
+
+Usage::
+
+    python benchmarks/task_polling.py --tasks 40 --scale 0.05
+"""
+import argparse
+import random
+import statistics
+import time
+
+import httpx
+
+import firecrest
+
+
+# Mean duration in seconds of the tasks of each endpoint
+DURATIONS = {
+    "/compute/jobs": 0.5,
+    "/compute/acct": 8,
+}
+
+
+class Authorization:
+    def get_access_token(self):
+        return "VALID_TOKEN"
+
+
+class SimulatedServer:
+    def __init__(self, scale, seed):
+        self.scale = scale
+        self.random = random.Random(seed)
+        self.tasks = {}
+        self.finished = {}
+        self.task_requests = 0
+
+    def task_handler(self, endpoint):
+        def handler(request):
+            task_id = str(len(self.tasks))
+            duration = DURATIONS[endpoint] * self.random.uniform(0.8, 1.2)
+            self.tasks[task_id] = (
+                endpoint, time.perf_counter() + duration * self.scale
+            )
+            return httpx.Response(200, json={"task_id": task_id})
+
+        return handler
+
+    def tasks_handler(self, request):
+        self.task_requests += 1
+        task_id = request.url.params["tasks"]
+        endpoint, end = self.tasks[task_id]
+        done = time.perf_counter() >= end
+        task = {
+            "hash_id": task_id,
+            "status": "200" if done else "100",
+            # `squeue` returns a dictionary, `sacct` a list
+            "data": {} if endpoint == "/compute/jobs" else [],
+            "system": "cluster",
+        }
+        if done:
+            self.finished.setdefault(task_id, end)
+
+        return httpx.Response(200, json={"tasks": {task_id: task}})
+
+    def transport(self):
+        transport = firecrest.InMemoryTransport()
+        for endpoint in DURATIONS:
+            transport.add_handler("GET", endpoint, self.task_handler(endpoint))
+
+        transport.add_handler("GET", "/tasks", self.tasks_handler)
+        return transport
+
+
+def run(server, schedule, tasks):
+    client = firecrest.Firecrest(
+        "http://firecrest.test", Authorization(), transport=server.transport()
+    )
+    client.set_api_version("1.16.0")
+    client.polling_sleep_times = [
+        t * server.scale for t in client.polling_sleep_times
+    ]
+    client.polling_schedule = schedule
+    latencies = {endpoint: [] for endpoint in DURATIONS}
+    for i in range(tasks):
+        for endpoint, latency in latencies.items():
+            before = server.task_requests
+            if endpoint == "/compute/jobs":
+                client.poll_active("cluster")
+            else:
+                client.poll("cluster")
+
+            seen = time.perf_counter()
+            task_id = str(len(server.tasks) - 1)
+            latency.append((
+                (seen - server.finished[task_id]) / server.scale,
+                server.task_requests - before,
+            ))
+
+    return latencies
+
+
+def report(label, latencies):
+    for endpoint, values in latencies.items():
+        added = [v[0] for v in values]
+        requests = [v[1] for v in values]
+        print(
+            f"{label:<10} {endpoint:<15} "
+            f"/tasks per task {statistics.mean(requests):6.1f}  "
+            f"added latency p50 {statistics.median(added):6.2f} s  "
+            f"max {max(added):6.2f} s"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--tasks", type=int, default=40,
+                        help="tasks of each endpoint")
+    parser.add_argument("--scale", type=float, default=0.05,
+                        help="factor of all the times")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    report("fixed", run(SimulatedServer(args.scale, args.seed), None,
+                        args.tasks))
+    schedule = firecrest.AdaptivePollingSchedule(
+        min_sleep=0.1 * args.scale,
+        max_sleep=10 * args.scale,
+        max_elapsed=60 * args.scale,
+    )
+    report("adaptive", run(SimulatedServer(args.scale, args.seed), schedule,
+                           args.tasks))
+
+
+if __name__ == "__main__":
+    main()
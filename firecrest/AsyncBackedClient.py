@@ -0,0 +1,272 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import threading
+
+from typing import (
+    Any,
+    AsyncIterator,
+    Coroutine,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+)
+
+from firecrest.AsyncClient import AsyncFirecrest
+from firecrest.AsyncExternalStorage import AsyncExternalStorage
+from firecrest.BasicClient import Firecrest
+from firecrest.JobHandle import AsyncJobHandle
+
+
+T = TypeVar("T")
+
+
+class _BlockingProxy:
+    """Blocking view of the async objects that the client returns: the
+    external storage objects (`AsyncExternalStorage`) and the job handles
+    (`AsyncJobHandle`). The coroutines and the async properties of the
+    object are run on the event loop of the client and their results are
+    returned.
+    """
+
+    def __init__(
+        self,
+        client: AsyncBackedFirecrest,
+        obj: AsyncExternalStorage | AsyncJobHandle,
+    ) -> None:
+        self._client = client
+        self._obj = obj
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._obj, name)
+        if inspect.iscoroutine(attr):
+            # Async properties, like `status` or `object_storage_data`
+            return self._client._run(attr)
+
+        if inspect.iscoroutinefunction(attr):
+            @functools.wraps(attr)
+            def wrapper(*args, **kwargs):
+                return self._client._run(attr(*args, **kwargs))
+
+            return wrapper
+
+        return attr
+
+
+class AsyncBackedFirecrest:
+    """
+    Blocking client with the same methods as `Firecrest`, that runs an
+    `AsyncFirecrest` client on an event loop in a background thread.
+    All the threads that share this object go through the same async client,
+    so they share its rate limiting (`time_between_calls`) and the merging of
+    GET requests (`merge_get_requests`).
+
+    The attributes of the async client, like `time_between_calls`,
+    `merge_get_requests` or `timeout`, can be read and set directly on this
+    object.
+
+    :param firecrest_url: FirecREST's URL
+    :param authorization: the authorization object. This object is responsible of handling the credentials and the only requirement for it is that it has a method get_access_token() that returns a valid access token.
+    :param verify: either a boolean, in which case it controls whether requests will verify the server’s TLS certificate, or a string, in which case it must be a path to a CA bundle to use
+    :param sa_role: this corresponds to the `F7T_AUTH_ROLE` configuration parameter of the site. If you don't know how FirecREST is setup it's better to leave the default.
+    :param kwargs: extra keyword arguments for `AsyncFirecrest`, like `http2` or `limits`
+    """
+
+    def __init__(
+        self,
+        firecrest_url: str,
+        authorization: Any,
+        verify: Any = True,
+        sa_role: str = "firecrest-sa",
+        **kwargs: Any,
+    ) -> None:
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._run_loop, name="firecrest-event-loop", daemon=True
+        )
+        self._thread.start()
+
+        async def create_client():
+            # The client has to be created in the event loop, because older
+            # versions of asyncio bind the locks to the current loop
+            return AsyncFirecrest(
+                firecrest_url, authorization, verify, sa_role, **kwargs
+            )
+
+        self._client: AsyncFirecrest = self._run(create_client())
+
+    def _run_loop(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_forever()
+
+    def _run(self, coro: Coroutine[Any, Any, T]) -> T:
+        if threading.current_thread() is self._thread:
+            coro.close()
+            raise RuntimeError(
+                "blocking calls cannot be made from the event loop of the "
+                "client, use the `async_client` instead"
+            )
+
+        result = asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+        if isinstance(result, (AsyncExternalStorage, AsyncJobHandle)):
+            return _BlockingProxy(self, result)  # type: ignore
+
+        return result
+
+    @property
+    def async_client(self) -> AsyncFirecrest:
+        """The `AsyncFirecrest` client that makes the requests."""
+        return self._client
+
+    @property
+    def is_closed(self) -> bool:
+        """Check if the client has been closed"""
+        return self._loop.is_closed()
+
+    def close(self) -> None:
+        """Close the httpx session and stop the event loop of the client."""
+        if self._loop.is_closed():
+            return
+
+        self._run(self._client.close_session())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self) -> AsyncBackedFirecrest:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for names that are not found in this object
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        attr = getattr(self._client, name)
+        if inspect.iscoroutinefunction(attr):
+            @functools.wraps(attr)
+            def wrapper(*args, **kwargs):
+                return self._run(attr(*args, **kwargs))
+
+            return wrapper
+
+        return attr
+
+    def _iterate(self, iterator: AsyncIterator[T]) -> Iterator[T]:
+        # Every item is fetched on the event loop of the client
+        async def next_item():
+            return await iterator.__anext__()
+
+        async def close():
+            await iterator.aclose()  # type: ignore
+
+        try:
+            while True:
+                try:
+                    yield self._run(next_item())
+                except StopAsyncIteration:
+                    return
+        finally:
+            if not self._loop.is_closed():
+                # Stops the work of an iterator that was not consumed
+                self._run(close())
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        if name.startswith("_"):
+            super().__setattr__(name, value)
+        else:
+            setattr(self._client, name, value)
+
+    def map(
+        self,
+        method: str,
+        machine: str,
+        items: Iterable[Any],
+        max_workers: Optional[int] = None,
+        return_exceptions: bool = True,
+        **kwargs: Any,
+    ) -> List[Any]:
+        """Call a method of the client once per item, concurrently on the
+        event loop, for example `client.map("stat", machine, paths)`.
+        The results are returned in the same order as the items.
+
+        :param method: the name of the method of the client
+        :param machine: the machine name that is passed to every call
+        :param items: the arguments that follow `machine` in each call. A tuple is unpacked into several positional arguments.
+        :param max_workers: the maximum number of calls in progress at the same time. When it is `None` there is no limit and the rate is controlled by the async client.
+        :param return_exceptions: when `True`, the exception of a failed call is returned in the place of its result, otherwise the first exception (in the order of the items) is raised
+        :param kwargs: keyword arguments that are passed to every call
+        """
+        if (
+            method.startswith("_") or
+            not inspect.iscoroutinefunction(getattr(self._client, method, None))
+        ):
+            raise ValueError(f"`{method}` is not a method of the client")
+
+        func = getattr(self._client, method)
+
+        async def gather():
+            semaphore = (
+                asyncio.Semaphore(max_workers) if max_workers else None
+            )
+
+            async def call(item):
+                args = item if isinstance(item, tuple) else (item,)
+                if semaphore is None:
+                    return await func(machine, *args, **kwargs)
+
+                async with semaphore:
+                    return await func(machine, *args, **kwargs)
+
+            return await asyncio.gather(
+                *(call(item) for item in items), return_exceptions=True
+            )
+
+        results = self._run(gather())
+        if not return_exceptions:
+            for res in results:
+                if isinstance(res, BaseException):
+                    raise res
+
+        return results
+
+
+def _blocking_method(name: str):
+    async_func = getattr(AsyncFirecrest, name)
+
+    # Take the signature and the docstring from the blocking client
+    @functools.wraps(getattr(Firecrest, name))
+    def wrapper(self, *args, **kwargs):
+        return self._run(async_func(self._client, *args, **kwargs))
+
+    return wrapper
+
+
+def _blocking_iterator(name: str):
+    async_func = getattr(AsyncFirecrest, name)
+
+    @functools.wraps(getattr(Firecrest, name))
+    def wrapper(self, *args, **kwargs):
+        return self._iterate(async_func(self._client, *args, **kwargs))
+
+    return wrapper
+
+
+for _name, _func in inspect.getmembers(AsyncFirecrest, inspect.iscoroutinefunction):
+    if not _name.startswith("_") and hasattr(Firecrest, _name):
+        setattr(AsyncBackedFirecrest, _name, _blocking_method(_name))
+
+for _name in ("iter_poll", "iter_poll_active"):
+    setattr(AsyncBackedFirecrest, _name, _blocking_iterator(_name))
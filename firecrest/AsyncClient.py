@@ -7,32 +7,64 @@
 from __future__ import annotations
 
 import asyncio
+import collections
 import httpx
 from io import BytesIO
 import itertools
 import jwt
 import logging
+import math
 import os
 import pathlib
-import requests
 import ssl
 import sys
 import tempfile
 import time
 
 from contextlib import nullcontext
-from typing import Any, ContextManager, Optional, overload, Sequence, List
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    ContextManager,
+    List,
+    Optional,
+    overload,
+    Sequence,
+)
 from requests.compat import json  # type: ignore
 from packaging.version import Version, parse
 
 import firecrest.FirecrestException as fe
 import firecrest.types as t
 from firecrest.AsyncExternalStorage import AsyncExternalUpload, AsyncExternalDownload
+from firecrest.AsyncJobMonitor import AsyncJobMonitor
+from firecrest.CircuitBreaker import CircuitBreaker
+from firecrest.JobHandle import AsyncJobHandle, _AsyncJobHandles
+from firecrest.JobMonitor import JobStateChange
+from firecrest.PollingSchedule import AdaptivePollingSchedule
+from firecrest.RateLimiter import (
+    AdaptiveConcurrency,
+    AdaptiveThrottle,
+    AsyncRateLimiter,
+    Buckets,
+    Priority,
+    request_priority,
+)
+from firecrest.RetryPolicy import RetryPolicy, _NO_RETRIES
+from firecrest.Transport import AsyncTransport, HttpxTransport, Response
 from firecrest.utilities import (
     async_validate_api_version_compatibility,
-    parse_retry_after,
+    default_json_decoder,
+    get_request_key,
+    json_response,
+    log_response_size,
+    retry_after,
+    rewind_uploaded_file,
     slurm_state_completed,
-    time_block
+    task_kind,
+    time_block,
+    uploaded_file_position
 )
 
 
@@ -64,7 +96,7 @@ class ComputeTask:
         self,
         client: AsyncFirecrest,
         task_id: str,
-        previous_responses: Optional[List[requests.Response]] = None,
+        previous_responses: Optional[List[Response]] = None,
     ) -> None:
         self._responses = [] if previous_responses is None else previous_responses
         self._client = client
@@ -75,14 +107,40 @@ class ComputeTask:
             logging.INFO,
             f"Polling task {self._task_id} until status is {final_status}"
         )
-        resp = await self._client._task_safe(self._task_id, self._responses)
+        schedule = self._client.polling_schedule
+        kind = None
+        if schedule is not None:
+            kind = task_kind(self._responses)
+            sleep_times = schedule.sleep_times(kind)
+
+        start = time.time()
+        result = await self._poll_task_until(final_status, sleep_times)
+        if schedule is not None and kind is not None:
+            schedule.record(
+                kind, sleep_times.completion_time(time.time() - start)
+            )
+
+        return result
+
+    async def _poll_task_until(self, final_status, sleep_times):
+        # Polling runs in the background of the caller, so it shouldn't
+        # delay the interactive requests that share the rate limit
+        with request_priority(Priority.LOW):
+            resp = await self._client._task_safe(
+                self._task_id, self._responses
+            )
+
         while resp["status"] < final_status:
             try:
                 await asyncio.sleep(next(sleep_times))
             except StopIteration:
                 raise fe.PollingIterException(self._task_id)
 
-            resp = await self._client._task_safe(self._task_id, self._responses)
+            with request_priority(Priority.LOW):
+                resp = await self._client._task_safe(
+                    self._task_id, self._responses
+                )
+
             self._client.log(
                 logging.INFO,
                 f'Status of {self._task_id} is {resp["status"]}'
@@ -100,6 +158,10 @@ class AsyncFirecrest:
     :param authorization: the authorization object. This object is responsible of handling the credentials and the only requirement for it is that it has a method get_access_token() that returns a valid access token.
     :param verify: either a boolean, in which case it controls whether requests will verify the server’s TLS certificate, or a string, in which case it must be a path to a CA bundle to use
     :param sa_role: this corresponds to the `F7T_AUTH_ROLE` configuration parameter of the site. If you don't know how FirecREST is setup it's better to leave the default.
+    :param http2: enable HTTP/2 in the httpx session, so that concurrent requests are multiplexed over a few connections. It requires the `h2` package (`pip install pyfirecrest[http2]`).
+    :param limits: connection pool limits of the httpx session (maximum number of connections, keep-alive connections and keep-alive expiry). When it is `None` the httpx defaults are used.
+    :param transport: the object that sends the HTTP requests. By default a `HttpxTransport` is created from `verify`, `http2` and `limits`, which are ignored when a transport is given.
+    :param rate_limit_backend: where the token buckets of the rate limits are kept. By default they are local to the client; with a `FileBuckets` object the rate limits are shared by all the clients in the processes of the host that use the same directory.
     """
 
     TOO_MANY_REQUESTS_CODE = 429
@@ -108,63 +170,120 @@ class AsyncFirecrest:
     def _retry_requests(func):
         async def wrapper(*args, **kwargs):
             client = args[0]
+            method = args[1]
+            endpoint = kwargs["endpoint"]
+            microservice = endpoint.split("/")[1]
+            policy = client.retry_policy or _NO_RETRIES
+            start_time = time.time()
             num_retries = 0
-            try:
-                f = kwargs["files"]["file"]
-                file_original_position = f[1].tell() if isinstance(f, tuple) else f.tell()
-            except KeyError:
-                file_original_position = None
-
-            resp = await func(*args, **kwargs)
+            num_transient_retries = 0
+            file_original_position = uploaded_file_position(
+                kwargs.get("files")
+            )
             while True:
-                if resp.status_code != client.TOO_MANY_REQUESTS_CODE:
-                    break
-                elif (
-                    client.num_retries_rate_limit is not None
-                    and num_retries >= client.num_retries_rate_limit
-                ):
+                delay = 0.0
+                try:
+                    resp = await func(*args, **kwargs)
+                except Exception as e:
+                    if not policy.is_retryable_exception(method, e):
+                        raise
+
+                    delay = policy.backoff(num_transient_retries)
+                    if not policy.allows(
+                        num_transient_retries, time.time() - start_time, delay
+                    ):
+                        raise
+
                     client.log(
-                        logging.DEBUG,
-                        f"Rate limit is reached and the request has "
-                        f"been retried already {num_retries} times"
+                        logging.WARNING,
+                        f"{method} request to {endpoint} failed with "
+                        f"{e!r}, will retry in {delay:.2f} seconds"
                     )
-                    break
+                    num_transient_retries += 1
                 else:
-                    reset = resp.headers.get(
-                        "Retry-After",
-                        default=resp.headers.get(
-                            "RateLimit-Reset", default=10
-                        ),
-                    )
-                    reset = parse_retry_after(reset, client.log)
-                    try:
-                        f = kwargs["files"]["file"]
+                    if client.adaptive_throttle is not None:
+                        client.adaptive_throttle.observe(microservice, resp)
+
+                    if resp.status_code == client.TOO_MANY_REQUESTS_CODE:
+                        if (
+                            client.num_retries_rate_limit is not None
+                            and num_retries >= client.num_retries_rate_limit
+                        ):
+                            client.log(
+                                logging.DEBUG,
+                                f"Rate limit is reached and the request has "
+                                f"been retried already {num_retries} times"
+                            )
+                            return resp
+
+                        reset = policy.rate_limit_delay(
+                            retry_after(resp, client.log)
+                        )
+                        if not policy.within_time(
+                            time.time() - start_time, reset
+                        ):
+                            return resp
+
                         client.log(
-                            logging.DEBUG,
-                            f"Resetting the file pointer of the uploaded file "
-                            f"to {file_original_position}"
+                            logging.INFO,
+                            f"Rate limit in `{microservice}` is reached, next "
+                            f"request will be possible in {reset:.2f} sec"
+                        )
+                        # The next requests of the microservice will wait
+                        # in `_stall_request`
+                        client._rate_limiter.pause(
+                            microservice, time.time() + reset
                         )
-                        if isinstance(f, tuple):
-                            f[1].seek(file_original_position)
-                        else:
-                            f.seek(file_original_position)
 
-                    except KeyError:
-                        pass
+                        num_retries += 1
+                    elif policy.is_retryable_response(method, resp):
+                        delay = policy.backoff(num_transient_retries)
+                        if not policy.allows(
+                            num_transient_retries,
+                            time.time() - start_time,
+                            delay
+                        ):
+                            return resp
 
-                    microservice = kwargs["endpoint"].split("/")[1]
-                    client = args[0]
-                    client.log(
-                        logging.INFO,
-                        f"Rate limit in `{microservice}` is reached, next "
-                        f"request will be possible in {reset} sec"
-                    )
-                    retry_time = time.time() + reset
-                    if retry_time > client._next_request_ts[microservice]:
-                        client._next_request_ts[microservice] = retry_time
+                        client.log(
+                            logging.WARNING,
+                            f"{method} request to {endpoint} got status "
+                            f"{resp.status_code}, will retry in {delay:.2f} "
+                            f"seconds"
+                        )
+                        num_transient_retries += 1
+                    else:
+                        return resp
 
-                    resp = await func(*args, **kwargs)
-                    num_retries += 1
+                rewind_uploaded_file(
+                    kwargs.get("files"), file_original_position, client.log
+                )
+                if delay > 0:
+                    await asyncio.sleep(delay)
+
+        return wrapper
+
+    def _circuit_breaker(func):
+        async def wrapper(*args, **kwargs):
+            client = args[0]
+            breaker = client.circuit_breaker
+            if breaker is None:
+                return await func(*args, **kwargs)
+
+            microservice = kwargs["endpoint"].split("/")[1]
+            await client._check_circuit(microservice)
+            try:
+                resp = await func(*args, **kwargs)
+            except Exception as e:
+                if breaker.is_failure(exc=e):
+                    breaker.record_failure(microservice)
+
+                raise
+
+            if breaker.is_failure(response=resp):
+                breaker.record_failure(microservice)
+            else:
+                breaker.record_success(microservice)
 
             return resp
 
@@ -176,12 +295,13 @@ class AsyncFirecrest:
         authorization: Any,
         verify: str | bool | ssl.SSLContext = True,
         sa_role: str = "firecrest-sa",
+        http2: bool = False,
+        limits: Optional[httpx.Limits] = None,
+        transport: Optional[AsyncTransport] = None,
+        rate_limit_backend: Optional[Buckets] = None,
     ) -> None:
         self._firecrest_url = firecrest_url
         self._authorization = authorization
-        # This should be used only for blocking operations that require multiple requests,
-        # not for external upload/download
-        self._current_method_requests: List[requests.Response] = []
         self._verify = verify
         self._sa_role = sa_role
         #: This attribute will be passed to all the requests that will be made.
@@ -195,18 +315,48 @@ class AsyncFirecrest:
         #: Number of retries in case the rate limit is reached. When it is set to `None`, the
         #: client will keep trying until it gets a different status code than 429.
         self.num_retries_rate_limit: Optional[int] = None
+        #: Policy for retrying the requests that fail with a transient
+        #: error, like a connection error, a timeout or a 502/503/504 status.
+        #: It is `None` (no retries) by default.
+        self.retry_policy: Optional[RetryPolicy] = None
+        #: Circuit breaker for the requests to each microservice. When it
+        #: is set, the requests to a microservice that has failed repeatedly
+        #: fail immediately with `CircuitOpenException`, until the
+        #: microservice is available again. It is `None` (disabled) by
+        #: default.
+        self.circuit_breaker: Optional[CircuitBreaker] = None
+        #: Controller that lowers the request rate of a microservice when
+        #: the `RateLimit-Remaining` header of its responses shows that the
+        #: quota is running out, before the requests are rejected. It is
+        #: `None` (disabled) by default.
+        self.adaptive_throttle: Optional[AdaptiveThrottle] = None
         #: Set the sleep times for the polling of a task. When this is a
         #: a list an error will be raised if the task is not finished after
         #: the last sleep time. By default this an list of 250 zeros in this
         #: client and the rate will be controlled by the request rate of the
         #: `tasks` microservice.
         self.polling_sleep_times: list = 250 * [0]
+        #: Schedule of the polls of the tasks that is learned from the
+        #: completion times of the previous tasks of the same kind. When it
+        #: is set, it is used instead of `polling_sleep_times`.
+        self.polling_schedule: Optional[AdaptivePollingSchedule] = None
         #: Disable all logging from the client.
         self.disable_client_logging: bool = False
-        self._session = httpx.AsyncClient(verify=self._verify)
-
-        #: Seconds between requests in each microservice
-        self.time_between_calls: dict[str, float] = {  # TODO more detailed docs
+        #: Function that decodes the JSON body of the responses, from bytes.
+        #: By default it is `orjson.loads` when orjson is installed
+        #: (`pip install pyfirecrest[fast-json]`), which is several times
+        #: faster for large listings, and `json.loads` otherwise.
+        self.json_decoder: Callable[[bytes], Any] = default_json_decoder()
+        if transport is None:
+            transport = HttpxTransport(verify=verify, http2=http2, limits=limits)
+
+        self._transport = transport
+
+        #: Seconds between requests in each microservice, on average. The
+        #: requests of each microservice are limited by a token bucket that
+        #: is filled with one token every `time_between_calls` seconds, up
+        #: to `burst_size` tokens. When it is 0 there is no limit.
+        self.time_between_calls: dict[str, float] = {
             "compute": 1,
             "reservations": 0.1,
             "status": 0.1,
@@ -214,40 +364,53 @@ class AsyncFirecrest:
             "tasks": 0.1,
             "utilities": 0.1,
         }
+        #: Number of requests in each microservice that can be made at once,
+        #: without waiting `time_between_calls` between them, after the
+        #: microservice has not been used for a while. By default it is 1
+        #: for all microservices.
+        self.burst_size: dict[str, float] = {}
+        #: Seconds between requests to each machine, on average, keyed by the
+        #: name of the machine. The requests to a machine wait for this
+        #: limit before they wait for the limit of the microservice, so the
+        #: requests to a busy machine don't hold back the requests to the
+        #: rest. By default the machines are not limited.
+        self.machine_time_between_calls: dict[str, float] = {}
+        #: Limit of the concurrent requests to each machine. When it is set,
+        #: the requests to a machine that is slow to respond wait for the
+        #: previous ones to finish, instead of filling the connection pool
+        #: and the rate limits of the microservices. It is `None` (disabled)
+        #: by default.
+        self.machine_concurrency: Optional[AdaptiveConcurrency] = None
         #: Merge GET requests to the same endpoint, when possible. This will
         #: take effect only when the time_between_calls of the microservice
         #: is greater than 0.
         self.merge_get_requests: bool = False
-        self._next_request_ts: dict[str, float] = {
-            "compute": 0,
-            "reservations": 0,
-            "status": 0,
-            "storage": 0,
-            "tasks": 0,
-            "utilities": 0,
-        }
-        self._locks = {
-            "/compute/jobs": asyncio.Lock(),
-            "/compute/acct": asyncio.Lock(),
-            "/tasks": asyncio.Lock(),
-        }
+        #: Make only one request for identical GET requests (same endpoint,
+        #: parameters and machine) that are made at the same time. The
+        #: requests that arrive while the first one is in flight get its
+        #: response, or its error.
+        self.deduplicate_get_requests: bool = False
+        #: Number of GET requests that were not sent because they got the
+        #: response of an identical request, for each endpoint.
+        self.deduplicated_requests: collections.Counter[str] = collections.Counter()
+        self._get_requests_in_flight: dict[tuple, asyncio.Task] = {}
+        # Handles of `submit_nowait` that are waiting for their job ID
+        self._job_handles = _AsyncJobHandles(self)
+        self._rate_limiter = AsyncRateLimiter(rate_limit_backend)
         # The following objects are used to "merge" requests in the same
-        # endpoints, for example requests to tasks or polling for jobs
-        self._polling_ids: dict[str, set] = {
-            "/compute/jobs": set(),
-            "/compute/acct": set(),
-            "/tasks": set()
-        }
-        self._polling_results: dict[str, List] = {
-            "/compute/jobs": [],
-            "/compute/acct": [],
-            "/tasks": []
-        }
-        self._polling_events: dict[str, Optional[asyncio.Event]] = {
-            "/compute/jobs": None,
-            "/compute/acct": None,
-            "/tasks": None,
-        }
+        # endpoint and machine, for example requests to tasks or polling for
+        # jobs. They are keyed by `(endpoint, machine)`, so the requests of
+        # each machine are merged in their own batch.
+        self._locks: collections.defaultdict[
+            tuple, asyncio.Lock
+        ] = collections.defaultdict(asyncio.Lock)
+        self._polling_ids: collections.defaultdict[
+            tuple, set
+        ] = collections.defaultdict(set)
+        self._polling_results: collections.defaultdict[
+            tuple, List
+        ] = collections.defaultdict(list)
+        self._polling_events: dict[tuple, Optional[asyncio.Event]] = {}
 
         self._api_version = parse("1.15.0")
         self._query_api_version = True
@@ -263,20 +426,18 @@ class AsyncFirecrest:
         self._query_api_version = False
 
     async def close_session(self) -> None:
-        """Close the httpx session"""
-        await self._session.aclose()
+        """Close the session of the transport"""
+        await self._transport.aclose()
 
     async def create_new_session(self) -> None:
-        """Create a new httpx session"""
-        if not self._session.is_closed:
-            await self._session.aclose()
-
-        self._session = httpx.AsyncClient(verify=self._verify)
+        """Create a new session in the transport, with the same HTTP/2 and
+        connection pool settings as the previous one"""
+        await self._transport.reopen()
 
     @property
     def is_session_closed(self) -> bool:
-        """Check if the httpx session is closed"""
-        return self._session.is_closed
+        """Check if the session of the transport is closed"""
+        return self._transport.is_closed
 
     def log(self, level: int, msg: Any) -> None:
         """Log a message with the given level on the client logger.
@@ -289,240 +450,374 @@ class AsyncFirecrest:
     ) -> httpx.Response:
         microservice = endpoint.split("/")[1]
         url = f"{self._firecrest_url}{endpoint}"
+        machine = (
+            additional_headers.get("X-Machine-Name")
+            if additional_headers else None
+        )
+        key = (endpoint, machine)
 
         async def _merged_get(event):
-            await self._stall_request(microservice)
-            async with self._locks[endpoint]:
-                results = self._polling_results[endpoint]
-                ids = self._polling_ids[endpoint].copy()
-                self._polling_events[endpoint] = None
-                self._polling_ids[endpoint] = set()
-                comma_sep_par = "tasks" if microservice == "tasks" else "jobs"
-                if ids == {"*"}:
-                    if comma_sep_par in params:
-                        del params[comma_sep_par]
-                else:
-                    params[comma_sep_par] = ",".join(ids)
-
-                headers = {
-                    "Authorization": f"Bearer {self._authorization.get_access_token()}"
-                }
-                if additional_headers:
-                    headers.update(additional_headers)
-
-                self.log(logging.INFO, f"Making GET request to {endpoint}")
-                with time_block(f"GET request to {endpoint}", logger):
-                    resp = await self._session.get(
-                        url=url, headers=headers,
-                        params=params,
-                        timeout=self.timeout
+            await self._acquire_machine(machine)
+            start = None
+            failed = True
+            try:
+                await self._stall_request(microservice)
+                async with self._locks[key]:
+                    results = self._polling_results[key]
+                    ids = self._polling_ids[key].copy()
+                    self._polling_events[key] = None
+                    self._polling_ids[key] = set()
+                    comma_sep_par = (
+                        "tasks" if microservice == "tasks" else "jobs"
                     )
-
-                self._next_request_ts[microservice] = (
-                    time.time() + self.time_between_calls[microservice]
+                    if ids == {"*"}:
+                        if comma_sep_par in params:
+                            del params[comma_sep_par]
+                    else:
+                        params[comma_sep_par] = ",".join(ids)
+
+                    headers = {
+                        "Authorization": f"Bearer {self._authorization.get_access_token()}"
+                    }
+                    if additional_headers:
+                        headers.update(additional_headers)
+
+                    self.log(logging.INFO, f"Making GET request to {endpoint}")
+                    start = time.time()
+                    try:
+                        with time_block(f"GET request to {endpoint}", logger):
+                            resp = await self._transport.request(
+                                "GET",
+                                url,
+                                headers=headers,
+                                params=params,
+                                timeout=self.timeout
+                            )
+
+                        failed = resp.status_code >= 500
+                        log_response_size("GET", endpoint, resp, self.log)
+                    except Exception as e:
+                        # All the merged requests will raise the error and
+                        # they can be retried
+                        resp = e
+
+                    results.append(resp)
+                    event.set()
+            finally:
+                self._release_machine(
+                    machine,
+                    None if start is None else time.time() - start,
+                    failed
                 )
 
-                results.append(resp)
-                event.set()
-
             return
 
-        async with self._locks[endpoint]:
-            if self._polling_ids[endpoint] != {"*"}:
+        async with self._locks[key]:
+            if self._polling_ids[key] != {"*"}:
                 comma_sep_par = "tasks" if endpoint == "/tasks" else "jobs"
                 if comma_sep_par not in params:
-                    self._polling_ids[endpoint] = {"*"}
+                    self._polling_ids[key] = {"*"}
                 else:
                     new_ids = params[comma_sep_par].split(",")
-                    self._polling_ids[endpoint].update(new_ids)
+                    self._polling_ids[key].update(new_ids)
 
-            if self._polling_events[endpoint] is None:
-                self._polling_events[endpoint] = asyncio.Event()
-                my_event = self._polling_events[endpoint]
-                self._polling_results[endpoint] = []
-                my_result = self._polling_results[endpoint]
+            if self._polling_events.get(key) is None:
+                self._polling_events[key] = asyncio.Event()
+                my_event = self._polling_events[key]
+                self._polling_results[key] = []
+                my_result = self._polling_results[key]
                 waiter = True
                 task = asyncio.create_task(_merged_get(my_event))
             else:
                 waiter = False
-                my_event = self._polling_events[endpoint]
-                my_result = self._polling_results[endpoint]
+                my_event = self._polling_events[key]
+                my_result = self._polling_results[key]
 
         if waiter:
             await task
 
         await my_event.wait()  # type: ignore
         resp = my_result[0]
+        if isinstance(resp, Exception):
+            raise resp
+
         return resp
 
-    async def _get_simple_request(
-        self, endpoint, additional_headers=None, params=None
+    def _can_merge_request(self, method, endpoint, params) -> bool:
+        if method != "GET" or not self.merge_get_requests:
+            return False
+
+        microservice = endpoint.split("/")[1]
+        if (
+            self.time_between_calls[microservice] <= 0 or
+            endpoint not in ("/compute/jobs", "/compute/acct", "/tasks")
+        ):
+            return False
+
+        # We can only merge requests with the additional restrictions:
+        # - For `/compute/acct` we can merge only if the start_time,
+        #     end_time, and pagination parameters are not set.
+        #     Moreover we cannot merge if the `*` is used as a task id,
+        #     because the default `sacct` command will only return the
+        #     jobs of the last day.
+        # - For `/compute/jobs` we can merge only if the pagination
+        #     parameters are not set.
+        # The merged request is sent with the parameters of the first
+        # caller, so none of these may differ between the callers.
+        if endpoint == "/compute/acct":
+            return not any(
+                k in params
+                for k in ("starttime", "endtime", "pageSize", "pageNumber")
+            )
+
+        if endpoint == "/compute/jobs":
+            return not any(
+                k in params for k in ("pageSize", "pageNumber")
+            )
+
+        return endpoint == "/tasks"
+
+    async def _check_circuit(self, microservice: str) -> None:
+        breaker = self.circuit_breaker
+        assert breaker is not None
+        state = breaker.before_request(microservice)
+        if state == breaker.PROBE:
+            # The `status` microservice can only be checked by a request
+            available = microservice == "status"
+            try:
+                if not available:
+                    self.log(
+                        logging.INFO,
+                        f"Checking if `{microservice}` microservice is "
+                        f"available"
+                    )
+                    service = await self.service(microservice)
+                    available = service["status"] == "available"
+            except Exception as e:
+                self.log(
+                    logging.WARNING,
+                    f"Could not get the status of `{microservice}`: {e}"
+                )
+            finally:
+                breaker.probe_result(microservice, available)
+
+            if available:
+                return
+
+            state = breaker.OPEN
+
+        if state == breaker.OPEN:
+            exc = fe.CircuitOpenException(
+                microservice, breaker.retry_after(microservice)
+            )
+            self.log(logging.WARNING, exc)
+            raise exc
+
+    @_circuit_breaker  # type: ignore
+    @_retry_requests  # type: ignore
+    async def _request(
+        self,
+        method,
+        endpoint,
+        additional_headers=None,
+        params=None,
+        data=None,
+        files=None,
     ) -> httpx.Response:
+        if self._can_merge_request(method, endpoint, params):
+            return await self._get_merge_request(
+                endpoint=endpoint,
+                additional_headers=additional_headers,
+                params=params
+            )
+
         microservice = endpoint.split("/")[1]
         url = f"{self._firecrest_url}{endpoint}"
-        await self._stall_request(microservice)
-        self._next_request_ts[microservice] = (
-            time.time() + self.time_between_calls[microservice]
+        machine = (
+            additional_headers.get("X-Machine-Name")
+            if additional_headers else None
         )
-        headers = {
-            "Authorization": f"Bearer {self._authorization.get_access_token()}"
-        }
-        if additional_headers:
-            headers.update(additional_headers)
+        await self._acquire_machine(machine)
+        start = None
+        failed = True
+        try:
+            await self._stall_request(microservice)
+            headers = {
+                "Authorization": f"Bearer {self._authorization.get_access_token()}"
+            }
+            if additional_headers:
+                headers.update(additional_headers)
+
+            self.log(logging.INFO, f"Making {method} request to {endpoint}")
+            start = time.time()
+            with time_block(f"{method} request to {endpoint}", logger):
+                resp = await self._transport.request(
+                    method,
+                    url,
+                    headers=headers,
+                    params=params,
+                    data=data,
+                    files=files,
+                    timeout=self.timeout,
+                )
 
-        self.log(logging.INFO, f"Making GET request to {endpoint}")
-        with time_block(f"GET request to {endpoint}", logger):
-            resp = await self._session.get(
-                url=url, headers=headers, params=params, timeout=self.timeout
+            failed = resp.status_code >= 500
+        finally:
+            self._release_machine(
+                machine,
+                None if start is None else time.time() - start,
+                failed
             )
 
+        log_response_size(method, endpoint, resp, self.log)
         return resp
 
-    @_retry_requests  # type: ignore
     async def _get_request(
         self, endpoint, additional_headers=None, params=None
     ) -> httpx.Response:
-        microservice = endpoint.split("/")[1]
-        if (
-            self.merge_get_requests and
-            self.time_between_calls[microservice] > 0 and
-            endpoint in ("/compute/jobs", "/compute/acct", "/tasks")
-        ):
-            # We can only merge requests with the additional restrictions:
-            # - For `/compute/acct` we can merge only if the start_time,
-            #     end_time, and pagination parameters are not set.
-            #     Moreover we cannot merge if the `*` is used as a task id,
-            #     because the default `sacct` command will only return the
-            #     jobs of the last day.
-            # - For `/compute/jobs` we can merge only if the pagination
-            #     parameters are not set.
-            if (
-                endpoint == "/compute/acct"
-                and (
-                    "starttime" not in params
-                    or "endtime" not in params
-                    or "pageSize" not in params
-                    or "pageNumber" not in params
-                    or params.get("jobs")
-                )
-            ) or (
-                endpoint == "/compute/jobs"
-                and (
-                    "pageSize" not in params
-                    or "pageNumber" not in params
-                    or params.get("jobs")
-                )
-            ) or (
-                endpoint == "/tasks"
-            ):
-                return await self._get_merge_request(
+        if not self.deduplicate_get_requests:
+            return await self._request(
+                "GET",
+                endpoint=endpoint,
+                additional_headers=additional_headers,
+                params=params,
+            )
+
+        key = get_request_key(endpoint, additional_headers, params)
+        task = self._get_requests_in_flight.get(key)
+        if task is None:
+            task = asyncio.create_task(
+                self._request(
+                    "GET",
                     endpoint=endpoint,
                     additional_headers=additional_headers,
-                    params=params
+                    params=params,
                 )
+            )
+            self._get_requests_in_flight[key] = task
 
-        return await self._get_simple_request(
-            endpoint=endpoint,
-            additional_headers=additional_headers,
-            params=params
-        )
+            def done(task):
+                del self._get_requests_in_flight[key]
+                if not task.cancelled():
+                    # Mark the exception as retrieved, in case all the
+                    # callers have been cancelled
+                    task.exception()
+
+            task.add_done_callback(done)
+        else:
+            self.deduplicated_requests[endpoint] += 1
+            self.log(
+                logging.DEBUG,
+                f"GET request to {endpoint} is already in flight, waiting "
+                f"for its response"
+            )
+
+        # The request goes on for the rest of the callers when one of them
+        # is cancelled
+        return await asyncio.shield(task)
 
-    @_retry_requests  # type: ignore
     async def _post_request(
         self, endpoint, additional_headers=None, data=None, files=None
     ) -> httpx.Response:
-        microservice = endpoint.split("/")[1]
-        url = f"{self._firecrest_url}{endpoint}"
-        await self._stall_request(microservice)
-        self._next_request_ts[microservice] = (
-            time.time() + self.time_between_calls[microservice]
+        return await self._request(
+            "POST",
+            endpoint=endpoint,
+            additional_headers=additional_headers,
+            data=data,
+            files=files,
         )
-        headers = {
-            "Authorization": f"Bearer {self._authorization.get_access_token()}"
-        }
-        if additional_headers:
-            headers.update(additional_headers)
-
-        self.log(logging.INFO, f"Making POST request to {endpoint}")
-        with time_block(f"POST request to {endpoint}", logger):
-            resp = await self._session.post(
-                url=url, headers=headers, data=data, files=files, timeout=self.timeout
-            )
-
-        return resp
 
-    @_retry_requests  # type: ignore
     async def _put_request(
         self, endpoint, additional_headers=None, data=None
     ) -> httpx.Response:
-        microservice = endpoint.split("/")[1]
-        url = f"{self._firecrest_url}{endpoint}"
-        self._next_request_ts[microservice] = (
-            time.time() + self.time_between_calls[microservice]
+        return await self._request(
+            "PUT",
+            endpoint=endpoint,
+            additional_headers=additional_headers,
+            data=data,
         )
-        await self._stall_request(microservice)
-        headers = {
-            "Authorization": f"Bearer {self._authorization.get_access_token()}"
-        }
-        if additional_headers:
-            headers.update(additional_headers)
-
-        self.log(logging.INFO, f"Making PUT request to {endpoint}")
-        with time_block(f"PUT request to {endpoint}", logger):
-            resp = await self._session.put(
-                url=url, headers=headers, data=data, timeout=self.timeout
-            )
-
-        return resp
 
-    @_retry_requests  # type: ignore
     async def _delete_request(
         self, endpoint, additional_headers=None, data=None
     ) -> httpx.Response:
-        microservice = endpoint.split("/")[1]
-        url = f"{self._firecrest_url}{endpoint}"
-        await self._stall_request(microservice)
-        self._next_request_ts[microservice] = (
-            time.time() + self.time_between_calls[microservice]
+        return await self._request(
+            "DELETE",
+            endpoint=endpoint,
+            additional_headers=additional_headers,
+            data=data,
         )
-        headers = {
-            "Authorization": f"Bearer {self._authorization.get_access_token()}"
-        }
-        if additional_headers:
-            headers.update(additional_headers)
-
-        self.log(logging.INFO, f"Making DELETE request to {endpoint}")
-        with time_block(f"DELETE request to {endpoint}", logger):
-            # httpx doesn't support data in the `delete` method so we will
-            # have to use the generic `request` method
-            # https://www.python-httpx.org/compatibility/#request-body-on-http-methods
-            resp = await self._session.request(
-                method="DELETE",
-                url=url,
-                headers=headers,
-                data=data,
-                timeout=self.timeout,
+
+    async def _stall_request(self, microservice: str) -> None:
+        time_between_calls = self.time_between_calls[microservice]
+        rate = 1 / time_between_calls if time_between_calls > 0 else math.inf
+        if self.adaptive_throttle is not None:
+            rate = min(rate, self.adaptive_throttle.rate(microservice))
+
+        waited = await self._rate_limiter.acquire(
+            microservice, rate, self.burst_size.get(microservice, 1)
+        )
+        if waited > 0:
+            self.log(
+                logging.DEBUG,
+                f"Request to `{microservice}` microservice waited "
+                f"{waited:.3f} sec for the rate limit"
             )
 
-        return resp
+    async def _acquire_machine(self, machine: Optional[str]) -> None:
+        if machine is None:
+            return
 
-    async def _stall_request(self, microservice: str) -> None:
-        if self._next_request_ts[microservice] is not None:
-            while time.time() <= self._next_request_ts[microservice]:
+        time_between_calls = self.machine_time_between_calls.get(machine, 0)
+        if time_between_calls > 0:
+            waited = await self._rate_limiter.acquire(
+                f"machine-{machine}", 1 / time_between_calls
+            )
+            if waited > 0:
                 self.log(
                     logging.DEBUG,
-                    f"`{microservice}` microservice has received too many "
-                    f"requests. Going to sleep for "
-                    f"~{self._next_request_ts[microservice] - time.time()} sec"
+                    f"Request to `{machine}` waited {waited:.3f} sec for "
+                    f"the rate limit of the machine"
                 )
-                await asyncio.sleep(
-                    self._next_request_ts[microservice] - time.time()
+
+        if self.machine_concurrency is not None:
+            waited = await self.machine_concurrency.acquire(machine)
+            if waited > 0:
+                self.log(
+                    logging.DEBUG,
+                    f"Request to `{machine}` waited {waited:.3f} sec for "
+                    f"one of the "
+                    f"{self.machine_concurrency.limit(machine)} concurrent "
+                    f"requests of the machine"
                 )
 
+    def _release_machine(
+        self, machine: Optional[str], latency: Optional[float], failed: bool
+    ) -> None:
+        if machine is not None and self.machine_concurrency is not None:
+            self.machine_concurrency.release(machine, latency, failed)
+
+    def rate_limit_queue_depth(
+        self, microservice: str, priority: Optional[Priority] = None
+    ) -> int:
+        """Number of requests to a microservice that are waiting for the
+        rate limit.
+
+        :param microservice: the name of the microservice
+        :param priority: count only the requests with this priority
+        """
+        return self._rate_limiter.queue_depth(microservice, priority)
+
+    def rate_limit_queues(self) -> dict[str, dict[str, int]]:
+        """Number of requests waiting for the rate limit, for each
+        microservice and priority (e.g.
+        `{"utilities": {"HIGH": 0, "NORMAL": 3, "LOW": 12}}`).
+        """
+        return self._rate_limiter.queue_depths()
+
     @overload
     def _json_response(
         self,
-        responses: List[requests.Response],
+        responses: List[Response],
         expected_status_code: int,
         allow_none_result: Literal[False] = ...,
     ) -> dict:
@@ -531,7 +826,7 @@ class AsyncFirecrest:
     @overload
     def _json_response(
         self,
-        responses: List[requests.Response],
+        responses: List[Response],
         expected_status_code: int,
         allow_none_result: Literal[True],
     ) -> Optional[dict]:
@@ -539,75 +834,22 @@ class AsyncFirecrest:
 
     def _json_response(
         self,
-        responses: List[requests.Response],
+        responses: List[Response],
         expected_status_code: int,
         allow_none_result: bool = False,
     ):
-        # Will examine only the last response
-        response = responses[-1]
-        status_code = response.status_code
-        # handle_response(response)
-        exc: fe.FirecrestException
-        for h in fe.ERROR_HEADERS:
-            if h in response.headers:
-                self.log(
-                    logging.CRITICAL,
-                    f"Header '{h}' is included in the response"
-                )
-                exc = fe.HeaderException(responses)
-                self.log(logging.CRITICAL, exc)
-                raise exc
-
-        if status_code == 401:
-            self.log(
-                logging.CRITICAL,
-                "Status of the response is 401"
-            )
-            exc = fe.UnauthorizedException(responses)
-            self.log(logging.CRITICAL, exc)
-            raise exc
-        elif status_code == 404:
-            self.log(
-                logging.CRITICAL,
-                "Status of the response is 404"
-            )
-            exc = fe.NotFound(responses)
-            self.log(logging.CRITICAL, exc)
-            raise exc
-        elif status_code >= 400:
-            self.log(
-                logging.CRITICAL,
-                f"Status of the response is {status_code}"
-            )
-            exc = fe.FirecrestException(responses)
-            self.log(logging.CRITICAL, exc)
-            raise exc
-        elif status_code != expected_status_code:
-            self.log(
-                logging.CRITICAL,
-                f"Unexpected status of last request {status_code}, it "
-                f"should have been {expected_status_code}"
-            )
-            exc = fe.UnexpectedStatusException(responses, expected_status_code)
-            self.log(logging.CRITICAL, exc)
-            raise exc
-
-        try:
-            ret = response.json()
-        except json.decoder.JSONDecodeError:
-            if allow_none_result:
-                ret = None
-            else:
-                exc = fe.NoJSONException(responses)
-                self.log(logging.CRITICAL, exc)
-                raise exc
-
-        return ret
+        return json_response(
+            responses,
+            expected_status_code,
+            allow_none_result,
+            self.log,
+            self.json_decoder,
+        )
 
     async def _tasks(
         self,
         task_ids: Optional[List[str]] = None,
-        responses: Optional[List[requests.Response]] = None,
+        responses: Optional[List[Response]] = None,
     ) -> dict[str, t.Task]:
         """Return a dictionary of FirecREST tasks and their last update.
         When `task_ids` is an empty list or contains more than one element the
@@ -635,12 +877,14 @@ class AsyncFirecrest:
             return {k: v for k, v in taskinfo["tasks"].items() if k in task_ids}
 
     async def _task_safe(
-        self, task_id: str, responses: Optional[List[requests.Response]] = None
+        self, task_id: str, responses: Optional[List[Response]] = None
     ) -> t.Task:
-        if responses is None:
-            responses = self._current_method_requests
-
+        responses = [] if responses is None else responses
         task = (await self._tasks([task_id], responses))[task_id]
+        self._check_task(task, responses)
+        return task
+
+    def _check_task(self, task: t.Task, responses: List[Response]) -> None:
         status = int(task["status"])
         exc: fe.FirecrestException
         if status == 115:
@@ -661,10 +905,8 @@ class AsyncFirecrest:
             self.log(logging.CRITICAL, exc)
             raise exc
 
-        return task
-
     async def _invalidate(
-        self, task_id: str, responses: Optional[List[requests.Response]] = None
+        self, task_id: str, responses: Optional[List[Response]] = None
     ):
         responses = [] if responses is None else responses
         resp = await self._post_request(
@@ -1375,31 +1617,18 @@ class AsyncFirecrest:
         return self._json_response([resp], 200)["output"]
 
     # Compute
-    async def submit(
+    async def _submit_job(
         self,
         machine: str,
-        job_script: Optional[str] = None,
-        local_file: Optional[bool] = True,
-        script_str: Optional[str] = None,
-        script_local_path: Optional[str] = None,
-        script_remote_path: Optional[str] = None,
-        account: Optional[str] = None,
-        env_vars: Optional[dict[str, Any]] = None,
-    ) -> t.JobSubmit:
-        """Submits a batch script to SLURM on the target system. One of `script_str`, `script_local` and `script_remote` needs to be set.
-
-        :param machine: the machine name where the scheduler belongs to
-        :param job_script: [deprecated] use `script_str`, `script_local_path` or `script_remote_path`
-        :param local_file: [deprecated]
-        :param script_str: the content of the script to be submitted
-        :param script_local_path: the path of the script on the local file system
-        :param script_remote_path: the full path of the script on the remote file system
-        :param account: submit the job with this project account
-        :param env_vars: dictionary (varName, value) defining environment variables to be exported for the job
-        :calls: POST `/compute/jobs/upload` or POST `/compute/jobs/path`
-
-                GET `/tasks`
-        """
+        job_script: Optional[str],
+        local_file: Optional[bool],
+        script_str: Optional[str],
+        script_local_path: Optional[str],
+        script_remote_path: Optional[str],
+        account: Optional[str],
+        env_vars: Optional[dict[str, Any]],
+        responses: List[Response],
+    ) -> str:
         if [
             script_str is None,
             script_local_path is None,
@@ -1484,18 +1713,146 @@ class AsyncFirecrest:
                     data=data,
                 )
 
-        json_response = self._json_response([resp], 201)
+        responses.append(resp)
+        json_response = self._json_response(responses, 201)
         self.log(
             logging.INFO,
             f"Job submission task: {json_response['task_id']}"
         )
-        t = ComputeTask(self, json_response["task_id"], [resp])
+        return json_response["task_id"]
+
+    async def submit(
+        self,
+        machine: str,
+        job_script: Optional[str] = None,
+        local_file: Optional[bool] = True,
+        script_str: Optional[str] = None,
+        script_local_path: Optional[str] = None,
+        script_remote_path: Optional[str] = None,
+        account: Optional[str] = None,
+        env_vars: Optional[dict[str, Any]] = None,
+    ) -> t.JobSubmit:
+        """Submits a batch script to SLURM on the target system. One of `script_str`, `script_local` and `script_remote` needs to be set.
 
+        :param machine: the machine name where the scheduler belongs to
+        :param job_script: [deprecated] use `script_str`, `script_local_path` or `script_remote_path`
+        :param local_file: [deprecated]
+        :param script_str: the content of the script to be submitted
+        :param script_local_path: the path of the script on the local file system
+        :param script_remote_path: the full path of the script on the remote file system
+        :param account: submit the job with this project account
+        :param env_vars: dictionary (varName, value) defining environment variables to be exported for the job
+        :calls: POST `/compute/jobs/upload` or POST `/compute/jobs/path`
+
+                GET `/tasks`
+        """
+        responses: List[Response] = []
+        task_id = await self._submit_job(
+            machine,
+            job_script,
+            local_file,
+            script_str,
+            script_local_path,
+            script_remote_path,
+            account,
+            env_vars,
+            responses,
+        )
+        t = ComputeTask(self, task_id, responses)
         result = (await t.poll_task("200", iter(self.polling_sleep_times)))[0]
         # Inject taskid in the result
-        result["firecrest_taskid"] = json_response["task_id"]
+        result["firecrest_taskid"] = task_id
         return result
 
+    async def submit_nowait(
+        self,
+        machine: str,
+        job_script: Optional[str] = None,
+        local_file: Optional[bool] = True,
+        script_str: Optional[str] = None,
+        script_local_path: Optional[str] = None,
+        script_remote_path: Optional[str] = None,
+        account: Optional[str] = None,
+        env_vars: Optional[dict[str, Any]] = None,
+    ) -> AsyncJobHandle:
+        """Submits a batch script to SLURM on the target system like `submit`, but returns an `AsyncJobHandle` as soon as the submission task has been created, without waiting for the job ID.
+        The handles that are still pending are resolved together, with one `/tasks` request for many of them, when the result of one of them is needed.
+
+        :param machine: the machine name where the scheduler belongs to
+        :param job_script: [deprecated] use `script_str`, `script_local_path` or `script_remote_path`
+        :param local_file: [deprecated]
+        :param script_str: the content of the script to be submitted
+        :param script_local_path: the path of the script on the local file system
+        :param script_remote_path: the full path of the script on the remote file system
+        :param account: submit the job with this project account
+        :param env_vars: dictionary (varName, value) defining environment variables to be exported for the job
+        :calls: POST `/compute/jobs/upload` or POST `/compute/jobs/path`
+        """
+        responses: List[Response] = []
+        task_id = await self._submit_job(
+            machine,
+            job_script,
+            local_file,
+            script_str,
+            script_local_path,
+            script_remote_path,
+            account,
+            env_vars,
+            responses,
+        )
+        handle = AsyncJobHandle(self, machine, task_id, responses)
+        self._job_handles.add(handle)
+        return handle
+
+    async def submit_many(
+        self,
+        machine: str,
+        jobs: Sequence[dict[str, Any]],
+        max_workers: int = 8,
+        return_exceptions: bool = True,
+    ) -> List[t.JobSubmit | Exception]:
+        """Submits many batch scripts to SLURM on the target system.
+        Up to `max_workers` scripts are uploaded at the same time, with `submit_nowait`, and the submission tasks are resolved together, with one `/tasks` request for up to 100 of them.
+        The results are returned in the same order as the jobs.
+
+        :param machine: the machine name where the scheduler belongs to
+        :param jobs: the keyword arguments of `submit` for each job, for example `script_str` or `script_local_path`, `account` and `env_vars`
+        :param max_workers: the maximum number of scripts that are uploaded at the same time
+        :param return_exceptions: when `True`, the exception of a failed submission is returned in the place of its result, otherwise the first exception (in the order of the jobs) is raised, after all the submissions have been checked
+        :calls: POST `/compute/jobs/upload` or POST `/compute/jobs/path`
+
+                GET `/tasks`
+        """
+        semaphore = asyncio.Semaphore(max_workers)
+        handles: List[AsyncJobHandle] = []
+
+        async def submit(job):
+            async with semaphore:
+                handle = await self.submit_nowait(machine, **job)
+
+            handles.append(handle)
+            return await handle.result()
+
+        try:
+            results = await asyncio.gather(
+                *(submit(job) for job in jobs), return_exceptions=True
+            )
+        finally:
+            # The handles are never returned, so don't keep polling the
+            # submissions that failed to be checked
+            for handle in handles:
+                if not handle.done():
+                    self._job_handles.discard(handle)
+
+        for res in results:
+            # Cancellations and other `BaseException`s are never returned
+            if isinstance(res, BaseException) and (
+                not return_exceptions or not isinstance(res, Exception)
+            ):
+                raise res
+
+        return results
+
     async def poll(
         self,
         machine: str,
@@ -1608,6 +1965,105 @@ class AsyncFirecrest:
 
         return ret
 
+    def iter_poll(
+        self,
+        machine: str,
+        jobs: Optional[Sequence[str | int]] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        page_size: int = 100,
+        prefetch: bool = True,
+    ) -> AsyncIterator[t.JobAcct]:
+        """Iterates over the jobs of `poll`, one page at a time. The next
+        page is requested while the jobs of the current one are consumed,
+        and the iteration stops after the first page that is not full, so
+        at most two pages are kept in memory.
+
+        .. code-block:: Python
+
+            async for job in client.iter_poll("cluster", start_time="2023-01-01"):
+                print(job["jobid"], job["state"])
+
+        :param machine: the machine name where the scheduler belongs to
+        :param jobs: list of the IDs of the jobs
+        :param start_time: Start time (and/or date) of job's query. Allowed formats are HH:MM[:SS] [AM|PM] MMDD[YY] or MM/DD[/YY] or MM.DD[.YY] MM/DD[/YY]-HH:MM[:SS] YYYY-MM-DD[THH:MM[:SS]]
+        :param end_time: End time (and/or date) of job's query. Allowed formats are HH:MM[:SS] [AM|PM] MMDD[YY] or MM/DD[/YY] or MM.DD[.YY] MM/DD[/YY]-HH:MM[:SS] YYYY-MM-DD[THH:MM[:SS]]
+        :param page_size: number of entries in each page
+        :param prefetch: request the next page from another task while the current one is consumed, after its first item
+        :calls: GET `/compute/acct`
+
+                GET `/tasks`
+        """
+        return self._iter_pages(
+            lambda page_number: self.poll(
+                machine, jobs, start_time, end_time, page_size, page_number
+            ),
+            page_size,
+            prefetch,
+        )
+
+    def iter_poll_active(
+        self,
+        machine: str,
+        jobs: Optional[Sequence[str | int]] = None,
+        page_size: int = 100,
+        prefetch: bool = True,
+    ) -> AsyncIterator[t.JobQueue]:
+        """Iterates over the jobs of `poll_active`, one page at a time,
+        like `iter_poll`.
+
+        :param machine: the machine name where the scheduler belongs to
+        :param jobs: list of the IDs of the jobs
+        :param page_size: number of entries in each page
+        :param prefetch: request the next page from another task while the current one is consumed, after its first item
+        :calls: GET `/compute/jobs`
+
+                GET `/tasks`
+        """
+        return self._iter_pages(
+            lambda page_number: self.poll_active(
+                machine, jobs, page_size, page_number
+            ),
+            page_size,
+            prefetch,
+        )
+
+    async def _iter_pages(
+        self,
+        fetch_page: Callable[[int], Any],
+        page_size: int,
+        prefetch: bool,
+    ) -> AsyncIterator[Any]:
+        next_page: Optional[asyncio.Task] = None
+        try:
+            page_number = 0
+            page = await fetch_page(page_number)
+            while True:
+                last_page = len(page) < page_size
+                for i, item in enumerate(page):
+                    # Like in `Firecrest`, a consumer that takes a single
+                    # item doesn't cost a request for the next page
+                    if i == 1 and prefetch and not last_page:
+                        next_page = asyncio.create_task(
+                            fetch_page(page_number + 1)
+                        )
+
+                    yield item
+
+                if last_page:
+                    return
+
+                page_number += 1
+                if next_page is not None:
+                    page = await next_page
+                    next_page = None
+                else:
+                    page = await fetch_page(page_number)
+        finally:
+            if next_page is not None:
+                # Don't wait for a page that won't be consumed
+                next_page.cancel()
+
     @async_validate_api_version_compatibility()
     async def nodes(
         self,
@@ -1698,6 +2154,98 @@ class AsyncFirecrest:
         result = await t.poll_task("200", iter(self.polling_sleep_times))
         return result[0]
 
+    async def watch_tasks(
+        self,
+        task_ids: Sequence[str],
+        final_status: str = "200",
+        interval: float = 1,
+    ) -> AsyncIterator[t.Task]:
+        """Yields the record of a task every time that its status changes,
+        until all the tasks have reached `final_status`. The tasks are
+        checked together with one `/tasks` request every `interval`
+        seconds, which is merged with the other polls of the client when
+        `merge_get_requests` is set. The tasks of external transfers can be
+        followed with their `task_id`, and `final_status` `"114"` for
+        uploads or `"117"` for downloads.
+
+        .. code-block:: Python
+
+            async for task in client.watch_tasks(task_ids):
+                print(task["hash_id"], task["status"])
+
+        Error statuses are yielded like the others. Task IDs that are not
+        found are no longer followed.
+
+        :param task_ids: the IDs of the tasks
+        :param final_status: the status at which a task is no longer followed
+        :param interval: seconds between two checks of the tasks
+        :calls: GET `/tasks`
+        """
+        statuses: dict[str, Optional[str]] = {
+            str(task_id): None for task_id in task_ids
+        }
+        while statuses:
+            # Like the polling of the blocking calls, it shouldn't delay
+            # the interactive requests that share the rate limit
+            with request_priority(Priority.LOW):
+                tasks = await self._tasks(list(statuses))
+
+            for task_id in list(statuses):
+                task = tasks.get(task_id)
+                if task is None:
+                    self.log(
+                        logging.WARNING,
+                        f"Task {task_id} was not found, it is no longer "
+                        f"followed"
+                    )
+                    del statuses[task_id]
+                    continue
+
+                if task["status"] != statuses[task_id]:
+                    statuses[task_id] = task["status"]
+                    yield task
+
+                if task["status"] >= final_status:
+                    del statuses[task_id]
+
+            if statuses:
+                await asyncio.sleep(interval)
+
+    async def watch_jobs(
+        self,
+        machine: str,
+        jobs: Sequence[str | int],
+        interval: float = 10,
+    ) -> AsyncIterator[JobStateChange]:
+        """Yields a `JobStateChange` every time that the state of a job
+        changes, until all the jobs have finished. Like `AsyncJobMonitor`,
+        the jobs are checked with one `squeue` request for all of them every
+        `interval` seconds, and one `sacct` request for the jobs that have
+        left the queue.
+
+        .. code-block:: Python
+
+            async for change in client.watch_jobs("cluster", jobids):
+                print(change.jobid, change.new_state)
+
+        :param machine: the machine name where the scheduler belongs to
+        :param jobs: the IDs of the jobs
+        :param interval: seconds between two checks of the jobs
+        :calls: GET `/compute/jobs`
+
+                GET `/compute/acct`
+
+                GET `/tasks`
+        """
+        monitor = AsyncJobMonitor(self, interval=interval)
+        monitor.add(machine, jobs)
+        while len(monitor):
+            for change in await monitor.check():
+                yield change
+
+            if len(monitor):
+                await asyncio.sleep(interval)
+
     async def cancel(self, machine: str, job_id: str | int) -> str:
         """Cancels running job.
         This call uses the `scancel` command.
@@ -1789,7 +2337,7 @@ class AsyncFirecrest:
 
                 GET `/tasks`
         """
-        resp: List[requests.Response] = []
+        resp: List[Response] = []
         endpoint = "/storage/xfer-internal/mv"
         json_response = await self._internal_transfer(
             endpoint,
@@ -1838,7 +2386,7 @@ class AsyncFirecrest:
 
                 GET `/tasks`
         """
-        resp: List[requests.Response] = []
+        resp: List[Response] = []
         endpoint = "/storage/xfer-internal/cp"
         json_response = await self._internal_transfer(
             endpoint,
@@ -1891,7 +2439,7 @@ class AsyncFirecrest:
 
         .. warning:: This is available only for FirecREST>=1.16.0
         """
-        resp: List[requests.Response] = []
+        resp: List[Response] = []
         endpoint = "/storage/xfer-internal/compress"
         json_response = await self._internal_transfer(
             endpoint,
@@ -1946,7 +2494,7 @@ class AsyncFirecrest:
 
         .. warning:: This is available only for FirecREST>=1.16.0
         """
-        resp: List[requests.Response] = []
+        resp: List[Response] = []
         endpoint = "/storage/xfer-internal/extract"
         json_response = await self._internal_transfer(
             endpoint,
@@ -1996,7 +2544,7 @@ class AsyncFirecrest:
 
                 GET `/tasks`
         """
-        resp: List[requests.Response] = []
+        resp: List[Response] = []
         endpoint = "/storage/xfer-internal/rsync"
         json_response = await self._internal_transfer(
             endpoint,
@@ -2043,7 +2591,7 @@ class AsyncFirecrest:
 
                 GET `/tasks`
         """
-        resp: List[requests.Response] = []
+        resp: List[Response] = []
         endpoint = "/storage/xfer-internal/rm"
         json_response = await self._internal_transfer(
             endpoint,
@@ -11,13 +11,15 @@ from io import BufferedWriter
 import itertools
 import logging
 import pathlib
-import requests
 import shutil
 import sys
 from typing import ContextManager, Optional, List, TYPE_CHECKING
 import urllib.request
 from packaging.version import Version
 
+from firecrest.RateLimiter import Priority, request_priority
+from firecrest.Transport import Response
+
 if TYPE_CHECKING:
     from firecrest.AsyncClient import AsyncFirecrest
 
@@ -41,7 +43,7 @@ class AsyncExternalStorage:
         self,
         client: AsyncFirecrest,
         task_id: str,
-        previous_responses: Optional[List[requests.Response]] = None,
+        previous_responses: Optional[List[Response]] = None,
     ) -> None:
         previous_responses = [] if previous_responses is None else previous_responses
         self._client = client
@@ -64,7 +66,11 @@ class AsyncExternalStorage:
 
     async def _update(self) -> None:
         if self._status not in self._final_states:
-            task = await self._client._task_safe(self._task_id, self._responses)
+            with request_priority(Priority.LOW):
+                task = await self._client._task_safe(
+                    self._task_id, self._responses
+                )
+
             self._status = task["status"]
             self._data = task["data"]
             self._client.log(
@@ -154,7 +160,7 @@ class AsyncExternalUpload(AsyncExternalStorage):
         self,
         client: AsyncFirecrest,
         task_id: str,
-        previous_responses: Optional[List[requests.Response]] = None,
+        previous_responses: Optional[List[Response]] = None,
     ) -> None:
         previous_responses = [] if previous_responses is None else previous_responses
         super().__init__(client, task_id, previous_responses)
@@ -215,7 +221,7 @@ class AsyncExternalDownload(AsyncExternalStorage):
         self,
         client: AsyncFirecrest,
         task_id: str,
-        previous_responses: Optional[List[requests.Response]] = None,
+        previous_responses: Optional[List[Response]] = None,
     ) -> None:
         previous_responses = [] if previous_responses is None else previous_responses
         super().__init__(client, task_id, previous_responses)
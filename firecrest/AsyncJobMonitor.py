@@ -0,0 +1,165 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+from __future__ import annotations
+
+import asyncio
+import inspect
+import logging
+
+from typing import Any, Callable, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from firecrest.JobMonitor import JobStateChange, _JobRegistry
+
+if TYPE_CHECKING:
+    from firecrest.AsyncClient import AsyncFirecrest
+
+
+class AsyncJobMonitor(_JobRegistry):
+    """
+    Follows the state of many SLURM jobs with few requests, like
+    `JobMonitor`, from an asyncio task. The machines are checked
+    concurrently and the callbacks can be coroutine functions.
+
+    .. code-block:: Python
+
+        async with AsyncJobMonitor(client, interval=30) as monitor:
+            job = await client.submit("cluster", script)
+            monitor.add("cluster", job["jobid"])
+            record = await monitor.wait("cluster", job["jobid"])
+
+    :param client: the client that makes the requests
+    :param interval: seconds between two checks of the jobs
+    :param callback: function or coroutine function that is called with a `JobStateChange` for every change of state
+    :param max_jobs_per_request: the maximum number of job IDs in one request. When more jobs of a machine are followed, `squeue` is called for all the jobs of the user and `sacct` in chunks.
+    :param max_misses: the number of consecutive checks that don't find a job before it is no longer followed
+    """
+
+    def __init__(
+        self,
+        client: AsyncFirecrest,
+        interval: float = 10,
+        callback: Optional[Callable[[JobStateChange], Any]] = None,
+        max_jobs_per_request: int = 500,
+        max_misses: int = 3,
+    ) -> None:
+        super().__init__(max_jobs_per_request, max_misses)
+        self._client = client
+        self.interval = interval
+        if callback is not None:
+            self.add_callback(callback)
+
+        self._events: Dict[Tuple[str, str], asyncio.Event] = {}
+        self._all_done: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _job_added(self, machine: str, jobid: str) -> None:
+        self._events.setdefault((machine, jobid), asyncio.Event()).clear()
+        if self._all_done is not None:
+            self._all_done.clear()
+
+    def _job_finished(self, machine: str, jobid: str) -> None:
+        event = self._events.pop((machine, jobid), None)
+        if event is not None:
+            event.set()
+
+        if self._all_done is not None and len(self) == 0:
+            self._all_done.set()
+
+    async def _check_machine(
+        self, machine: str, jobids: List[str]
+    ) -> List[JobStateChange]:
+        records: Dict[str, Any] = {}
+        active = await self._client.poll_active(
+            machine, self._squeue_jobs(jobids)
+        )
+        for job in active:
+            records[str(job["jobid"])] = job
+
+        gone = [j for j in jobids if j not in records]
+        # Membership is checked for every job of `sacct`
+        gone_ids = set(gone)
+        for chunk in self._chunks(gone):
+            for record in await self._client.poll(machine, chunk):
+                if str(record["jobid"]) in gone_ids:
+                    records[str(record["jobid"])] = record
+
+        return self._apply(machine, jobids, records)
+
+    async def check(self) -> List[JobStateChange]:
+        """Check all the jobs once, call the callbacks and return the
+        changes."""
+        results = await asyncio.gather(*(
+            self._check_machine(machine, jobids)
+            for machine, jobids in self._snapshot().items()
+        ))
+        changes = [change for result in results for change in result]
+        for change in changes:
+            for callback in self._callbacks:
+                res = callback(change)
+                if inspect.isawaitable(res):
+                    await res
+
+        self._finish_jobs(changes)
+        return changes
+
+    async def wait(self, machine: str, jobid: str | int) -> Optional[dict]:
+        """Wait until a job has finished and return its last record. It
+        returns `None` if the job is not followed or when it is removed."""
+        jobid = str(jobid)
+        if (machine, jobid) not in self._finished:
+            event = self._events.get((machine, jobid))
+            if event is None:
+                return None
+
+            await event.wait()
+
+        return self.finished(machine, jobid)
+
+    async def wait_all(self) -> None:
+        """Wait until all the jobs have finished"""
+        if self._all_done is None:
+            self._all_done = asyncio.Event()
+
+        if len(self) == 0:
+            return
+
+        self._all_done.clear()
+        await self._all_done.wait()
+
+    def start(self) -> None:
+        """Start checking the jobs from an asyncio task"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the task that checks the jobs"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.check()
+            except Exception as e:
+                self._client.log(
+                    logging.WARNING, f"Could not check the jobs: {e}"
+                )
+
+            await asyncio.sleep(self.interval)
+
+    async def __aenter__(self) -> AsyncJobMonitor:
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.stop()
@@ -6,6 +6,7 @@
 #
 import logging
 import requests
+import threading
 import time
 
 import firecrest.FirecrestException as fe
@@ -54,6 +55,7 @@ class ClientCredentialsAuth:
         ] = None
         #: Disable all logging from this authorization object.
         self.disable_client_logging: bool = False
+        self._lock = threading.Lock()
 
     def _log(self, level: int, msg: str) -> None:
         """Log a message with the given level on the client logger.
@@ -65,7 +67,12 @@ class ClientCredentialsAuth:
         """Returns an access token to be used for accessing resources.
         If the request fails the token will be None
         """
+        # Only one thread at a time will request a new token, the rest
+        # will reuse it
+        with self._lock:
+            return self._get_access_token()
 
+    def _get_access_token(self) -> str:
         # Make sure that the access token has at least {min_token_validity} sec left before
         # it expires, otherwise make a new request
         if (
@@ -6,29 +6,47 @@
 #
 from __future__ import annotations
 
+import collections
+import concurrent.futures
 import itertools
 import jwt
 import logging
+import math
 import os
 import pathlib
 import requests
 import sys
 import tempfile
+import threading
 import time
 
 from contextlib import nullcontext
 from io import BytesIO
 from requests.compat import json  # type: ignore
-from typing import Any, ContextManager, Optional, overload, Sequence, Tuple, List
+from typing import Any, Callable, ContextManager, Iterable, Iterator, Optional, overload, Sequence, Tuple, List
 from packaging.version import parse
 
 import firecrest.FirecrestException as fe
 import firecrest.types as t
 from firecrest.ExternalStorage import ExternalUpload, ExternalDownload
+from firecrest.CircuitBreaker import CircuitBreaker
+from firecrest.JobHandle import JobHandle, _JobHandles
+from firecrest.PollingSchedule import AdaptivePollingSchedule
+from firecrest.RateLimiter import AdaptiveThrottle, Buckets, RateLimiter
+from firecrest.RetryPolicy import RetryPolicy, _NO_RETRIES
+from firecrest.TaskWatcher import TaskWatcher
+from firecrest.Transport import RequestsTransport, Transport
 from firecrest.utilities import (
-    parse_retry_after,
+    default_json_decoder,
+    get_request_key,
+    json_response,
+    log_response_size,
+    retry_after,
+    rewind_uploaded_file,
     slurm_state_completed,
+    task_kind,
     time_block,
+    uploaded_file_position,
     validate_api_version_compatibility
 )
 
@@ -57,11 +75,17 @@ class Firecrest:
     """
     This is the basic class you instantiate to access the FirecREST API v1.
     Necessary parameters are the firecrest URL and an authorization object.
+    The same client can be shared by many threads.
 
     :param firecrest_url: FirecREST's URL
     :param authorization: the authorization object. This object is responsible of handling the credentials and the only requirement for it is that it has a method get_access_token() that returns a valid access token.
     :param verify: either a boolean, in which case it controls whether requests will verify the server’s TLS certificate, or a string, in which case it must be a path to a CA bundle to use
     :param sa_role: this corresponds to the `F7T_AUTH_ROLE` configuration parameter of the site. If you don't know how FirecREST is setup it's better to leave the default.
+    :param pool_connections: number of host connection pools that are cached by the session
+    :param pool_maxsize: maximum number of connections that are kept alive per host. When the client is shared by many threads, set it to at least the number of threads, otherwise the extra connections are closed after each request and the next ones go through a new TLS handshake.
+    :param pool_block: when `True`, a request will wait for a free connection once `pool_maxsize` connections to the host are in use, instead of opening a connection that will not be reused
+    :param transport: the object that sends the HTTP requests. By default a `RequestsTransport` is created from `verify` and the pool parameters, which are ignored when a transport is given.
+    :param rate_limit_backend: where the token buckets of the rate limits are kept. By default they are local to the client; with a `FileBuckets` object the rate limits are shared by all the clients in the processes of the host that use the same directory.
     """
 
     TOO_MANY_REQUESTS_CODE = 429
@@ -70,58 +94,112 @@ class Firecrest:
     def _retry_requests(func):
         def wrapper(*args, **kwargs):
             client = args[0]
+            method = args[1]
+            endpoint = kwargs["endpoint"]
+            microservice = endpoint.split("/")[1]
+            policy = client.retry_policy or _NO_RETRIES
+            start_time = time.time()
             num_retries = 0
-            try:
-                f = kwargs["files"]["file"]
-                file_original_position = f[1].tell() if isinstance(f, tuple) else f.tell()
-            except KeyError:
-                file_original_position = None
-
-            resp = func(*args, **kwargs)
+            num_transient_retries = 0
+            file_original_position = uploaded_file_position(
+                kwargs.get("files")
+            )
             while True:
-                if resp.status_code != client.TOO_MANY_REQUESTS_CODE:
-                    break
-                elif (
-                    client.num_retries_rate_limit is not None
-                    and num_retries >= client.num_retries_rate_limit
-                ):
+                try:
+                    resp = func(*args, **kwargs)
+                except Exception as e:
+                    if not policy.is_retryable_exception(method, e):
+                        raise
+
+                    delay = policy.backoff(num_transient_retries)
+                    if not policy.allows(
+                        num_transient_retries, time.time() - start_time, delay
+                    ):
+                        raise
+
                     client.log(
-                        logging.DEBUG,
-                        f"Rate limit is reached and the request has "
-                        f"been retried already {num_retries} times"
+                        logging.WARNING,
+                        f"{method} request to {endpoint} failed with "
+                        f"{e!r}, will retry in {delay:.2f} seconds"
                     )
-                    break
+                    num_transient_retries += 1
                 else:
-                    reset = resp.headers.get(
-                        "Retry-After",
-                        default=resp.headers.get(
-                            "RateLimit-Reset", default=10
-                        ),
-                    )
-                    reset = parse_retry_after(reset, client.log)
-                    client.log(
-                        logging.INFO,
-                        f"Rate limit is reached, will sleep for "
-                        f"{reset} seconds and try again"
-                    )
-                    try:
-                        f = kwargs["files"]["file"]
+                    if client.adaptive_throttle is not None:
+                        client.adaptive_throttle.observe(microservice, resp)
+
+                    if resp.status_code == client.TOO_MANY_REQUESTS_CODE:
+                        if (
+                            client.num_retries_rate_limit is not None
+                            and num_retries >= client.num_retries_rate_limit
+                        ):
+                            client.log(
+                                logging.DEBUG,
+                                f"Rate limit is reached and the request has "
+                                f"been retried already {num_retries} times"
+                            )
+                            return resp
+
+                        delay = policy.rate_limit_delay(
+                            retry_after(resp, client.log)
+                        )
+                        if not policy.within_time(
+                            time.time() - start_time, delay
+                        ):
+                            return resp
+
                         client.log(
-                            logging.DEBUG,
-                            f"Resetting the file pointer of the uploaded file "
-                            f"to {file_original_position}"
+                            logging.INFO,
+                            f"Rate limit is reached, will sleep for "
+                            f"{delay:.2f} seconds and try again"
                         )
-                        if isinstance(f, tuple):
-                            f[1].seek(file_original_position)
-                        else:
-                            f.seek(file_original_position)
+                        num_retries += 1
+                    elif policy.is_retryable_response(method, resp):
+                        delay = policy.backoff(num_transient_retries)
+                        if not policy.allows(
+                            num_transient_retries,
+                            time.time() - start_time,
+                            delay
+                        ):
+                            return resp
 
-                    except KeyError:
-                        pass
+                        client.log(
+                            logging.WARNING,
+                            f"{method} request to {endpoint} got status "
+                            f"{resp.status_code}, will retry in {delay:.2f} "
+                            f"seconds"
+                        )
+                        num_transient_retries += 1
+                    else:
+                        return resp
 
-                    time.sleep(reset)
-                    resp = func(*args, **kwargs)
-                    num_retries += 1
+                rewind_uploaded_file(
+                    kwargs.get("files"), file_original_position, client.log
+                )
+                time.sleep(delay)
+
+        return wrapper
+
+    def _circuit_breaker(func):
+        def wrapper(*args, **kwargs):
+            client = args[0]
+            breaker = client.circuit_breaker
+            if breaker is None:
+                return func(*args, **kwargs)
+
+            microservice = kwargs["endpoint"].split("/")[1]
+            client._check_circuit(microservice)
+            try:
+                resp = func(*args, **kwargs)
+            except Exception as e:
+                if breaker.is_failure(exc=e):
+                    breaker.record_failure(microservice)
+
+                raise
+
+            if breaker.is_failure(response=resp):
+                breaker.record_failure(microservice)
+            else:
+                breaker.record_success(microservice)
 
             return resp
 
@@ -133,12 +211,14 @@ class Firecrest:
         authorization: Any,
         verify: Optional[str | bool] = None,
         sa_role: str = "firecrest-sa",
+        pool_connections: int = requests.adapters.DEFAULT_POOLSIZE,
+        pool_maxsize: int = requests.adapters.DEFAULT_POOLSIZE,
+        pool_block: bool = requests.adapters.DEFAULT_POOLBLOCK,
+        transport: Optional[Transport] = None,
+        rate_limit_backend: Optional[Buckets] = None,
     ) -> None:
         self._firecrest_url = firecrest_url
         self._authorization = authorization
-        # This should be used only for blocking operations that require
-        # multiple requests, not for external upload/download
-        self._current_method_requests: List[requests.Response] = []
         self._verify = verify
         self._sa_role = sa_role
         #: This attribute will be passed to all the requests that will be
@@ -155,17 +235,105 @@ class Firecrest:
         #: set to `None`, the client will keep trying until it gets a
         #: different status code than 429.
         self.num_retries_rate_limit: Optional[int] = None
+        #: Policy for retrying the requests that fail with a transient
+        #: error, like a connection error, a timeout or a 502/503/504 status.
+        #: It is `None` (no retries) by default.
+        self.retry_policy: Optional[RetryPolicy] = None
+        #: Circuit breaker for the requests to each microservice. When it
+        #: is set, the requests to a microservice that has failed repeatedly
+        #: fail immediately with `CircuitOpenException`, until the
+        #: microservice is available again. It is `None` (disabled) by
+        #: default.
+        self.circuit_breaker: Optional[CircuitBreaker] = None
+        #: Controller that lowers the request rate of a microservice when
+        #: the `RateLimit-Remaining` header of its responses shows that the
+        #: quota is running out, before the requests are rejected. It is
+        #: `None` (disabled) by default.
+        self.adaptive_throttle: Optional[AdaptiveThrottle] = None
         #: Set the sleep times for the polling of a task. When this is a
         #: a list an error will be raised if the task is not finished after
         #: the last sleep time. By default the sleep times will sum to
         #: 1 minute and the client will make 236 requests before failing.
         self.polling_sleep_times: list = [1, 0.5] + 234 * [0.25]
+        #: Schedule of the polls of the tasks that is learned from the
+        #: completion times of the previous tasks of the same kind. When it
+        #: is set, it is used instead of `polling_sleep_times`.
+        self.polling_schedule: Optional[AdaptivePollingSchedule] = None
+        #: Polls the tasks of the blocking calls from a background thread,
+        #: with one request for all the tasks that are due at the same time
+        #: (`client.task_watcher = TaskWatcher(client)`). When it is `None`,
+        #: the default, each task is polled in the thread of its call.
+        self.task_watcher: Optional[TaskWatcher] = None
         #: Disable all logging from the client.
         self.disable_client_logging: bool = False
-        self._session = requests.Session()
+        #: Function that decodes the JSON body of the responses, from bytes.
+        #: By default it is `orjson.loads` when orjson is installed
+        #: (`pip install pyfirecrest[fast-json]`), which is several times
+        #: faster for large listings, and `json.loads` otherwise.
+        self.json_decoder: Callable[[bytes], Any] = default_json_decoder()
+        if transport is None:
+            transport = RequestsTransport(
+                verify=verify,
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                pool_block=pool_block,
+            )
+
+        self._transport = transport
+
+        #: Seconds between requests in each microservice, on average. The
+        #: requests of each microservice, from all the threads that use the
+        #: client, are limited by a token bucket that is filled with one
+        #: token every `time_between_calls` seconds, up to `burst_size`
+        #: tokens. When it is 0 there is no limit, which is the default.
+        self.time_between_calls: dict[str, float] = {
+            "compute": 0,
+            "reservations": 0,
+            "status": 0,
+            "storage": 0,
+            "tasks": 0,
+            "utilities": 0,
+        }
+        #: Number of requests in each microservice that can be made at once,
+        #: without waiting `time_between_calls` between them, after the
+        #: microservice has not been used for a while. By default it is 1
+        #: for all microservices.
+        self.burst_size: dict[str, float] = {}
+        #: Merge the GET requests to the same endpoint from different
+        #: threads, when possible. This will take effect only when the
+        #: time_between_calls of the microservice is greater than 0.
+        self.merge_get_requests: bool = False
+        #: Make only one request for identical GET requests (same endpoint,
+        #: parameters and machine) that are made at the same time. The
+        #: requests that arrive while the first one is in flight get its
+        #: response, or its error.
+        self.deduplicate_get_requests: bool = False
+        #: Number of GET requests that were not sent because they got the
+        #: response of an identical request, for each endpoint.
+        self.deduplicated_requests: collections.Counter[str] = collections.Counter()
+        self._get_requests_in_flight: dict[tuple, concurrent.futures.Future] = {}
+        self._get_requests_lock = threading.Lock()
+        # Handles of `submit_nowait` that are waiting for their job ID
+        self._job_handles = _JobHandles(self)
+        self._rate_limiter = RateLimiter(rate_limit_backend)
+        # The following objects are used to "merge" requests in the same
+        # endpoint and machine, for example requests to tasks or polling for
+        # jobs. They are keyed by `(endpoint, machine)`, so the requests of
+        # each machine are merged in their own batch.
+        self._polling_lock = threading.Lock()
+        self._polling_ids: collections.defaultdict[
+            tuple, set
+        ] = collections.defaultdict(set)
+        self._polling_results: collections.defaultdict[
+            tuple, List
+        ] = collections.defaultdict(list)
+        self._polling_events: dict[tuple, Optional[threading.Event]] = {}
 
         self._api_version = parse("1.15.0")
         self._query_api_version = True
+        # Guards the version probe, so that only the first of many
+        # concurrent calls queries the API
+        self._api_version_lock = threading.RLock()
 
     def set_api_version(self, api_version: str) -> None:
         """Set the version of the api of firecrest manually. By default, the
@@ -174,8 +342,9 @@ class Firecrest:
         version>=1.16.1, so for older deployments the default will be 1.15.0.
         The version is parsed by the `packaging` library.
         """
-        self._api_version = parse(api_version)
-        self._query_api_version = False
+        with self._api_version_lock:
+            self._api_version = parse(api_version)
+            self._query_api_version = False
 
     def log(self, level: int, msg: Any) -> None:
         """Log a message with the given level on the client logger.
@@ -183,90 +352,349 @@ class Firecrest:
         if not self.disable_client_logging:
             logger.log(level, msg)
 
-    @_retry_requests  # type: ignore
-    def _get_request(
+    def map(
+        self,
+        method: str,
+        machine: str,
+        items: Iterable[Any],
+        max_workers: Optional[int] = None,
+        return_exceptions: bool = True,
+        **kwargs: Any,
+    ) -> List[Any]:
+        """Call a method of the client once per item, concurrently from a
+        pool of threads, for example `client.map("stat", machine, paths)`.
+        The results are returned in the same order as the items.
+
+        :param method: the name of the method of the client
+        :param machine: the machine name that is passed to every call
+        :param items: the arguments that follow `machine` in each call. A tuple is unpacked into several positional arguments.
+        :param max_workers: the maximum number of threads. When it is `None` the default of `concurrent.futures.ThreadPoolExecutor` is used.
+        :param return_exceptions: when `True`, the exception of a failed call is returned in the place of its result, otherwise the first exception (in the order of the items) is raised
+        :param kwargs: keyword arguments that are passed to every call
+        """
+        if method.startswith("_") or not callable(getattr(self, method, None)):
+            raise ValueError(f"`{method}` is not a method of the client")
+
+        func = getattr(self, method)
+
+        def call(item):
+            args = item if isinstance(item, tuple) else (item,)
+            return func(machine, *args, **kwargs)
+
+        results = []
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as pool:
+            futures = [pool.submit(call, item) for item in items]
+            for future in futures:
+                exc = future.exception()
+                if exc is None:
+                    results.append(future.result())
+                elif return_exceptions:
+                    results.append(exc)
+                else:
+                    for f in futures:
+                        f.cancel()
+
+                    raise exc
+
+        return results
+
+    def _check_circuit(self, microservice: str) -> None:
+        breaker = self.circuit_breaker
+        assert breaker is not None
+        state = breaker.before_request(microservice)
+        if state == breaker.PROBE:
+            # The `status` microservice can only be checked by a request
+            available = microservice == "status"
+            try:
+                if not available:
+                    self.log(
+                        logging.INFO,
+                        f"Checking if `{microservice}` microservice is "
+                        f"available"
+                    )
+                    service = self.service(microservice)
+                    available = service["status"] == "available"
+            except Exception as e:
+                self.log(
+                    logging.WARNING,
+                    f"Could not get the status of `{microservice}`: {e}"
+                )
+            finally:
+                breaker.probe_result(microservice, available)
+
+            if available:
+                return
+
+            state = breaker.OPEN
+
+        if state == breaker.OPEN:
+            exc = fe.CircuitOpenException(
+                microservice, breaker.retry_after(microservice)
+            )
+            self.log(logging.WARNING, exc)
+            raise exc
+
+    def _stall_request(self, microservice: str) -> None:
+        time_between_calls = self.time_between_calls.get(microservice, 0)
+        rate = 1 / time_between_calls if time_between_calls > 0 else math.inf
+        if self.adaptive_throttle is not None:
+            rate = min(rate, self.adaptive_throttle.rate(microservice))
+
+        if rate == math.inf:
+            return
+
+        waited = self._rate_limiter.acquire(
+            microservice, rate, self.burst_size.get(microservice, 1)
+        )
+        if waited > 0:
+            self.log(
+                logging.DEBUG,
+                f"Request to `{microservice}` microservice waited "
+                f"{waited:.3f} sec for the rate limit"
+            )
+
+    def _merged_get(
+        self, key, additional_headers, params, event, results
+    ) -> None:
+        endpoint = key[0]
+        microservice = endpoint.split("/")[1]
+        url = f"{self._firecrest_url}{endpoint}"
+        resp: Any
+        try:
+            # The threads that ask for the same endpoint while this one is
+            # waiting for the rate limit will join the request
+            self._stall_request(microservice)
+            with self._polling_lock:
+                ids = self._polling_ids[key]
+                self._polling_events[key] = None
+                self._polling_ids[key] = set()
+
+            params = dict(params)
+            comma_sep_par = "tasks" if microservice == "tasks" else "jobs"
+            if ids == {"*"}:
+                if comma_sep_par in params:
+                    del params[comma_sep_par]
+            else:
+                params[comma_sep_par] = ",".join(ids)
+
+            headers = {
+                "Authorization": f"Bearer {self._authorization.get_access_token()}"
+            }
+            if additional_headers:
+                headers.update(additional_headers)
+
+            self.log(logging.INFO, f"Making GET request to {endpoint}")
+            with time_block(f"GET request to {endpoint}", logger):
+                resp = self._transport.request(
+                    "GET",
+                    url,
+                    headers=headers,
+                    params=params,
+                    timeout=self.timeout
+                )
+
+            log_response_size("GET", endpoint, resp, self.log)
+        except BaseException as e:
+            # All the merged requests will raise the error and they can be
+            # retried, so the waiting threads never get an empty response
+            resp = e
+        finally:
+            with self._polling_lock:
+                if self._polling_events[key] is event:
+                    self._polling_events[key] = None
+                    self._polling_ids[key] = set()
+
+            results.append(resp)
+            event.set()
+
+    def _get_merge_request(
         self, endpoint, additional_headers=None, params=None
     ) -> requests.Response:
-        url = f"{self._firecrest_url}{endpoint}"
-        headers = {"Authorization": f"Bearer {self._authorization.get_access_token()}"}
-        if additional_headers:
-            headers.update(additional_headers)
+        machine = (
+            additional_headers.get("X-Machine-Name")
+            if additional_headers else None
+        )
+        key = (endpoint, machine)
+        with self._polling_lock:
+            if self._polling_ids[key] != {"*"}:
+                comma_sep_par = "tasks" if endpoint == "/tasks" else "jobs"
+                if comma_sep_par not in params:
+                    self._polling_ids[key] = {"*"}
+                else:
+                    new_ids = params[comma_sep_par].split(",")
+                    self._polling_ids[key].update(new_ids)
+
+            my_event = self._polling_events.get(key)
+            if my_event is None:
+                my_event = threading.Event()
+                self._polling_events[key] = my_event
+                self._polling_results[key] = []
+                my_result = self._polling_results[key]
+                leader = True
+            else:
+                my_result = self._polling_results[key]
+                leader = False
 
-        self.log(logging.INFO, f"Making GET request to {endpoint}")
-        with time_block(f"GET request to {endpoint}", logger):
-            resp = self._session.get(
-                url=url,
-                headers=headers,
-                params=params,
-                verify=self._verify,
-                timeout=self.timeout,
+        if leader:
+            self._merged_get(
+                key, additional_headers, params, my_event, my_result
             )
 
+        my_event.wait()
+        resp = my_result[0]
+        if isinstance(resp, BaseException):
+            raise resp
+
         return resp
 
+    def _can_merge_request(self, method, endpoint, params) -> bool:
+        if method != "GET" or not self.merge_get_requests:
+            return False
+
+        microservice = endpoint.split("/")[1]
+        if (
+            self.time_between_calls.get(microservice, 0) <= 0 or
+            endpoint not in ("/compute/jobs", "/compute/acct", "/tasks")
+        ):
+            return False
+
+        # We can only merge requests with the same restrictions as in
+        # `AsyncFirecrest`:
+        # - For `/compute/acct` we can merge only if the start_time,
+        #     end_time, and pagination parameters are not set.
+        # - For `/compute/jobs` we can merge only if the pagination
+        #     parameters are not set.
+        # The merged request is sent with the parameters of the first
+        # caller, so none of these may differ between the callers.
+        if endpoint == "/compute/acct":
+            return not any(
+                k in params
+                for k in ("starttime", "endtime", "pageSize", "pageNumber")
+            )
+
+        if endpoint == "/compute/jobs":
+            return not any(
+                k in params for k in ("pageSize", "pageNumber")
+            )
+
+        return endpoint == "/tasks"
+
+    @_circuit_breaker  # type: ignore
     @_retry_requests  # type: ignore
-    def _post_request(
-        self, endpoint, additional_headers=None, data=None, files=None
+    def _request(
+        self,
+        method,
+        endpoint,
+        additional_headers=None,
+        params=None,
+        data=None,
+        files=None,
     ) -> requests.Response:
+        if self._can_merge_request(method, endpoint, params):
+            return self._get_merge_request(
+                endpoint=endpoint,
+                additional_headers=additional_headers,
+                params=params
+            )
+
         url = f"{self._firecrest_url}{endpoint}"
+        self._stall_request(endpoint.split("/")[1])
         headers = {"Authorization": f"Bearer {self._authorization.get_access_token()}"}
         if additional_headers:
             headers.update(additional_headers)
 
-        self.log(logging.INFO, f"Making POST request to {endpoint}")
-        with time_block(f"POST request to {endpoint}", logger):
-            resp = self._session.post(
-                url=url,
+        self.log(logging.INFO, f"Making {method} request to {endpoint}")
+        with time_block(f"{method} request to {endpoint}", logger):
+            resp = self._transport.request(
+                method,
+                url,
                 headers=headers,
+                params=params,
                 data=data,
                 files=files,
-                verify=self._verify,
                 timeout=self.timeout,
             )
 
+        log_response_size(method, endpoint, resp, self.log)
         return resp
 
-    @_retry_requests  # type: ignore
-    def _put_request(
-        self, endpoint, additional_headers=None, data=None
+    def _get_request(
+        self, endpoint, additional_headers=None, params=None
     ) -> requests.Response:
-        url = f"{self._firecrest_url}{endpoint}"
-        headers = {"Authorization": f"Bearer {self._authorization.get_access_token()}"}
-        if additional_headers:
-            headers.update(additional_headers)
+        if not self.deduplicate_get_requests:
+            return self._request(
+                "GET",
+                endpoint=endpoint,
+                additional_headers=additional_headers,
+                params=params,
+            )
 
-        self.log(logging.INFO, f"Making PUT request to {endpoint}")
-        with time_block(f"PUT request to {endpoint}", logger):
-            resp = self._session.put(
-                url=url,
-                headers=headers,
-                data=data,
-                verify=self._verify,
-                timeout=self.timeout,
+        key = get_request_key(endpoint, additional_headers, params)
+        with self._get_requests_lock:
+            future = self._get_requests_in_flight.get(key)
+            leader = future is None
+            if future is None:
+                future = concurrent.futures.Future()
+                self._get_requests_in_flight[key] = future
+            else:
+                self.deduplicated_requests[endpoint] += 1
+
+        if not leader:
+            self.log(
+                logging.DEBUG,
+                f"GET request to {endpoint} is already in flight, waiting "
+                f"for its response"
+            )
+            return future.result()
+
+        try:
+            resp = self._request(
+                "GET",
+                endpoint=endpoint,
+                additional_headers=additional_headers,
+                params=params,
             )
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(resp)
+        finally:
+            with self._get_requests_lock:
+                del self._get_requests_in_flight[key]
 
         return resp
 
-    @_retry_requests  # type: ignore
-    def _delete_request(
-        self, endpoint, additional_headers=None, data=None
+    def _post_request(
+        self, endpoint, additional_headers=None, data=None, files=None
     ) -> requests.Response:
-        url = f"{self._firecrest_url}{endpoint}"
-        headers = {"Authorization": f"Bearer {self._authorization.get_access_token()}"}
-        if additional_headers:
-            headers.update(additional_headers)
+        return self._request(
+            "POST",
+            endpoint=endpoint,
+            additional_headers=additional_headers,
+            data=data,
+            files=files,
+        )
 
-        self.log(logging.INFO, f"Making DELETE request to {endpoint}")
-        with time_block(f"DELETE request to {endpoint}", logger):
-            resp = self._session.delete(
-                url=url,
-                headers=headers,
-                data=data,
-                verify=self._verify,
-                timeout=self.timeout,
-            )
+    def _put_request(
+        self, endpoint, additional_headers=None, data=None
+    ) -> requests.Response:
+        return self._request(
+            "PUT",
+            endpoint=endpoint,
+            additional_headers=additional_headers,
+            data=data,
+        )
 
-        return resp
+    def _delete_request(
+        self, endpoint, additional_headers=None, data=None
+    ) -> requests.Response:
+        return self._request(
+            "DELETE",
+            endpoint=endpoint,
+            additional_headers=additional_headers,
+            data=data,
+        )
 
     @overload
     def _json_response(
@@ -292,57 +720,13 @@ class Firecrest:
         expected_status_code: int,
         allow_none_result: bool = False,
     ):
-        # Will examine only the last response
-        response = responses[-1]
-        status_code = response.status_code
-        # handle_response(response)
-        exc: fe.FirecrestException
-        for h in fe.ERROR_HEADERS:
-            if h in response.headers:
-                self.log(
-                    logging.CRITICAL,
-                    f"Header '{h}' is included in the response"
-                )
-                exc = fe.HeaderException(responses)
-                self.log(logging.CRITICAL, exc)
-                raise exc
-
-        if status_code == 401:
-            self.log(logging.CRITICAL, "Status of the response is 401")
-            exc = fe.UnauthorizedException(responses)
-            self.log(logging.CRITICAL, exc)
-            raise exc
-        elif status_code == 404:
-            self.log(logging.CRITICAL, "Status of the response is 404")
-            exc = fe.NotFound(responses)
-            self.log(logging.CRITICAL, exc)
-            raise exc
-        elif status_code >= 400:
-            self.log(logging.CRITICAL, f"Status of the response is {status_code}")
-            exc = fe.FirecrestException(responses)
-            self.log(logging.CRITICAL, exc)
-            raise exc
-        elif status_code != expected_status_code:
-            self.log(
-                logging.CRITICAL,
-                f"Unexpected status of last request {status_code}, it should "
-                f"have been {expected_status_code}"
-            )
-            exc = fe.UnexpectedStatusException(responses, expected_status_code)
-            self.log(logging.CRITICAL, exc)
-            raise exc
-
-        try:
-            ret = response.json()
-        except json.decoder.JSONDecodeError:
-            if allow_none_result:
-                ret = None
-            else:
-                exc = fe.NoJSONException(responses)
-                self.log(logging.CRITICAL, exc)
-                raise exc
-
-        return ret
+        return json_response(
+            responses,
+            expected_status_code,
+            allow_none_result,
+            self.log,
+            self.json_decoder,
+        )
 
     def _tasks(
         self,
@@ -370,10 +754,12 @@ class Firecrest:
     def _task_safe(
         self, task_id: str, responses: Optional[List[requests.Response]] = None
     ) -> t.Task:
-        if responses is None:
-            responses = self._current_method_requests
-
+        responses = [] if responses is None else responses
         task = self._tasks([task_id], responses)[task_id]
+        self._check_task(task, responses)
+        return task
+
+    def _check_task(self, task: t.Task, responses: List[requests.Response]) -> None:
         status = int(task["status"])
         exc: fe.FirecrestException
         if status == 115:
@@ -394,8 +780,6 @@ class Firecrest:
             self.log(logging.CRITICAL, exc)
             raise exc
 
-        return task
-
     def _invalidate(
         self, task_id: str, responses: Optional[List[requests.Response]] = None
     ):
@@ -407,9 +791,49 @@ class Firecrest:
         responses.append(resp)
         return self._json_response(responses, 201, allow_none_result=True)
 
-    def _poll_tasks(self, task_id: str, final_status, sleep_time):
+    def _poll_tasks(
+        self,
+        task_id: str,
+        final_status,
+        sleep_time,
+        responses: Optional[List[requests.Response]] = None,
+    ):
+        responses = [] if responses is None else responses
         self.log(logging.INFO, f"Polling task {task_id} until status is {final_status}")
-        resp = self._task_safe(task_id)
+        kind = None
+        if self.polling_schedule is not None:
+            kind = task_kind(responses)
+            sleep_time = self.polling_schedule.sleep_times(kind)
+
+        start = time.time()
+        result = self._poll_task_until(
+            task_id, final_status, sleep_time, responses
+        )
+        if self.polling_schedule is not None and kind is not None:
+            self.polling_schedule.record(
+                kind, sleep_time.completion_time(time.time() - start)
+            )
+
+        return result
+
+    def _poll_task_until(
+        self,
+        task_id: str,
+        final_status,
+        sleep_time,
+        responses: List[requests.Response],
+    ):
+        if self.task_watcher is not None:
+            future = self.task_watcher.watch(
+                task_id, final_status, sleep_time, responses
+            )
+            try:
+                return future.result()
+            except BaseException:
+                future.cancel()
+                raise
+
+        resp = self._task_safe(task_id, responses)
         t = 1
         while resp["status"] < final_status:
             try:
@@ -423,7 +847,7 @@ class Firecrest:
                 f'sec'
             )
             time.sleep(t)
-            resp = self._task_safe(task_id)
+            resp = self._task_safe(task_id, responses)
 
         self.log(logging.INFO, f'Status of {task_id} is {resp["status"]}')
         return resp["data"], resp.get("system", "")
@@ -472,25 +896,29 @@ class Firecrest:
         """
         resp = self._get_request(endpoint="/status/parameters")
         json_response = self._json_response([resp], 200)["out"]
-        if self._query_api_version:
-            self._query_api_version = False
-            try:
-                general_params = json_response["general"]
-                for g in general_params:
-                    if g["name"] == "FIRECREST_VERSION":
-                        self._api_version = parse(g["value"])
-                        return json_response
-
-                raise KeyError
+        with self._api_version_lock:
+            if self._query_api_version:
+                # The version is set before `_query_api_version` is
+                # cleared, so other threads never see a stale version
+                try:
+                    general_params = json_response["general"]
+                    for g in general_params:
+                        if g["name"] == "FIRECREST_VERSION":
+                            self._api_version = parse(g["value"])
+                            break
+                    else:
+                        raise KeyError
+
+                except KeyError:
+                    self.log(
+                        logging.WARNING,
+                        "Could not get the version of the api from firecREST. "
+                        "The version will be set to 1.15.0, but you can manually "
+                        "set it with the method `set_api_version`."
+                    )
+                    self._api_version = parse("1.15.0")
 
-            except KeyError:
-                self.log(
-                    logging.WARNING,
-                    "Could not get the version of the api from firecREST. "
-                    "The version will be set to 1.15.0, but you can manually "
-                    "set it with the method `set_api_version`."
-                )
-                self._api_version = parse("1.15.0")
+                self._query_api_version = False
 
         return json_response
 
@@ -1129,7 +1557,7 @@ class Firecrest:
         return self._json_response([resp], 200)["output"]
 
     # Compute
-    def _submit_request(self, machine: str, job_script, local_file, account=None, env_vars=None):
+    def _submit_request(self, machine: str, job_script, local_file, responses, account=None, env_vars=None):
         data = {}
         if account:
             data["account"] = account
@@ -1153,10 +1581,10 @@ class Firecrest:
                 data=data,
             )
 
-        self._current_method_requests.append(resp)
-        return self._json_response(self._current_method_requests, 201)
+        responses.append(resp)
+        return self._json_response(responses, 201)
 
-    def _squeue_request(self, machine: str, jobs=None, page_size=None, page_number=None):
+    def _squeue_request(self, machine: str, responses, jobs=None, page_size=None, page_number=None):
         jobs = [] if jobs is None else jobs
         params = {}
         if jobs:
@@ -1173,10 +1601,10 @@ class Firecrest:
             additional_headers={"X-Machine-Name": machine},
             params=params,
         )
-        self._current_method_requests.append(resp)
-        return self._json_response(self._current_method_requests, 200)
+        responses.append(resp)
+        return self._json_response(responses, 200)
 
-    def _acct_request(self, machine: str, jobs=None, start_time=None, end_time=None, page_size=None, page_number=None):
+    def _acct_request(self, machine: str, responses, jobs=None, start_time=None, end_time=None, page_size=None, page_number=None):
         jobs = [] if jobs is None else jobs
         params = {}
         if jobs:
@@ -1199,34 +1627,21 @@ class Firecrest:
             additional_headers={"X-Machine-Name": machine},
             params=params,
         )
-        self._current_method_requests.append(resp)
-        return self._json_response(self._current_method_requests, 200)
+        responses.append(resp)
+        return self._json_response(responses, 200)
 
-    def submit(
+    def _submit_job(
         self,
         machine: str,
-        job_script: Optional[str] = None,
-        local_file: Optional[bool] = True,
-        script_str: Optional[str] = None,
-        script_local_path: Optional[str] = None,
-        script_remote_path: Optional[str] = None,
-        account: Optional[str] = None,
-        env_vars: Optional[dict[str, Any]] = None,
-    ) -> t.JobSubmit:
-        """Submits a batch script to SLURM on the target system. One of `script_str`, `script_local` and `script_remote` needs to be set.
-
-        :param machine: the machine name where the scheduler belongs to
-        :param job_script: [deprecated] use `script_str`, `script_local_path` or `script_remote_path`
-        :param local_file: [deprecated]
-        :param script_str: the content of the script to be submitted
-        :param script_local_path: the path of the script on the local file system
-        :param script_remote_path: the full path of the script on the remote file system
-        :param account: submit the job with this project account
-        :param env_vars: dictionary (varName, value) defining environment variables to be exported for the job
-        :calls: POST `/compute/jobs/upload` or POST `/compute/jobs/path`
-
-                GET `/tasks`
-        """
+        job_script: Optional[str],
+        local_file: Optional[bool],
+        script_str: Optional[str],
+        script_local_path: Optional[str],
+        script_remote_path: Optional[str],
+        account: Optional[str],
+        env_vars: Optional[dict[str, Any]],
+        responses: List[requests.Response],
+    ) -> str:
         if [
             script_str is None,
             script_local_path is None,
@@ -1270,8 +1685,6 @@ class Firecrest:
             is_local = False
             job_script_file = script_remote_path
 
-        self._current_method_requests = []
-
         # Check if `job_script` is a filename or a job script and create a file if necessary
         context: Any = (
             tempfile.TemporaryDirectory()
@@ -1290,19 +1703,159 @@ class Firecrest:
                 job_script_file = os.path.join(tmpdirname, "script.batch")
 
             env = json.dumps(env_vars) if env_vars else None
-            json_response = self._submit_request(machine, job_script_file, is_local, account, env)
+            json_response = self._submit_request(machine, job_script_file, is_local, responses, account, env)
             self.log(
                 logging.INFO,
                 f"Job submission task: {json_response['task_id']}"
             )
 
-        # Inject taskid in the result
+        return json_response["task_id"]
+
+    def submit(
+        self,
+        machine: str,
+        job_script: Optional[str] = None,
+        local_file: Optional[bool] = True,
+        script_str: Optional[str] = None,
+        script_local_path: Optional[str] = None,
+        script_remote_path: Optional[str] = None,
+        account: Optional[str] = None,
+        env_vars: Optional[dict[str, Any]] = None,
+    ) -> t.JobSubmit:
+        """Submits a batch script to SLURM on the target system. One of `script_str`, `script_local` and `script_remote` needs to be set.
+
+        :param machine: the machine name where the scheduler belongs to
+        :param job_script: [deprecated] use `script_str`, `script_local_path` or `script_remote_path`
+        :param local_file: [deprecated]
+        :param script_str: the content of the script to be submitted
+        :param script_local_path: the path of the script on the local file system
+        :param script_remote_path: the full path of the script on the remote file system
+        :param account: submit the job with this project account
+        :param env_vars: dictionary (varName, value) defining environment variables to be exported for the job
+        :calls: POST `/compute/jobs/upload` or POST `/compute/jobs/path`
+
+                GET `/tasks`
+        """
+        responses: List[requests.Response] = []
+        task_id = self._submit_job(
+            machine,
+            job_script,
+            local_file,
+            script_str,
+            script_local_path,
+            script_remote_path,
+            account,
+            env_vars,
+            responses,
+        )
         result = self._poll_tasks(
-            json_response["task_id"], "200", iter(self.polling_sleep_times)
+            task_id, "200", iter(self.polling_sleep_times), responses
         )[0]
-        result["firecrest_taskid"] = json_response["task_id"]
+        # Inject taskid in the result
+        result["firecrest_taskid"] = task_id
         return result
 
+    def submit_nowait(
+        self,
+        machine: str,
+        job_script: Optional[str] = None,
+        local_file: Optional[bool] = True,
+        script_str: Optional[str] = None,
+        script_local_path: Optional[str] = None,
+        script_remote_path: Optional[str] = None,
+        account: Optional[str] = None,
+        env_vars: Optional[dict[str, Any]] = None,
+    ) -> JobHandle:
+        """Submits a batch script to SLURM on the target system like `submit`, but returns a `JobHandle` as soon as the submission task has been created, without waiting for the job ID.
+        The handles that are still pending are resolved together, with one `/tasks` request for many of them, when the result of one of them is needed.
+
+        :param machine: the machine name where the scheduler belongs to
+        :param job_script: [deprecated] use `script_str`, `script_local_path` or `script_remote_path`
+        :param local_file: [deprecated]
+        :param script_str: the content of the script to be submitted
+        :param script_local_path: the path of the script on the local file system
+        :param script_remote_path: the full path of the script on the remote file system
+        :param account: submit the job with this project account
+        :param env_vars: dictionary (varName, value) defining environment variables to be exported for the job
+        :calls: POST `/compute/jobs/upload` or POST `/compute/jobs/path`
+        """
+        responses: List[requests.Response] = []
+        task_id = self._submit_job(
+            machine,
+            job_script,
+            local_file,
+            script_str,
+            script_local_path,
+            script_remote_path,
+            account,
+            env_vars,
+            responses,
+        )
+        handle = JobHandle(self, machine, task_id, responses)
+        self._job_handles.add(handle)
+        return handle
+
+    def submit_many(
+        self,
+        machine: str,
+        jobs: Sequence[dict[str, Any]],
+        max_workers: int = 8,
+        return_exceptions: bool = True,
+    ) -> List[t.JobSubmit | Exception]:
+        """Submits many batch scripts to SLURM on the target system.
+        The scripts are uploaded by up to `max_workers` threads at the same time, with `submit_nowait`, and the submission tasks are then resolved together, with one `/tasks` request for up to 100 of them.
+        The results are returned in the same order as the jobs.
+
+        .. code-block:: Python
+
+            results = client.submit_many(
+                "cluster",
+                [
+                    {"script_str": script, "env_vars": {"PARAM": p}}
+                    for p in params
+                ],
+            )
+
+        :param machine: the machine name where the scheduler belongs to
+        :param jobs: the keyword arguments of `submit` for each job, for example `script_str` or `script_local_path`, `account` and `env_vars`
+        :param max_workers: the maximum number of scripts that are uploaded at the same time
+        :param return_exceptions: when `True`, the exception of a failed submission is returned in the place of its result, otherwise the first exception (in the order of the jobs) is raised, after all the submissions have been checked
+        :calls: POST `/compute/jobs/upload` or POST `/compute/jobs/path`
+
+                GET `/tasks`
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            futures = [
+                executor.submit(self.submit_nowait, machine, **job)
+                for job in jobs
+            ]
+
+        handles: List[JobHandle] = []
+        results: List[t.JobSubmit | Exception] = []
+        try:
+            # Every submission is checked before an error is raised, so
+            # that none of the submitted jobs is left pending
+            for future in futures:
+                try:
+                    handle = future.result()
+                    handles.append(handle)
+                    results.append(handle.result())
+                except Exception as e:
+                    results.append(e)
+        finally:
+            # The handles are never returned, so don't keep polling the
+            # submissions that failed to be checked
+            for handle in handles:
+                if not handle.done():
+                    self._job_handles.discard(handle)
+
+        if not return_exceptions:
+            for res in results:
+                if isinstance(res, Exception):
+                    raise res
+
+        return results
+
     def poll(
         self,
         machine: str,
@@ -1325,7 +1878,7 @@ class Firecrest:
 
                 GET `/tasks`
         """
-        self._current_method_requests = []
+        responses: List[requests.Response] = []
         if isinstance(jobs, str):
             self.log(
                 logging.WARNING,
@@ -1335,11 +1888,12 @@ class Firecrest:
 
         jobids = [str(j) for j in jobs] if jobs else []
         json_response = self._acct_request(
-            machine, jobids, start_time, end_time, page_size, page_number
+            machine, responses, jobids, start_time, end_time, page_size, page_number
         )
         self.log(logging.INFO, f"Job polling task: {json_response['task_id']}")
         res = self._poll_tasks(
-            json_response["task_id"], "200", iter(self.polling_sleep_times)
+            json_response["task_id"], "200", iter(self.polling_sleep_times),
+            responses
         )[0]
         # When there is no job in the sacct output firecrest will return an empty dictionary instead of list
         if isinstance(res, dict):
@@ -1365,7 +1919,7 @@ class Firecrest:
 
                 GET `/tasks`
         """
-        self._current_method_requests = []
+        responses: List[requests.Response] = []
         if isinstance(jobs, str):
             self.log(
                 logging.WARNING,
@@ -1374,16 +1928,122 @@ class Firecrest:
 
         jobs = jobs if jobs else []
         jobids = [str(j) for j in jobs]
-        json_response = self._squeue_request(machine, jobids, page_size, page_number)
+        json_response = self._squeue_request(machine, responses, jobids, page_size, page_number)
         self.log(
             logging.INFO,
             f"Job active polling task: {json_response['task_id']}"
         )
         dict_result = self._poll_tasks(
-            json_response["task_id"], "200", iter(self.polling_sleep_times)
+            json_response["task_id"], "200", iter(self.polling_sleep_times),
+            responses
         )[0]
         return list(dict_result.values())
 
+    def iter_poll(
+        self,
+        machine: str,
+        jobs: Optional[Sequence[str | int]] = None,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        page_size: int = 100,
+        prefetch: bool = True,
+    ) -> Iterator[t.JobAcct]:
+        """Iterates over the jobs of `poll`, one page at a time. The next
+        page is requested while the jobs of the current one are consumed,
+        and the iteration stops after the first page that is not full, so
+        at most two pages are kept in memory.
+
+        .. code-block:: Python
+
+            for job in client.iter_poll("cluster", start_time="2023-01-01"):
+                print(job["jobid"], job["state"])
+
+        :param machine: the machine name where the scheduler belongs to
+        :param jobs: list of the IDs of the jobs
+        :param start_time: Start time (and/or date) of job's query. Allowed formats are HH:MM[:SS] [AM|PM] MMDD[YY] or MM/DD[/YY] or MM.DD[.YY] MM/DD[/YY]-HH:MM[:SS] YYYY-MM-DD[THH:MM[:SS]]
+        :param end_time: End time (and/or date) of job's query. Allowed formats are HH:MM[:SS] [AM|PM] MMDD[YY] or MM/DD[/YY] or MM.DD[.YY] MM/DD[/YY]-HH:MM[:SS] YYYY-MM-DD[THH:MM[:SS]]
+        :param page_size: number of entries in each page
+        :param prefetch: request the next page from a background thread while the current one is consumed, after its first item
+        :calls: GET `/compute/acct`
+
+                GET `/tasks`
+        """
+        return self._iter_pages(
+            lambda page_number: self.poll(
+                machine, jobs, start_time, end_time, page_size, page_number
+            ),
+            page_size,
+            prefetch,
+        )
+
+    def iter_poll_active(
+        self,
+        machine: str,
+        jobs: Optional[Sequence[str | int]] = None,
+        page_size: int = 100,
+        prefetch: bool = True,
+    ) -> Iterator[t.JobQueue]:
+        """Iterates over the jobs of `poll_active`, one page at a time,
+        like `iter_poll`.
+
+        :param machine: the machine name where the scheduler belongs to
+        :param jobs: list of the IDs of the jobs
+        :param page_size: number of entries in each page
+        :param prefetch: request the next page from a background thread while the current one is consumed, after its first item
+        :calls: GET `/compute/jobs`
+
+                GET `/tasks`
+        """
+        return self._iter_pages(
+            lambda page_number: self.poll_active(
+                machine, jobs, page_size, page_number
+            ),
+            page_size,
+            prefetch,
+        )
+
+    def _iter_pages(
+        self,
+        fetch_page: Callable[[int], List[Any]],
+        page_size: int,
+        prefetch: bool,
+    ) -> Iterator[Any]:
+        executor = (
+            concurrent.futures.ThreadPoolExecutor(1) if prefetch else None
+        )
+        next_page: Optional[concurrent.futures.Future] = None
+        try:
+            page_number = 0
+            page = fetch_page(page_number)
+            while True:
+                last_page = len(page) < page_size
+                next_page = None
+                for i, item in enumerate(page):
+                    # A page that is already running can't be cancelled, so
+                    # we wait until the consumer asks for more than one item
+                    if i == 1 and executor is not None and not last_page:
+                        next_page = executor.submit(
+                            fetch_page, page_number + 1
+                        )
+
+                    yield item
+
+                if last_page:
+                    return
+
+                page_number += 1
+                page = (
+                    next_page.result() if next_page is not None
+                    else fetch_page(page_number)
+                )
+        finally:
+            if executor is not None:
+                # Don't wait for a page that won't be consumed
+                if next_page is not None:
+                    next_page.cancel()
+
+                executor.shutdown(wait=False)
+
     @validate_api_version_compatibility()
     def nodes(
         self,
@@ -1410,10 +2070,11 @@ class Firecrest:
             additional_headers={"X-Machine-Name": machine},
             params=params,
         )
-        self._current_method_requests.append(resp)
-        json_response = self._json_response(self._current_method_requests, 200)
+        responses = [resp]
+        json_response = self._json_response(responses, 200)
         result = self._poll_tasks(
-            json_response["task_id"], "200", iter(self.polling_sleep_times)
+            json_response["task_id"], "200", iter(self.polling_sleep_times),
+            responses
         )[0]
         return result
 
@@ -1443,10 +2104,11 @@ class Firecrest:
             additional_headers={"X-Machine-Name": machine},
             params=params,
         )
-        self._current_method_requests.append(resp)
-        json_response = self._json_response(self._current_method_requests, 200)
+        responses = [resp]
+        json_response = self._json_response(responses, 200)
         result = self._poll_tasks(
-            json_response["task_id"], "200", iter(self.polling_sleep_times)
+            json_response["task_id"], "200", iter(self.polling_sleep_times),
+            responses
         )[0]
         return result
 
@@ -1473,10 +2135,11 @@ class Firecrest:
             additional_headers={"X-Machine-Name": machine},
             params=params,
         )
-        self._current_method_requests.append(resp)
-        json_response = self._json_response(self._current_method_requests, 200)
+        responses = [resp]
+        json_response = self._json_response(responses, 200)
         result = self._poll_tasks(
-            json_response["task_id"], "200", iter(self.polling_sleep_times)
+            json_response["task_id"], "200", iter(self.polling_sleep_times),
+            responses
         )[0]
         return result
 
@@ -1490,19 +2153,19 @@ class Firecrest:
 
                 GET `/tasks`
         """
-        self._current_method_requests = []
         resp = self._delete_request(
             endpoint=f"/compute/jobs/{job_id}",
             additional_headers={"X-Machine-Name": machine},
         )
-        self._current_method_requests.append(resp)
-        json_response = self._json_response(self._current_method_requests, 200)
+        responses = [resp]
+        json_response = self._json_response(responses, 200)
         self.log(
             logging.INFO,
             f"Job cancellation task: {json_response['task_id']}"
         )
         return self._poll_tasks(
-            json_response["task_id"], "200", iter(self.polling_sleep_times)
+            json_response["task_id"], "200", iter(self.polling_sleep_times),
+            responses
         )[0]
 
     # Storage
@@ -1516,6 +2179,7 @@ class Firecrest:
         time,
         stage_out_job_id,
         account,
+        responses,
         extension=None,
         dereference=False,
     ):
@@ -1544,8 +2208,8 @@ class Firecrest:
         resp = self._post_request(
             endpoint=endpoint, additional_headers={"X-Machine-Name": machine}, data=data
         )
-        self._current_method_requests.append(resp)
-        return self._json_response(self._current_method_requests, 201)
+        responses.append(resp)
+        return self._json_response(responses, 201)
 
     def submit_move_job(
         self,
@@ -1573,7 +2237,7 @@ class Firecrest:
 
                 GET `/tasks`
         """
-        self._current_method_requests = []
+        responses: List[requests.Response] = []
         endpoint = "/storage/xfer-internal/mv"
         json_response = self._internal_transfer(
             endpoint,
@@ -1584,13 +2248,15 @@ class Firecrest:
             time,
             stage_out_job_id,
             account,
+            responses,
         )
         self.log(
             logging.INFO,
             f"Job submission task: {json_response['task_id']}"
         )
         transfer_info = self._poll_tasks(
-            json_response["task_id"], "200", iter(self.polling_sleep_times)
+            json_response["task_id"], "200", iter(self.polling_sleep_times),
+            responses
         )
         result = transfer_info[0]
         result.update({"system": transfer_info[1]})
@@ -1622,7 +2288,7 @@ class Firecrest:
 
                 GET `/tasks`
         """
-        self._current_method_requests = []
+        responses: List[requests.Response] = []
         endpoint = "/storage/xfer-internal/cp"
         json_response = self._internal_transfer(
             endpoint,
@@ -1633,13 +2299,15 @@ class Firecrest:
             time,
             stage_out_job_id,
             account,
+            responses,
         )
         self.log(
             logging.INFO,
             f"Job submission task: {json_response['task_id']}"
         )
         transfer_info = self._poll_tasks(
-            json_response["task_id"], "200", iter(self.polling_sleep_times)
+            json_response["task_id"], "200", iter(self.polling_sleep_times),
+            responses
         )
         result = transfer_info[0]
         result.update({"system": transfer_info[1]})
@@ -1671,7 +2339,7 @@ class Firecrest:
 
                 GET `/tasks`
         """
-        self._current_method_requests = []
+        responses: List[requests.Response] = []
         endpoint = "/storage/xfer-internal/rsync"
         json_response = self._internal_transfer(
             endpoint,
@@ -1682,13 +2350,15 @@ class Firecrest:
             time,
             stage_out_job_id,
             account,
+            responses,
         )
         self.log(
             logging.INFO,
             f"Job submission task: {json_response['task_id']}"
         )
         transfer_info = self._poll_tasks(
-            json_response["task_id"], "200", iter(self.polling_sleep_times)
+            json_response["task_id"], "200", iter(self.polling_sleep_times),
+            responses
         )
         result = transfer_info[0]
         result.update({"system": transfer_info[1]})
@@ -1718,7 +2388,7 @@ class Firecrest:
 
                 GET `/tasks`
         """
-        self._current_method_requests = []
+        responses: List[requests.Response] = []
         endpoint = "/storage/xfer-internal/rm"
         json_response = self._internal_transfer(
             endpoint,
@@ -1729,13 +2399,15 @@ class Firecrest:
             time,
             stage_out_job_id,
             account,
+            responses,
         )
         self.log(
             logging.INFO,
             f"Job submission task: {json_response['task_id']}"
         )
         transfer_info = self._poll_tasks(
-            json_response["task_id"], "200", iter(self.polling_sleep_times)
+            json_response["task_id"], "200", iter(self.polling_sleep_times),
+            responses
         )
         result = transfer_info[0]
         result.update({"system": transfer_info[1]})
@@ -1807,7 +2479,7 @@ class Firecrest:
 
         .. warning:: This is available only for FirecREST>=1.16.0
         """
-        self._current_method_requests = []
+        responses: List[requests.Response] = []
         endpoint = "/storage/xfer-internal/compress"
         json_response = self._internal_transfer(
             endpoint,
@@ -1818,6 +2490,7 @@ class Firecrest:
             time,
             stage_out_job_id,
             account,
+            responses,
             dereference=dereference,
         )
         self.log(
@@ -1825,7 +2498,8 @@ class Firecrest:
             f"Job submission task: {json_response['task_id']}"
         )
         transfer_info = self._poll_tasks(
-            json_response["task_id"], "200", iter(self.polling_sleep_times)
+            json_response["task_id"], "200", iter(self.polling_sleep_times),
+            responses
         )
         result = transfer_info[0]
         result.update({"system": transfer_info[1]})
@@ -1862,7 +2536,7 @@ class Firecrest:
 
         .. warning:: This is available only for FirecREST>=1.16.0
         """
-        self._current_method_requests = []
+        responses: List[requests.Response] = []
         endpoint = "/storage/xfer-internal/extract"
         json_response = self._internal_transfer(
             endpoint,
@@ -1873,6 +2547,7 @@ class Firecrest:
             time,
             stage_out_job_id,
             account,
+            responses,
             extension
         )
         self.log(
@@ -1880,7 +2555,8 @@ class Firecrest:
             f"Job submission task: {json_response['task_id']}"
         )
         transfer_info = self._poll_tasks(
-            json_response["task_id"], "200", iter(self.polling_sleep_times)
+            json_response["task_id"], "200", iter(self.polling_sleep_times),
+            responses
         )
         result = transfer_info[0]
         result.update({"system": transfer_info[1]})
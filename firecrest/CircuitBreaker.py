@@ -0,0 +1,117 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+from __future__ import annotations
+
+import httpx
+import requests
+import threading
+import time
+
+from typing import Any
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker with one circuit per microservice. A circuit opens after
+    `failure_threshold` consecutive failures of requests to the
+    microservice: connection errors, timeouts or responses with a status of
+    500 or more. While it is open, the requests to the microservice fail
+    immediately with `CircuitOpenException`.
+
+    After `recovery_timeout` seconds the next request first checks the
+    microservice through `/status/services/{microservice}`. When it is
+    available the circuit closes, but a single failure will open it again
+    until a request succeeds. Only one request makes this check, the others
+    keep failing immediately until the check is done.
+
+    :param failure_threshold: number of consecutive failures that open the circuit
+    :param recovery_timeout: seconds before the client checks again if an open circuit can close
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    PROBE = "probe"
+
+    def __init__(
+        self, failure_threshold: int = 5, recovery_timeout: float = 30
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._failures: dict[str, int] = {}
+        self._opened_at: dict[str, float] = {}
+        self._probing: set = set()
+        # The sync client can be shared by threads
+        self._lock = threading.Lock()
+
+    def is_failure(self, response: Any = None, exc: Any = None) -> bool:
+        """Check if a request failed because of the microservice."""
+        if exc is not None:
+            return isinstance(
+                exc,
+                (requests.exceptions.RequestException, httpx.TransportError)
+            )
+
+        return response.status_code >= 500
+
+    def state(self, microservice: str) -> str:
+        """Return the state of the circuit of a microservice, without
+        changing it."""
+        with self._lock:
+            if microservice not in self._opened_at:
+                return self.CLOSED
+
+            return self.OPEN
+
+    def before_request(self, microservice: str) -> str:
+        """Return `CLOSED` when a request can be made, `OPEN` when it should
+        fail and `PROBE` when the caller has to check if the microservice is
+        available and report it with `probe_result`.
+        """
+        with self._lock:
+            opened_at = self._opened_at.get(microservice)
+            if opened_at is None:
+                return self.CLOSED
+
+            if (
+                microservice in self._probing or
+                time.time() < opened_at + self.recovery_timeout
+            ):
+                return self.OPEN
+
+            self._probing.add(microservice)
+            return self.PROBE
+
+    def retry_after(self, microservice: str) -> float:
+        """Seconds until an open circuit will be checked again"""
+        with self._lock:
+            opened_at = self._opened_at.get(microservice, 0)
+
+        return max(opened_at + self.recovery_timeout - time.time(), 0)
+
+    def probe_result(self, microservice: str, available: bool) -> None:
+        with self._lock:
+            self._probing.discard(microservice)
+            if available:
+                del self._opened_at[microservice]
+                # One more failure will open the circuit again
+                self._failures[microservice] = self.failure_threshold - 1
+            else:
+                self._opened_at[microservice] = time.time()
+
+    def record_success(self, microservice: str) -> None:
+        with self._lock:
+            self._failures[microservice] = 0
+
+    def record_failure(self, microservice: str) -> None:
+        with self._lock:
+            failures = self._failures.get(microservice, 0) + 1
+            self._failures[microservice] = failures
+            if (
+                failures >= self.failure_threshold and
+                microservice not in self._opened_at
+            ):
+                self._opened_at[microservice] = time.time()
@@ -116,3 +116,28 @@ class PollingIterException(Exception):
 
 class NotImplementedOnAPIversion(Exception):
     """Exception raised when a feature is not developed yet for the current API version"""
+
+
+class CircuitOpenException(Exception):
+    """Exception raised when a request is not made because its microservice
+    has failed repeatedly and is not available yet"""
+
+    def __init__(self, microservice, retry_after):
+        self._microservice = microservice
+        self._retry_after = retry_after
+
+    @property
+    def microservice(self):
+        return self._microservice
+
+    @property
+    def retry_after(self):
+        """Seconds until the client will check the microservice again"""
+        return self._retry_after
+
+    def __str__(self):
+        return (
+            f"microservice `{self._microservice}` has failed repeatedly, "
+            f"the client will check if it's available again in "
+            f"{self._retry_after:.1f} sec"
+        )
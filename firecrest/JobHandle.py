@@ -0,0 +1,287 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+
+from typing import Any, Dict, List, Optional, TYPE_CHECKING
+
+import firecrest.FirecrestException as fe
+import firecrest.types as t
+from firecrest.RateLimiter import Priority, request_priority
+
+if TYPE_CHECKING:
+    from firecrest.AsyncClient import AsyncFirecrest
+    from firecrest.BasicClient import Firecrest
+
+
+# IDs of tasks in one `/tasks` request, to keep the URL short
+_TASKS_PER_REQUEST = 100
+
+
+class _Handle:
+    def __init__(
+        self,
+        machine: str,
+        task_id: str,
+        responses: Optional[List[Any]] = None,
+    ) -> None:
+        #: The machine where the job was submitted
+        self.machine = machine
+        #: The ID of the FirecREST task of the submission
+        self.task_id = task_id
+        # The responses of the submission. The responses of the polls are
+        # only added to the error of a failed task, so they don't pile up
+        # while the task is pending.
+        self._responses = [] if responses is None else responses
+        self._result: Optional[t.JobSubmit] = None
+        self._exception: Optional[BaseException] = None
+
+    def done(self) -> bool:
+        """Whether the submission has finished, successfully or not"""
+        return self._result is not None or self._exception is not None
+
+    def _set_task(
+        self, client: Any, task: t.Task, responses: List[Any]
+    ) -> None:
+        try:
+            client._check_task(task, self._responses + responses)
+        except Exception as e:
+            self._exception = e
+            return
+
+        if task["status"] >= "200":
+            result = task["data"]
+            # Inject taskid in the result
+            result["firecrest_taskid"] = self.task_id
+            self._result = result
+
+    def _outcome(self) -> t.JobSubmit:
+        if self._exception is not None:
+            raise self._exception
+
+        assert self._result is not None
+        return self._result
+
+    def __repr__(self) -> str:
+        return (
+            f"{self.__class__.__name__}(machine={self.machine!r}, "
+            f"task_id={self.task_id!r})"
+        )
+
+
+class JobHandle(_Handle):
+    """
+    Handle of a job that was submitted with `Firecrest.submit_nowait`.
+    The submission is resolved the first time that its result is needed.
+    All the handles of a client that are still pending are then checked
+    together, with one `/tasks` request for up to 100 of them, so waiting
+    for many handles costs few requests.
+    """
+
+    def __init__(
+        self,
+        client: Firecrest,
+        machine: str,
+        task_id: str,
+        responses: Optional[List[Any]] = None,
+    ) -> None:
+        super().__init__(machine, task_id, responses)
+        self._client = client
+
+    def result(self) -> t.JobSubmit:
+        """Wait until the job has been submitted and return the same
+        result as `Firecrest.submit`, or raise its error. When the
+        request that checks the task fails, its error is raised and the
+        handle stays pending, so the next call checks it again."""
+        sleep_times = iter(self._client.polling_sleep_times)
+        while not self.done():
+            self._client._job_handles.update()
+            if self.done():
+                break
+
+            try:
+                time.sleep(next(sleep_times))
+            except StopIteration:
+                raise fe.PollingIterException(self.task_id)
+
+        return self._outcome()
+
+    def jobid(self) -> int:
+        """Wait until the job has been submitted and return its ID"""
+        return self.result()["jobid"]
+
+
+class AsyncJobHandle(_Handle):
+    """
+    Handle of a job that was submitted with `AsyncFirecrest.submit_nowait`.
+    Like `JobHandle`, all the pending handles of a client are checked
+    together when the result of one of them is needed.
+    """
+
+    def __init__(
+        self,
+        client: AsyncFirecrest,
+        machine: str,
+        task_id: str,
+        responses: Optional[List[Any]] = None,
+    ) -> None:
+        super().__init__(machine, task_id, responses)
+        self._client = client
+
+    async def result(self) -> t.JobSubmit:
+        """Wait until the job has been submitted and return the same
+        result as `AsyncFirecrest.submit`, or raise its error. Like in
+        `JobHandle.result`, the handle stays pending when the request that
+        checks the task fails."""
+        sleep_times = iter(self._client.polling_sleep_times)
+        while not self.done():
+            await self._client._job_handles.update()
+            if self.done():
+                break
+
+            try:
+                await asyncio.sleep(next(sleep_times))
+            except StopIteration:
+                raise fe.PollingIterException(self.task_id)
+
+        return self._outcome()
+
+    async def jobid(self) -> int:
+        """Wait until the job has been submitted and return its ID"""
+        return (await self.result())["jobid"]
+
+
+class _JobHandles:
+    """The pending job handles of a `Firecrest` client"""
+
+    def __init__(self, client: Firecrest) -> None:
+        self._client = client
+        self._pending: Dict[str, JobHandle] = {}
+        self._lock = threading.Lock()
+        self._update_lock = threading.Lock()
+
+    def add(self, handle: JobHandle) -> None:
+        with self._lock:
+            self._pending[handle.task_id] = handle
+
+    def discard(self, handle: JobHandle) -> None:
+        """Stop checking the task of a handle"""
+        with self._lock:
+            self._pending.pop(handle.task_id, None)
+
+    def update(self) -> None:
+        """Check the tasks of all the pending handles. The first error of
+        the requests is raised after all of them have been made, and the
+        handles that couldn't be checked stay pending."""
+        if not self._update_lock.acquire(blocking=False):
+            # Another thread is checking the tasks, including ours
+            with self._update_lock:
+                return
+
+        error: Optional[Exception] = None
+        try:
+            with self._lock:
+                pending = list(self._pending.values())
+
+            for i in range(0, len(pending), _TASKS_PER_REQUEST):
+                chunk = pending[i:i + _TASKS_PER_REQUEST]
+                responses: List[Any] = []
+                try:
+                    tasks = self._client._tasks(
+                        [h.task_id for h in chunk], responses
+                    )
+                except Exception as e:
+                    error = error or e
+                    continue
+
+                for h in chunk:
+                    if h.task_id in tasks:
+                        h._set_task(
+                            self._client, tasks[h.task_id], responses
+                        )
+
+                self._remove_done(chunk)
+        finally:
+            self._update_lock.release()
+
+        if error is not None:
+            raise error
+
+    def _remove_done(self, handles: List[JobHandle]) -> None:
+        with self._lock:
+            for h in handles:
+                if h.done():
+                    self._client.log(
+                        logging.INFO, f"Job submission task {h.task_id} is done"
+                    )
+                    self._pending.pop(h.task_id, None)
+
+
+class _AsyncJobHandles:
+    """The pending job handles of an `AsyncFirecrest` client"""
+
+    def __init__(self, client: AsyncFirecrest) -> None:
+        self._client = client
+        self._pending: Dict[str, AsyncJobHandle] = {}
+        # Created in the event loop of the first update
+        self._lock: Optional[asyncio.Lock] = None
+
+    def add(self, handle: AsyncJobHandle) -> None:
+        self._pending[handle.task_id] = handle
+
+    def discard(self, handle: AsyncJobHandle) -> None:
+        """Stop checking the task of a handle"""
+        self._pending.pop(handle.task_id, None)
+
+    async def update(self) -> None:
+        """Check the tasks of all the pending handles. Like
+        `_JobHandles.update`, the first error of the requests is raised
+        after all of them have been made."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        if self._lock.locked():
+            # Another coroutine is checking the tasks, including ours
+            async with self._lock:
+                return
+
+        async with self._lock:
+            pending = list(self._pending.values())
+            chunks = [
+                pending[i:i + _TASKS_PER_REQUEST]
+                for i in range(0, len(pending), _TASKS_PER_REQUEST)
+            ]
+            results = await asyncio.gather(
+                *(self._update(chunk) for chunk in chunks),
+                return_exceptions=True,
+            )
+            for h in pending:
+                if h.done():
+                    self._client.log(
+                        logging.INFO, f"Job submission task {h.task_id} is done"
+                    )
+                    self._pending.pop(h.task_id, None)
+
+        for res in results:
+            if isinstance(res, BaseException):
+                raise res
+
+    async def _update(self, chunk: List[AsyncJobHandle]) -> None:
+        responses: List[Any] = []
+        # Polled like the tasks of the blocking calls
+        with request_priority(Priority.LOW):
+            tasks = await self._client._tasks(
+                [h.task_id for h in chunk], responses
+            )
+
+        for h in chunk:
+            if h.task_id in tasks:
+                h._set_task(self._client, tasks[h.task_id], responses)
@@ -0,0 +1,344 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+from __future__ import annotations
+
+import logging
+import threading
+
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Tuple,
+    TYPE_CHECKING,
+)
+
+from firecrest.utilities import slurm_state_completed
+
+if TYPE_CHECKING:
+    from firecrest.BasicClient import Firecrest
+
+
+class JobStateChange(NamedTuple):
+    """A change of the state of a job that is followed by a job monitor"""
+
+    #: The machine of the job
+    machine: str
+    #: The ID of the job
+    jobid: str
+    #: The previous state, or `None` when the job is seen for the first time
+    old_state: Optional[str]
+    #: The new state
+    new_state: str
+    #: The last record of the job, from `squeue` or `sacct`
+    job: dict
+    #: Whether the job is in a final state and is no longer followed
+    finished: bool
+
+
+#: The state of the jobs that were not found by `squeue` or `sacct`
+UNKNOWN_STATE = "UNKNOWN"
+
+
+class _JobRegistry:
+    def __init__(self, max_jobs_per_request: int, max_misses: int) -> None:
+        self.max_jobs_per_request = max_jobs_per_request
+        self.max_misses = max_misses
+        # machine -> job ID -> last record of the job, `None` before the
+        # job is found in `squeue` or `sacct`
+        self._jobs: Dict[str, Dict[str, Optional[dict]]] = {}
+        self._finished: Dict[Tuple[str, str], dict] = {}
+        # Consecutive checks that didn't find the job
+        self._misses: Dict[Tuple[str, str], int] = {}
+        self._callbacks: List[Callable[[JobStateChange], Any]] = []
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback: Callable[[JobStateChange], Any]) -> None:
+        """Call `callback` with a `JobStateChange` for every change of the
+        state of a job."""
+        self._callbacks.append(callback)
+
+    def add(self, machine: str, jobs: str | int | Iterable[str | int]) -> None:
+        """Start following one or more jobs of a machine.
+
+        :param machine: the machine name where the scheduler belongs to
+        :param jobs: the ID of the job, or a list of IDs
+        """
+        if isinstance(jobs, (str, int)):
+            jobs = [jobs]
+
+        with self._lock:
+            machine_jobs = self._jobs.setdefault(machine, {})
+            for j in jobs:
+                jobid = str(j)
+                self._finished.pop((machine, jobid), None)
+                self._misses.pop((machine, jobid), None)
+                machine_jobs.setdefault(jobid, None)
+                self._job_added(machine, jobid)
+
+    def remove(self, machine: str, jobid: str | int) -> None:
+        """Stop following a job. Its waiters are woken up and get `None`.
+        """
+        jobid = str(jobid)
+        with self._lock:
+            self._misses.pop((machine, jobid), None)
+            if jobid not in self._jobs.get(machine, {}):
+                return
+
+            del self._jobs[machine][jobid]
+
+        self._job_finished(machine, jobid)
+
+    def jobs(self, machine: str) -> Dict[str, Optional[dict]]:
+        """The jobs of a machine that are followed, with their last record,
+        or `None` when they have not been found yet."""
+        with self._lock:
+            return dict(self._jobs.get(machine, {}))
+
+    def finished(self, machine: str, jobid: str | int) -> Optional[dict]:
+        """The last record of a job that has finished, or `None`"""
+        with self._lock:
+            return self._finished.get((machine, str(jobid)))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(jobs) for jobs in self._jobs.values())
+
+    def _job_added(self, machine: str, jobid: str) -> None:
+        pass
+
+    def _job_finished(self, machine: str, jobid: str) -> None:
+        pass
+
+    def _snapshot(self) -> Dict[str, List[str]]:
+        with self._lock:
+            return {
+                machine: list(jobs)
+                for machine, jobs in self._jobs.items() if jobs
+            }
+
+    def _squeue_jobs(self, jobids: Sequence[str]) -> Optional[List[str]]:
+        # Above the limit we ask for all the jobs of the user, instead of a
+        # very long list of IDs
+        if len(jobids) > self.max_jobs_per_request:
+            return None
+
+        return list(jobids)
+
+    def _chunks(self, jobids: Sequence[str]) -> List[List[str]]:
+        n = self.max_jobs_per_request
+        return [list(jobids[i:i + n]) for i in range(0, len(jobids), n)]
+
+    def _apply(
+        self, machine: str, jobids: Sequence[str], records: Dict[str, dict]
+    ) -> List[JobStateChange]:
+        changes = []
+        with self._lock:
+            machine_jobs = self._jobs.get(machine, {})
+            for jobid in jobids:
+                if jobid not in machine_jobs:
+                    # Removed while we were polling
+                    continue
+
+                key = (machine, jobid)
+                if jobid in records:
+                    job = records[jobid]
+                    self._misses.pop(key, None)
+                else:
+                    # A job that was just submitted may not be visible yet,
+                    # so we give up only after `max_misses` checks
+                    self._misses[key] = self._misses.get(key, 0) + 1
+                    if self._misses[key] < self.max_misses:
+                        continue
+
+                    del self._misses[key]
+                    job = {"jobid": jobid, "state": UNKNOWN_STATE}
+
+                previous = machine_jobs[jobid]
+                old_state = previous["state"] if previous else None
+                finished = (
+                    job["state"] == UNKNOWN_STATE
+                    or slurm_state_completed(job["state"])
+                )
+                if finished:
+                    del machine_jobs[jobid]
+                    self._finished[(machine, jobid)] = job
+                else:
+                    machine_jobs[jobid] = job
+
+                if job["state"] != old_state or finished:
+                    changes.append(
+                        JobStateChange(
+                            machine, jobid, old_state, job["state"], job,
+                            finished
+                        )
+                    )
+
+        return changes
+
+    def _finish_jobs(self, changes: List[JobStateChange]) -> None:
+        # Called after the callbacks, so that the waiters see their effects
+        for change in changes:
+            if change.finished:
+                self._job_finished(change.machine, change.jobid)
+
+
+class JobMonitor(_JobRegistry):
+    """
+    Follows the state of many SLURM jobs with few requests. Every
+    `interval` seconds, a background thread makes one `poll_active`
+    (`squeue`) call per machine for all the jobs that are followed, and one
+    `poll` (`sacct`) call for the jobs that have left the queue. The results
+    are compared with the previous ones and the callbacks are called for
+    every change of state. Jobs in a final state (see
+    `slurm_state_completed`) are no longer followed. Jobs that are found by
+    neither `squeue` nor `sacct` in `max_misses` consecutive checks, for
+    example because of a wrong ID, finish with the state `UNKNOWN`.
+
+    .. code-block:: Python
+
+        def report(change):
+            print(f"{change.jobid}: {change.old_state} -> {change.new_state}")
+
+        with JobMonitor(client, interval=30, callback=report) as monitor:
+            for script in scripts:
+                job = client.submit("cluster", script)
+                monitor.add("cluster", job["jobid"])
+
+            monitor.wait_all()
+
+    :param client: the client that makes the requests
+    :param interval: seconds between two checks of the jobs
+    :param callback: function that is called with a `JobStateChange` for every change of state
+    :param max_jobs_per_request: the maximum number of job IDs in one request. When more jobs of a machine are followed, `squeue` is called for all the jobs of the user and `sacct` in chunks.
+    :param max_misses: the number of consecutive checks that don't find a job before it is no longer followed
+    """
+
+    def __init__(
+        self,
+        client: Firecrest,
+        interval: float = 10,
+        callback: Optional[Callable[[JobStateChange], Any]] = None,
+        max_jobs_per_request: int = 500,
+        max_misses: int = 3,
+    ) -> None:
+        super().__init__(max_jobs_per_request, max_misses)
+        self._client = client
+        self.interval = interval
+        if callback is not None:
+            self.add_callback(callback)
+
+        self._events: Dict[Tuple[str, str], threading.Event] = {}
+        self._all_done = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _job_added(self, machine: str, jobid: str) -> None:
+        self._events.setdefault((machine, jobid), threading.Event()).clear()
+
+    def _job_finished(self, machine: str, jobid: str) -> None:
+        with self._lock:
+            event = self._events.pop((machine, jobid), None)
+            self._all_done.notify_all()
+
+        if event is not None:
+            event.set()
+
+    def check(self) -> List[JobStateChange]:
+        """Check all the jobs once, call the callbacks and return the
+        changes."""
+        changes = []
+        for machine, jobids in self._snapshot().items():
+            records: Dict[str, Any] = {}
+            active = self._client.poll_active(
+                machine, self._squeue_jobs(jobids)
+            )
+            for job in active:
+                records[str(job["jobid"])] = job
+
+            gone = [j for j in jobids if j not in records]
+            # Membership is checked for every job of `sacct`
+            gone_ids = set(gone)
+            for chunk in self._chunks(gone):
+                for record in self._client.poll(machine, chunk):
+                    if str(record["jobid"]) in gone_ids:
+                        records[str(record["jobid"])] = record
+
+            changes += self._apply(machine, jobids, records)
+
+        for change in changes:
+            for callback in self._callbacks:
+                callback(change)
+
+        self._finish_jobs(changes)
+        return changes
+
+    def wait(
+        self, machine: str, jobid: str | int, timeout: Optional[float] = None
+    ) -> Optional[dict]:
+        """Wait until a job has finished and return its last record, or
+        `None` after `timeout` seconds or when the job is removed."""
+        jobid = str(jobid)
+        with self._lock:
+            if (machine, jobid) in self._finished:
+                return self._finished[(machine, jobid)]
+
+            event = self._events.get((machine, jobid))
+
+        if event is None or not event.wait(timeout):
+            return None
+
+        return self.finished(machine, jobid)
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all the jobs have finished. Return `False` if there
+        are jobs left after `timeout` seconds."""
+        with self._lock:
+            return self._all_done.wait_for(
+                lambda: not any(self._jobs.values()), timeout
+            )
+
+    def start(self) -> None:
+        """Start checking the jobs from a background thread"""
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="firecrest-job-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.check()
+            except Exception as e:
+                self._client.log(
+                    logging.WARNING, f"Could not check the jobs: {e}"
+                )
+
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> JobMonitor:
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
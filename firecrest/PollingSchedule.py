@@ -0,0 +1,149 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+from __future__ import annotations
+
+import collections
+import math
+import threading
+
+from typing import Deque, Dict, Iterator, Optional, Sequence
+
+
+class AdaptivePollingSchedule:
+    """
+    Schedule of the polls of FirecREST tasks that is learned from the time
+    that the previous tasks of the same kind took to finish. The kind of a
+    task is the endpoint that created it, for example `GET /compute/acct`
+    (see `task_kind`).
+
+    The first poll is made right away. When there are at least
+    `min_samples` completion times of the kind, the next polls are made at
+    the `quantiles` of these times, so a task that usually takes 8 seconds
+    is polled at about 8 seconds instead of every 0.25 seconds. After the
+    last quantile, or without enough history, the wait grows with the time
+    that has passed (`backoff_factor - 1` times the elapsed time, between
+    `min_sleep` and `max_sleep`), so the extra latency stays a fraction of
+    the duration of the task.
+
+    :param quantiles: the quantiles of the completion times at which the task is polled
+    :param min_samples: the number of completion times of a kind that are needed to use the quantiles
+    :param history: the number of recent completion times of each kind that are kept
+    :param min_sleep: the shortest wait between two polls, in seconds
+    :param max_sleep: the longest wait between two polls, in seconds
+    :param backoff_factor: the growth of the elapsed time between two polls after the quantiles
+    :param max_elapsed: stop polling (and raise `PollingIterException`) after this many seconds, like the default `polling_sleep_times` of the clients. When it is `None` the task is polled until it finishes.
+    """
+
+    def __init__(
+        self,
+        quantiles: Sequence[float] = (0.5, 0.75, 0.9, 0.99),
+        min_samples: int = 5,
+        history: int = 100,
+        min_sleep: float = 0.1,
+        max_sleep: float = 10,
+        backoff_factor: float = 1.5,
+        max_elapsed: Optional[float] = 60,
+    ) -> None:
+        self.quantiles = sorted(quantiles)
+        self.min_samples = min_samples
+        self.history = history
+        self.min_sleep = min_sleep
+        self.max_sleep = max_sleep
+        self.backoff_factor = backoff_factor
+        self.max_elapsed = max_elapsed
+        self._durations: Dict[str, Deque[float]] = {}
+        # The sync client polls from many threads
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, duration: float) -> None:
+        """Record the time in seconds that a task of `kind` took to
+        finish."""
+        with self._lock:
+            self._durations.setdefault(
+                kind, collections.deque(maxlen=self.history)
+            ).append(duration)
+
+    def durations(self, kind: str) -> list:
+        """The recorded completion times of a kind"""
+        with self._lock:
+            return list(self._durations.get(kind, ()))
+
+    def quantile(self, kind: str, q: float) -> Optional[float]:
+        """A quantile of the completion times of a kind, or `None` when
+        there are fewer than `min_samples`."""
+        durations = sorted(self.durations(kind))
+        if len(durations) < self.min_samples:
+            return None
+
+        return _quantile(durations, q)
+
+    def sleep_times(self, kind: Optional[str]) -> PollingSleeps:
+        """The waits between the polls of a new task of `kind`"""
+        return PollingSleeps(self._sleep_times(kind))
+
+    def _sleep_times(self, kind: Optional[str]) -> Iterator[float]:
+        durations = sorted(self.durations(kind)) if kind else []
+        elapsed = 0.0
+        if len(durations) >= self.min_samples:
+            for q in self.quantiles:
+                target = _quantile(durations, q)
+                if target - elapsed < self.min_sleep:
+                    continue
+
+                sleep = min(self.max_sleep, target - elapsed)
+                if not self._within_time(elapsed + sleep):
+                    return
+
+                yield sleep
+                elapsed += sleep
+
+        while True:
+            sleep = min(
+                self.max_sleep,
+                max(self.min_sleep, elapsed * (self.backoff_factor - 1))
+            )
+            if not self._within_time(elapsed + sleep):
+                return
+
+            yield sleep
+            elapsed += sleep
+
+    def _within_time(self, elapsed: float) -> bool:
+        return self.max_elapsed is None or elapsed <= self.max_elapsed
+
+
+class PollingSleeps:
+    """Iterator over the waits between the polls of a task, that remembers
+    the last one."""
+
+    def __init__(self, sleeps: Iterator[float]) -> None:
+        self._sleeps = sleeps
+        #: The last wait, or 0 before the first one
+        self.last_sleep: float = 0.0
+
+    def __iter__(self) -> PollingSleeps:
+        return self
+
+    def __next__(self) -> float:
+        self.last_sleep = next(self._sleeps)
+        return self.last_sleep
+
+    def completion_time(self, elapsed: float) -> float:
+        """Estimate of the time that a task took to finish, when it was
+        found finished `elapsed` seconds after it was created. The task
+        finished during the last wait, so the middle of it is used. Using
+        `elapsed` would count the delay of the poll as part of the task
+        and the schedule would drift towards later polls."""
+        return max(0.0, elapsed - self.last_sleep / 2)
+
+
+def _quantile(values: Sequence[float], q: float) -> float:
+    # Linear interpolation between the closest ranks of sorted values
+    pos = q * (len(values) - 1)
+    low = math.floor(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
@@ -0,0 +1,683 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+from __future__ import annotations
+
+import asyncio
+import collections
+import contextlib
+import contextvars
+import enum
+import math
+import os
+import pathlib
+import struct
+import threading
+import time
+
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Union
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # type: ignore
+
+
+class TokenBucket:
+    """State of a token bucket. It is filled with `rate` tokens per second
+    up to `capacity` tokens and every request takes one token.
+    """
+
+    __slots__ = ("tokens", "last", "paused_until")
+
+    def __init__(self, capacity: float, now: float) -> None:
+        self.tokens = capacity
+        self.last = now
+        self.paused_until = 0.0
+
+    def try_acquire(self, rate: float, capacity: float, now: float) -> float:
+        """Take a token and return 0, or return the seconds until a token
+        will be available.
+        """
+        if now < self.paused_until:
+            return self.paused_until - now
+
+        if math.isinf(rate):
+            self.tokens = capacity
+        else:
+            elapsed = max(now - max(self.last, self.paused_until), 0)
+            self.tokens = min(capacity, self.tokens + elapsed * rate)
+
+        self.last = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+
+        return (1 - self.tokens) / rate
+
+    def pause(self, until: float) -> None:
+        """Give no tokens before `until` and a single one at `until`, for
+        example after the server has rejected a request with status 429.
+        """
+        if until > self.paused_until:
+            self.paused_until = until
+            self.tokens = 1
+
+
+class LocalBuckets:
+    """Token buckets of the current process, one per key.
+
+    :param clock: the function that gives the current time in seconds
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    def _bucket(self, key: str, capacity: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(capacity, self._clock())
+            self._buckets[key] = bucket
+
+        return bucket
+
+    def try_acquire(self, key: str, rate: float, capacity: float) -> float:
+        """Take a token of `key` and return 0, or return the seconds until
+        a token will be available.
+
+        :param key: the name of the bucket, for example the microservice
+        :param rate: tokens per second
+        :param capacity: maximum number of tokens in the bucket, which is the largest burst of requests
+        """
+        with self._lock:
+            return self._bucket(key, capacity).try_acquire(
+                rate, capacity, self._clock()
+            )
+
+    def pause(self, key: str, until: float) -> None:
+        """Don't give tokens of `key` before the timestamp `until`."""
+        with self._lock:
+            self._bucket(key, 1).pause(until)
+
+
+class FileBuckets:
+    """Token buckets that are shared by all the processes of a host, one per
+    key. The state of each bucket is kept in a file under `directory` that
+    is locked with `fcntl.flock` while a token is taken, so the clients of
+    all the processes that use the same directory share the same rate
+    limits. Use a different directory for each FirecREST deployment and
+    account.
+
+    It is available only on POSIX systems.
+
+    :param directory: the directory of the state files, it is created if it doesn't exist
+    """
+
+    _STATE = struct.Struct("ddd")
+
+    def __init__(self, directory: str | os.PathLike) -> None:
+        if fcntl is None:
+            raise RuntimeError("FileBuckets requires the fcntl module")
+
+        self._directory = pathlib.Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+
+    def _update(self, key: str, func: Callable[[TokenBucket, float], Any]):
+        # A new file descriptor is opened every time, because flock locks
+        # are shared by the processes that inherit a descriptor
+        fd = os.open(self._directory / f"{key}.bucket", os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            data = os.pread(fd, self._STATE.size, 0)
+            now = time.time()
+            bucket = TokenBucket(math.inf, now)
+            if len(data) == self._STATE.size:
+                (
+                    bucket.tokens, bucket.last, bucket.paused_until
+                ) = self._STATE.unpack(data)
+
+            ret = func(bucket, now)
+            os.pwrite(
+                fd,
+                self._STATE.pack(
+                    bucket.tokens, bucket.last, bucket.paused_until
+                ),
+                0
+            )
+            return ret
+        finally:
+            # Closing the descriptor releases the lock
+            os.close(fd)
+
+    def try_acquire(self, key: str, rate: float, capacity: float) -> float:
+        """Take a token of `key` and return 0, or return the seconds until
+        a token will be available.
+
+        :param key: the name of the bucket, for example the microservice
+        :param rate: tokens per second
+        :param capacity: maximum number of tokens in the bucket, which is the largest burst of requests
+        """
+        return self._update(
+            key,
+            lambda bucket, now: bucket.try_acquire(rate, capacity, now)
+        )
+
+    def pause(self, key: str, until: float) -> None:
+        """Don't give tokens of `key` before the timestamp `until`."""
+        self._update(key, lambda bucket, now: bucket.pause(until))
+
+
+#: The objects that can keep the token buckets of a rate limiter
+Buckets = Union[LocalBuckets, FileBuckets]
+
+
+class Priority(enum.IntEnum):
+    """Priority of the requests that wait for a rate limit. Requests with a
+    higher priority are sent before the waiting requests with a lower one.
+    """
+
+    HIGH = 0
+    NORMAL = 1
+    LOW = 2
+
+
+_request_priority: contextvars.ContextVar[Priority] = contextvars.ContextVar(
+    "firecrest_request_priority", default=Priority.NORMAL
+)
+
+
+@contextlib.contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """Set the priority of the requests that are made in the block, or by
+    the tasks that are created in it.
+
+    .. code-block:: Python
+
+        with firecrest.request_priority(firecrest.Priority.HIGH):
+            await client.submit(machine, script)
+    """
+    token = _request_priority.set(priority)
+    try:
+        yield
+    finally:
+        _request_priority.reset(token)
+
+
+def current_priority() -> Priority:
+    """The priority of the requests in the current context"""
+    return _request_priority.get()
+
+
+class _Waiter:
+    __slots__ = ("fut",)
+
+    def __init__(self) -> None:
+        self.fut: Optional[asyncio.Future] = None
+
+
+class AsyncRateLimiter:
+    """Rate limiter for coroutines, with one token bucket per key. The
+    coroutines that wait for the same key get their tokens in order of
+    priority and, within each priority, in the order they arrived. Only the
+    first one in the queue waits for the bucket and the next one is woken
+    when it's done, so waiting coroutines don't race for the tokens.
+    """
+
+    def __init__(self, buckets: Optional[Buckets] = None) -> None:
+        self._buckets = LocalBuckets() if buckets is None else buckets
+        self._waiters: Dict[str, Dict[Priority, Deque[_Waiter]]] = {}
+
+    def queue_depth(self, key: str, priority: Optional[Priority] = None) -> int:
+        """Number of coroutines waiting for a token of `key`, in total or
+        with the given priority"""
+        lanes = self._waiters.get(key, {})
+        if priority is not None:
+            return len(lanes.get(priority, ()))
+
+        return sum(len(lane) for lane in lanes.values())
+
+    def queue_depths(self) -> Dict[str, Dict[str, int]]:
+        """Number of waiting coroutines for each key and priority"""
+        return {
+            key: {p.name: len(lanes.get(p, ())) for p in Priority}
+            for key, lanes in self._waiters.items()
+        }
+
+    def pause(self, key: str, until: float) -> None:
+        """Don't give tokens of `key` before the timestamp `until`."""
+        self._buckets.pause(key, until)
+
+    def _head(self, key: str) -> Optional[_Waiter]:
+        lanes = self._waiters.get(key, {})
+        for priority in sorted(lanes):
+            if lanes[priority]:
+                return lanes[priority][0]
+
+        return None
+
+    async def acquire(
+        self,
+        key: str,
+        rate: float = math.inf,
+        capacity: float = 1,
+        priority: Optional[Priority] = None,
+    ) -> float:
+        """Wait for a token of `key` and return the seconds that were spent
+        waiting.
+
+        :param key: the name of the bucket, for example the microservice
+        :param rate: tokens per second, `math.inf` for no limit
+        :param capacity: maximum number of tokens in the bucket, which is the largest burst of requests
+        :param priority: the priority of the request. By default it is the priority of the current context, see `request_priority`.
+        """
+        if priority is None:
+            priority = current_priority()
+
+        if self._head(key) is None:
+            wait = self._buckets.try_acquire(key, rate, capacity)
+            if wait == 0:
+                return 0
+
+        start = time.time()
+        waiter = _Waiter()
+        lane = self._waiters.setdefault(key, {}).setdefault(
+            priority, collections.deque()
+        )
+        lane.append(waiter)
+        try:
+            while True:
+                if self._head(key) is not waiter:
+                    # Wait until the previous requests, or the requests with
+                    # higher priority that arrived while sleeping, are done
+                    waiter.fut = asyncio.get_running_loop().create_future()
+                    await waiter.fut
+                    waiter.fut = None
+                    continue
+
+                wait = self._buckets.try_acquire(key, rate, capacity)
+                if wait == 0:
+                    break
+
+                await asyncio.sleep(wait)
+        finally:
+            is_head = self._head(key) is waiter
+            lane.remove(waiter)
+            if is_head:
+                head = self._head(key)
+                if (
+                    head is not None and head.fut is not None and
+                    not head.fut.done()
+                ):
+                    head.fut.set_result(None)
+
+        return time.time() - start
+
+
+class RateLimiter:
+    """Rate limiter for threads, with one token bucket per key. Like
+    `AsyncRateLimiter`, the threads that wait for the same key get their
+    tokens in the order they arrived.
+    """
+
+    def __init__(self, buckets: Optional[Buckets] = None) -> None:
+        self._buckets = LocalBuckets() if buckets is None else buckets
+        self._waiters: Dict[str, Deque[object]] = {}
+        self._cond = threading.Condition()
+
+    def queue_depth(self, key: str) -> int:
+        """Number of threads waiting for a token of `key`"""
+        with self._cond:
+            return len(self._waiters.get(key, ()))
+
+    def pause(self, key: str, until: float) -> None:
+        """Don't give tokens of `key` before the timestamp `until`."""
+        self._buckets.pause(key, until)
+
+    def acquire(
+        self, key: str, rate: float = math.inf, capacity: float = 1
+    ) -> float:
+        """Wait for a token of `key` and return the seconds that were spent
+        waiting.
+
+        :param key: the name of the bucket, for example the microservice
+        :param rate: tokens per second, `math.inf` for no limit
+        :param capacity: maximum number of tokens in the bucket, which is the largest burst of requests
+        """
+        ticket = object()
+        with self._cond:
+            waiters = self._waiters.setdefault(key, collections.deque())
+            if not waiters:
+                wait = self._buckets.try_acquire(key, rate, capacity)
+                if wait == 0:
+                    return 0
+
+            waiters.append(ticket)
+
+        start = time.time()
+        try:
+            with self._cond:
+                while waiters[0] is not ticket:
+                    self._cond.wait()
+
+            while True:
+                wait = self._buckets.try_acquire(key, rate, capacity)
+                if wait == 0:
+                    break
+
+                time.sleep(wait)
+        finally:
+            with self._cond:
+                waiters.remove(ticket)
+                self._cond.notify_all()
+
+        return time.time() - start
+
+
+class _ConcurrencyState:
+    __slots__ = ("limit", "in_flight", "latency", "min_latency", "waiters")
+
+    def __init__(self, limit: float) -> None:
+        self.limit = limit
+        self.in_flight = 0
+        self.latency: Optional[float] = None
+        self.min_latency: Optional[float] = None
+        self.waiters: Deque[asyncio.Future] = collections.deque()
+
+
+class AdaptiveConcurrency:
+    """
+    Limit of the concurrent requests to each key, for example to each
+    machine, for coroutines. The requests over the limit wait in the order
+    they arrived.
+
+    When `adaptive` is set, the limit follows the latency of the requests
+    (gradient algorithm): it grows by about its square root while the
+    smoothed latency stays within `tolerance` times the lowest latency that
+    was observed, and it shrinks in proportion when the latency grows over
+    that, or by `decrease_factor` when a request fails. The lowest latency
+    slowly drifts up, so that it follows permanent changes of the system.
+    Otherwise the limits are fixed and the object works like a semaphore
+    per key.
+
+    :param initial_limit: the limit of a key before any request has finished
+    :param min_limit: the lowest limit
+    :param max_limit: the highest limit
+    :param limits: fixed maximum limits of some keys, which replace `max_limit` for them
+    :param adaptive: adapt the limits to the latency
+    :param tolerance: the ratio to the lowest latency that is not considered an overload
+    :param smoothing: weight of each change of the limit, between 0 and 1
+    :param decrease_factor: multiplicative decrease of the limit after a failed request
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        min_limit: int = 1,
+        max_limit: int = 200,
+        limits: Optional[Dict[str, int]] = None,
+        adaptive: bool = True,
+        tolerance: float = 2,
+        smoothing: float = 0.2,
+        decrease_factor: float = 0.9,
+    ) -> None:
+        self.initial_limit = initial_limit
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limits: Dict[str, int] = {} if limits is None else dict(limits)
+        self.adaptive = adaptive
+        self.tolerance = tolerance
+        self.smoothing = smoothing
+        self.decrease_factor = decrease_factor
+        self._states: Dict[str, _ConcurrencyState] = {}
+
+    def _max_limit(self, key: str) -> int:
+        return self.limits.get(key, self.max_limit)
+
+    def _state(self, key: str) -> _ConcurrencyState:
+        state = self._states.get(key)
+        if state is None:
+            limit = self._max_limit(key)
+            if self.adaptive:
+                limit = min(limit, self.initial_limit)
+
+            state = _ConcurrencyState(limit)
+            self._states[key] = state
+
+        return state
+
+    def limit(self, key: str) -> int:
+        """The current number of concurrent requests that are allowed"""
+        state = self._state(key)
+        return max(1, int(min(state.limit, self._max_limit(key))))
+
+    def in_flight(self, key: str) -> int:
+        """The number of requests that hold a slot of `key`"""
+        return self._state(key).in_flight
+
+    def queue_depth(self, key: str) -> int:
+        """The number of requests that are waiting for a slot of `key`"""
+        return len(self._state(key).waiters)
+
+    def latency(self, key: str) -> Optional[float]:
+        """The smoothed latency of the requests of `key`, in seconds"""
+        return self._state(key).latency
+
+    def _wake(self, key: str) -> None:
+        state = self._state(key)
+        limit = self.limit(key)
+        while state.waiters and state.in_flight < limit:
+            fut = state.waiters.popleft()
+            if not fut.done():
+                state.in_flight += 1
+                fut.set_result(None)
+
+    async def acquire(self, key: str) -> float:
+        """Wait for a slot of `key` and return the seconds that were spent
+        waiting. Every slot has to be given back with `release`.
+        """
+        state = self._state(key)
+        if not state.waiters and state.in_flight < self.limit(key):
+            state.in_flight += 1
+            return 0
+
+        start = time.time()
+        fut = asyncio.get_running_loop().create_future()
+        state.waiters.append(fut)
+        try:
+            await fut
+        except BaseException:
+            if fut.done() and not fut.cancelled():
+                # The slot was given to us before the cancellation
+                self.release(key)
+            elif fut in state.waiters:
+                state.waiters.remove(fut)
+
+            raise
+
+        return time.time() - start
+
+    def release(
+        self, key: str, latency: Optional[float] = None, failed: bool = False
+    ) -> None:
+        """Give back a slot of `key` and update the limit.
+
+        :param key: the key of the slot
+        :param latency: the time the request took, in seconds, or `None` when it was not sent
+        :param failed: whether the request failed, with an error or a status that shows that the system is overloaded
+        """
+        state = self._state(key)
+        state.in_flight -= 1
+        if self.adaptive and (failed or latency is not None):
+            self._update(key, state, latency, failed)
+
+        self._wake(key)
+
+    def _update(
+        self,
+        key: str,
+        state: _ConcurrencyState,
+        latency: Optional[float],
+        failed: bool,
+    ) -> None:
+        if failed:
+            new_limit = state.limit * self.decrease_factor
+        else:
+            assert latency is not None
+            if state.latency is None or state.min_latency is None:
+                state.latency = latency
+                state.min_latency = latency
+            else:
+                state.latency = (
+                    (1 - self.smoothing) * state.latency +
+                    self.smoothing * latency
+                )
+                state.min_latency = min(latency, state.min_latency * 1.01)
+
+            gradient = 1.0
+            if state.latency > 0:
+                gradient = max(
+                    0.5,
+                    min(
+                        1.0,
+                        self.tolerance * state.min_latency / state.latency
+                    )
+                )
+
+            if gradient == 1 and state.in_flight + 1 < state.limit / 2:
+                # The limit is not what stops the requests, so the latency
+                # doesn't tell if a higher limit would overload the system
+                return
+
+            new_limit = state.limit * gradient + math.sqrt(state.limit)
+            new_limit = (
+                (1 - self.smoothing) * state.limit +
+                self.smoothing * new_limit
+            )
+
+        state.limit = max(
+            self.min_limit, min(self._max_limit(key), new_limit)
+        )
+
+
+def _header_number(value: Optional[str]) -> Optional[float]:
+    # The values can have extra parameters, for example `10, 10;w=60`
+    if value is None:
+        return None
+
+    try:
+        return float(value.split(",")[0].split(";")[0])
+    except ValueError:
+        return None
+
+
+class AdaptiveThrottle:
+    """
+    Additive increase, multiplicative decrease (AIMD) controller of the
+    request rate of each microservice, driven by the `RateLimit-Limit`,
+    `RateLimit-Remaining` and `RateLimit-Reset` headers of the responses.
+
+    There is no limit while less than `1 - low_watermark` of the quota is
+    used. When the remaining requests drop below `low_watermark` of the
+    limit, or a request is rejected with status 429, the rate is limited to
+    the rate that would use the remaining requests until the reset of the
+    quota, or to `decrease_factor` times the current request rate, and it
+    is multiplied by `decrease_factor` at most once every
+    `decrease_interval` seconds while the pressure lasts. Otherwise the rate
+    grows by `increase_step` requests per second every second, and the limit
+    is removed when it reaches `max_rate`.
+
+    :param low_watermark: fraction of the limit under which the remaining requests trigger a decrease
+    :param decrease_factor: multiplicative decrease of the rate
+    :param increase_step: additive increase of the rate, in requests per second every second
+    :param decrease_interval: minimum seconds between two decreases
+    :param min_rate: the lowest rate, in requests per second
+    :param max_rate: the rate, in requests per second, above which the limit is removed
+    """
+
+    def __init__(
+        self,
+        low_watermark: float = 0.2,
+        decrease_factor: float = 0.5,
+        increase_step: float = 1,
+        decrease_interval: float = 1,
+        min_rate: float = 0.1,
+        max_rate: float = 100,
+    ) -> None:
+        self.low_watermark = low_watermark
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self.decrease_interval = decrease_interval
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self._rates: Dict[str, float] = {}
+        self._last_decrease: Dict[str, float] = {}
+        self._last_update: Dict[str, float] = {}
+        # Exponential moving average of the time between responses
+        self._intervals: Dict[str, float] = {}
+        self._last_response: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def rate(self, microservice: str) -> float:
+        """The current limit of requests per second of a microservice, or
+        `math.inf` when it is not limited.
+        """
+        return self._rates.get(microservice, math.inf)
+
+    def _observed_rate(self, microservice: str) -> float:
+        interval = self._intervals.get(microservice)
+        if not interval:
+            return self.max_rate
+
+        return 1 / interval
+
+    def observe(self, microservice: str, response: Any) -> None:
+        """Update the rate of a microservice from a response."""
+        now = time.time()
+        headers = response.headers
+        limit = _header_number(headers.get("RateLimit-Limit"))
+        remaining = _header_number(headers.get("RateLimit-Remaining"))
+        reset = _header_number(headers.get("RateLimit-Reset"))
+        with self._lock:
+            last_response = self._last_response.get(microservice)
+            self._last_response[microservice] = now
+            if last_response is not None:
+                interval = now - last_response
+                previous = self._intervals.get(microservice, interval)
+                self._intervals[microservice] = 0.8 * previous + 0.2 * interval
+
+            pressure = response.status_code == 429 or (
+                limit is not None and remaining is not None and
+                remaining <= self.low_watermark * limit
+            )
+            rate = self._rates.get(microservice)
+            if pressure:
+                last_decrease = self._last_decrease.get(microservice, 0)
+                if rate is None:
+                    if reset and remaining is not None:
+                        rate = remaining / reset
+                    else:
+                        rate = (
+                            self.decrease_factor *
+                            self._observed_rate(microservice)
+                        )
+                elif now - last_decrease >= self.decrease_interval:
+                    rate *= self.decrease_factor
+                else:
+                    return
+
+                self._rates[microservice] = max(rate, self.min_rate)
+                self._last_decrease[microservice] = now
+                self._last_update[microservice] = now
+            elif rate is not None:
+                elapsed = now - self._last_update.get(microservice, now)
+                rate += self.increase_step * elapsed
+                self._last_update[microservice] = now
+                if rate >= self.max_rate:
+                    del self._rates[microservice]
+                else:
+                    self._rates[microservice] = rate
@@ -0,0 +1,167 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+from __future__ import annotations
+
+import httpx
+import random
+import requests
+
+from typing import Any, Collection, Optional
+
+
+# Errors raised before the request reached the server, so it is safe to
+# retry any method
+_NOT_SENT_ERRORS = (
+    requests.exceptions.ConnectTimeout,
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+)
+
+# Errors after which we don't know if the server has processed the request
+_MAYBE_SENT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    httpx.ReadError,
+    httpx.ReadTimeout,
+    httpx.RemoteProtocolError,
+    httpx.WriteError,
+    httpx.WriteTimeout,
+)
+
+
+class RetryPolicy:
+    """
+    Policy for retrying the requests that fail with a transient error: a
+    connection error, a timeout or one of the `retry_status_codes`. The
+    clients wait `backoff_factor * 2 ** retry` seconds, capped at
+    `max_backoff`, before each retry. With `jitter` the wait is drawn
+    uniformly between 0 and that value ("full jitter"), so that clients
+    that failed at the same time don't retry at the same time.
+
+    Requests that are not idempotent (by default POST) are retried only
+    when they have certainly not been processed by the server: after an
+    error while connecting.
+
+    Requests that hit the rate limit (status 429) are retried by the clients
+    after the time in the `Retry-After` header, for up to
+    `num_retries_rate_limit` times, and are not counted in `max_retries`.
+
+    :param max_retries: the maximum number of retries of a request after a transient error
+    :param backoff_factor: the base of the exponential backoff in seconds
+    :param max_backoff: the maximum wait between two retries in seconds
+    :param max_elapsed_time: stop retrying when the next retry would start more than `max_elapsed_time` seconds after the first attempt. When it is `None` only `max_retries` is used.
+    :param jitter: randomize the waits between retries
+    :param retry_status_codes: the status codes that are treated as transient errors
+    :param idempotent_methods: the HTTP methods that can be retried after any transient error
+    :param retry_connection_errors: retry after connection errors
+    :param retry_timeouts: retry after timeouts
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff_factor: float = 0.5,
+        max_backoff: float = 30,
+        max_elapsed_time: Optional[float] = None,
+        jitter: bool = True,
+        retry_status_codes: Collection[int] = (502, 503, 504),
+        idempotent_methods: Collection[str] = (
+            "DELETE", "GET", "HEAD", "OPTIONS", "PUT"
+        ),
+        retry_connection_errors: bool = True,
+        retry_timeouts: bool = True,
+    ) -> None:
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_elapsed_time = max_elapsed_time
+        self.jitter = jitter
+        self.retry_status_codes = frozenset(retry_status_codes)
+        self.idempotent_methods = frozenset(
+            m.upper() for m in idempotent_methods
+        )
+        self.retry_connection_errors = retry_connection_errors
+        self.retry_timeouts = retry_timeouts
+
+    @classmethod
+    def never(cls) -> RetryPolicy:
+        """A policy that doesn't retry after transient errors. Requests
+        that hit the rate limit are still retried.
+        """
+        return cls(max_retries=0)
+
+    def is_idempotent(self, method: str) -> bool:
+        return method.upper() in self.idempotent_methods
+
+    def _is_timeout(self, exc: BaseException) -> bool:
+        return isinstance(
+            exc, (requests.exceptions.Timeout, httpx.TimeoutException)
+        )
+
+    def is_retryable_exception(self, method: str, exc: BaseException) -> bool:
+        """Check if a request can be retried after it raised `exc`."""
+        if self._is_timeout(exc):
+            if not self.retry_timeouts:
+                return False
+        elif not self.retry_connection_errors:
+            return False
+
+        if isinstance(exc, _NOT_SENT_ERRORS):
+            return True
+
+        return (
+            isinstance(exc, _MAYBE_SENT_ERRORS) and self.is_idempotent(method)
+        )
+
+    def is_retryable_response(self, method: str, response: Any) -> bool:
+        """Check if a request can be retried after it got `response`."""
+        return (
+            response.status_code in self.retry_status_codes
+            and self.is_idempotent(method)
+        )
+
+    def backoff(self, retry: int) -> float:
+        """The wait in seconds before retry number `retry` (starting from 0)
+        """
+        delay = min(self.max_backoff, self.backoff_factor * 2 ** retry)
+        if self.jitter:
+            return random.uniform(0, delay)
+
+        return delay
+
+    def rate_limit_delay(self, reset: float) -> float:
+        """The wait before retrying a request that hit the rate limit, when
+        the server asked to wait `reset` seconds. The jitter spreads the
+        retries of the requests that were rejected together.
+        """
+        if self.jitter:
+            return reset + random.uniform(0, self.backoff_factor)
+
+        return reset
+
+    def within_time(self, elapsed: float, delay: float) -> bool:
+        """Check if a retry can start after waiting `delay` seconds, when
+        `elapsed` seconds have passed since the first attempt.
+        """
+        return (
+            self.max_elapsed_time is None
+            or elapsed + delay <= self.max_elapsed_time
+        )
+
+    def allows(self, retry: int, elapsed: float, delay: float) -> bool:
+        """Check if retry number `retry` (starting from 0) of a transient
+        error can start after waiting `delay` seconds, when `elapsed`
+        seconds have passed since the first attempt.
+        """
+        return retry < self.max_retries and self.within_time(elapsed, delay)
+
+
+# Used by the clients when `retry_policy` is `None`: requests that hit the
+# rate limit are retried after `Retry-After`, without jitter, and transient
+# errors are raised
+_NO_RETRIES = RetryPolicy(max_retries=0, jitter=False)
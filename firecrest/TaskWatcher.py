@@ -0,0 +1,203 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+from __future__ import annotations
+
+import concurrent.futures
+import logging
+import threading
+import time
+
+from typing import Any, Iterator, List, Optional, Tuple, TYPE_CHECKING
+
+import firecrest.FirecrestException as fe
+
+if TYPE_CHECKING:
+    from firecrest.BasicClient import Firecrest
+
+
+class _Watch:
+    __slots__ = (
+        "task_id", "final_status", "sleep_times", "responses", "due", "future"
+    )
+
+    def __init__(
+        self,
+        task_id: str,
+        final_status: str,
+        sleep_times: Iterator[float],
+        responses: List[Any],
+    ) -> None:
+        self.task_id = task_id
+        self.final_status = final_status
+        self.sleep_times = sleep_times
+        self.responses = responses
+        self.due = time.time()
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+
+
+class TaskWatcher:
+    """
+    Polls the FirecREST tasks of the blocking calls of a `Firecrest` client
+    from a background thread. The tasks that are due at about the same time
+    are polled together with one `GET /tasks?tasks=a,b,c` request, so many
+    concurrent blocking calls cost one request per tick instead of one per
+    call. The thread is started when there is a task to poll and stops when
+    there are none left.
+
+    :param client: the client that makes the requests
+    :param batch_window: the tasks that are due within this many seconds are polled with the same request
+    """
+
+    def __init__(self, client: Firecrest, batch_window: float = 0.25) -> None:
+        self._client = client
+        self.batch_window = batch_window
+        self._watches: List[_Watch] = []
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        #: Number of `/tasks` requests that have been made
+        self.num_requests: int = 0
+
+    def watch(
+        self,
+        task_id: str,
+        final_status: str,
+        sleep_times: Iterator[float],
+        responses: Optional[List[Any]] = None,
+    ) -> concurrent.futures.Future:
+        """Poll a task until its status reaches `final_status`. The result
+        of the returned future is the data and the system of the task, or
+        the error of the task. Cancel the future to stop polling.
+
+        :param task_id: the ID of the task
+        :param final_status: the status at which the task is done
+        :param sleep_times: the waits between two polls of the task. The future raises `PollingIterException` when they run out.
+        :param responses: list of responses that are associated with the task (only relevant for error)
+        """
+        w = _Watch(
+            task_id,
+            final_status,
+            sleep_times,
+            [] if responses is None else responses
+        )
+        with self._cond:
+            self._watches.append(w)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="firecrest-task-watcher",
+                    daemon=True
+                )
+                self._thread.start()
+
+            self._cond.notify()
+
+        return w.future
+
+    def pending(self) -> int:
+        """Number of tasks that are being polled"""
+        with self._cond:
+            return len(self._watches)
+
+    def _run(self) -> None:
+        try:
+            self._loop()
+        except BaseException as e:
+            # Let the next call to `watch` start a new thread, instead of
+            # waiting for this one
+            with self._cond:
+                watches, self._watches = self._watches, []
+                self._thread = None
+
+            for w in watches:
+                if w.future.done():
+                    continue
+
+                # The error is raised by the blocking calls of the tasks
+                if w.future.running() or w.future.set_running_or_notify_cancel():
+                    w.future.set_exception(e)
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    self._watches = [
+                        w for w in self._watches if not w.future.cancelled()
+                    ]
+                    if not self._watches:
+                        self._thread = None
+                        return
+
+                    wait = min(w.due for w in self._watches) - time.time()
+                    if wait <= 0:
+                        break
+
+                    self._cond.wait(wait)
+
+                horizon = time.time() + self.batch_window
+                batch = [w for w in self._watches if w.due <= horizon]
+
+            self._poll(batch)
+
+    def _poll(self, batch: List[_Watch]) -> None:
+        task_ids = sorted({w.task_id for w in batch})
+        responses: List[Any] = []
+        self.num_requests += 1
+        try:
+            tasks = self._client._tasks(task_ids, responses)
+        except Exception as e:
+            for w in batch:
+                w.responses.extend(responses)
+                self._finish(w, exc=e)
+
+            return
+
+        for w in batch:
+            w.responses.extend(responses)
+            try:
+                task = tasks[w.task_id]
+                self._client._check_task(task, w.responses)
+            except Exception as e:
+                self._finish(w, exc=e)
+                continue
+
+            if task["status"] >= w.final_status:
+                self._client.log(
+                    logging.INFO,
+                    f'Status of {w.task_id} is {task["status"]}'
+                )
+                self._finish(w, result=(task["data"], task.get("system", "")))
+                continue
+
+            try:
+                sleep = next(w.sleep_times)
+            except StopIteration:
+                self._finish(w, exc=fe.PollingIterException(w.task_id))
+                continue
+
+            self._client.log(
+                logging.INFO,
+                f'Status of {w.task_id} is {task["status"]}, sleeping for '
+                f'{sleep} sec'
+            )
+            w.due = time.time() + sleep
+
+    def _finish(
+        self,
+        w: _Watch,
+        result: Optional[Tuple[Any, str]] = None,
+        exc: Optional[BaseException] = None,
+    ) -> None:
+        with self._cond:
+            if w in self._watches:
+                self._watches.remove(w)
+
+        if not w.future.set_running_or_notify_cancel():
+            return
+
+        if exc is not None:
+            w.future.set_exception(exc)
+        else:
+            w.future.set_result(result)
@@ -0,0 +1,352 @@
+#
+#  Copyright (c) 2019-2023, ETH Zurich. All rights reserved.
+#
+#  Please, refer to the LICENSE file in the root directory.
+#  SPDX-License-Identifier: BSD-3-Clause
+#
+from __future__ import annotations
+
+import httpx
+import requests
+import ssl
+
+from requests.compat import json  # type: ignore
+from typing import Any, Callable, List, Optional, Pattern, Tuple, Union
+
+
+def response_size(response: Any) -> Tuple[int, int]:
+    """Return the size in bytes of the body of a response, as it was
+    received and after it was decoded. The two are different only for
+    compressed responses.
+    """
+    decoded = len(response.content)
+    raw = getattr(response, "raw", None)
+    if raw is not None and hasattr(raw, "tell"):
+        # `requests` response, the urllib3 response counts the bytes
+        # that were read from the socket
+        received = raw.tell()
+    else:
+        received = getattr(response, "num_bytes_downloaded", 0)
+
+    return (received or decoded), decoded
+
+
+class Transport:
+    """Interface of the object that sends the HTTP requests of `Firecrest`.
+    The client builds the URL and the headers of each request and handles
+    the response; the transport only sends it.
+    """
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[dict] = None,
+        params: Any = None,
+        data: Any = None,
+        files: Any = None,
+        timeout: Any = None,
+    ) -> Any:
+        """Send a request and return the response. The response needs to
+        have the `status_code`, `headers`, `content` and `json()` members of
+        a `requests.Response` or a `httpx.Response`.
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release the connections of the transport"""
+
+
+class AsyncTransport:
+    """Interface of the object that sends the HTTP requests of
+    `AsyncFirecrest`.
+    """
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[dict] = None,
+        params: Any = None,
+        data: Any = None,
+        files: Any = None,
+        timeout: Any = None,
+    ) -> Any:
+        """Send a request and return the response."""
+        raise NotImplementedError
+
+    async def aclose(self) -> None:
+        """Release the connections of the transport"""
+
+    async def reopen(self) -> None:
+        """Close the transport, if it's open, and open it again"""
+
+    @property
+    def is_closed(self) -> bool:
+        """Check if the transport is closed"""
+        return False
+
+
+class RequestsTransport(Transport):
+    """Transport based on a `requests.Session`. Like every session of
+    `requests`, it asks for compressed responses with all the encodings
+    that the installed packages can decode (see the `compression` extra of
+    the package).
+
+    :param verify: either a boolean, in which case it controls whether requests will verify the server’s TLS certificate, or a string, in which case it must be a path to a CA bundle to use
+    :param pool_connections: number of host connection pools that are cached by the session
+    :param pool_maxsize: maximum number of connections that are kept alive per host
+    :param pool_block: when `True`, a request will wait for a free connection once `pool_maxsize` connections to the host are in use
+    """
+
+    def __init__(
+        self,
+        verify: Optional[str | bool] = None,
+        pool_connections: int = requests.adapters.DEFAULT_POOLSIZE,
+        pool_maxsize: int = requests.adapters.DEFAULT_POOLSIZE,
+        pool_block: bool = requests.adapters.DEFAULT_POOLBLOCK,
+    ) -> None:
+        self._verify = verify
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block,
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[dict] = None,
+        params: Any = None,
+        data: Any = None,
+        files: Any = None,
+        timeout: Any = None,
+    ) -> requests.Response:
+        return self.session.request(
+            method=method,
+            url=url,
+            headers=headers,
+            params=params,
+            data=data,
+            files=files,
+            verify=self._verify,
+            timeout=timeout,
+        )
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class HttpxTransport(AsyncTransport):
+    """Transport based on a `httpx.AsyncClient`. Like every session of
+    `httpx`, it asks for compressed responses with all the encodings that
+    the installed packages can decode (see the `compression` extra of the
+    package).
+
+    :param verify: either a boolean, in which case it controls whether requests will verify the server’s TLS certificate, or a string, in which case it must be a path to a CA bundle to use
+    :param http2: enable HTTP/2, so that concurrent requests are multiplexed over a few connections. It requires the `h2` package (`pip install pyfirecrest[http2]`).
+    :param limits: connection pool limits of the session. When it is `None` the httpx defaults are used.
+    """
+
+    def __init__(
+        self,
+        verify: str | bool | ssl.SSLContext = True,
+        http2: bool = False,
+        limits: Optional[httpx.Limits] = None,
+    ) -> None:
+        self._verify = verify
+        self._http2 = http2
+        self._limits = limits
+        self.session = self._new_session()
+
+    def _new_session(self) -> httpx.AsyncClient:
+        kwargs: dict[str, Any] = {
+            "verify": self._verify,
+            "http2": self._http2,
+        }
+        if self._limits is not None:
+            kwargs["limits"] = self._limits
+
+        return httpx.AsyncClient(**kwargs)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[dict] = None,
+        params: Any = None,
+        data: Any = None,
+        files: Any = None,
+        timeout: Any = None,
+    ) -> httpx.Response:
+        # httpx doesn't support data in the `delete` method so we always
+        # use the generic `request` method
+        # https://www.python-httpx.org/compatibility/#request-body-on-http-methods
+        return await self.session.request(
+            method=method,
+            url=url,
+            headers=headers,
+            params=params,
+            data=data,
+            files=files,
+            timeout=timeout,
+        )
+
+    async def aclose(self) -> None:
+        await self.session.aclose()
+
+    async def reopen(self) -> None:
+        if not self.session.is_closed:
+            await self.session.aclose()
+
+        self.session = self._new_session()
+
+    @property
+    def is_closed(self) -> bool:
+        return self.session.is_closed
+
+
+#: The responses of the transports of the package
+Response = Union[requests.Response, httpx.Response]
+
+Handler = Callable[[httpx.Request], httpx.Response]
+
+
+class _InMemoryRoutes:
+    def __init__(self) -> None:
+        self._routes: List[Tuple[str, Union[str, Pattern[str]], Handler]] = []
+        #: Number of requests that have been served
+        self.num_requests: int = 0
+
+    def add_handler(
+        self, method: str, path: str | Pattern[str], handler: Handler
+    ) -> None:
+        """Serve the requests to `path` with `handler`, a function that
+        takes a `httpx.Request` and returns a `httpx.Response`.
+
+        :param method: the HTTP method
+        :param path: the path of the endpoint (e.g. `/utilities/ls`) or a compiled regular expression that has to match the whole path
+        :param handler: the function that creates the response
+        """
+        self._routes.append((method.upper(), path, handler))
+
+    def add_response(
+        self,
+        method: str,
+        path: str | Pattern[str],
+        json: Any = None,
+        status_code: int = 200,
+        headers: Optional[dict] = None,
+        content: Optional[bytes] = None,
+    ) -> None:
+        """Serve the same response to all the requests to `path`. The body
+        is serialized only once, so large payloads don't add to the time
+        of the requests.
+
+        :param method: the HTTP method
+        :param path: the path of the endpoint (e.g. `/utilities/ls`) or a compiled regular expression that has to match the whole path
+        :param json: the JSON body of the response
+        :param status_code: the status code of the response
+        :param headers: extra headers of the response
+        :param content: the raw body of the response, when `json` is not set
+        """
+        all_headers = dict(headers) if headers else {}
+        if json is not None:
+            content = _json_dumps(json)
+            all_headers.setdefault("Content-Type", "application/json")
+
+        body = content if content is not None else b""
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            return httpx.Response(
+                status_code, headers=all_headers, content=body
+            )
+
+        self.add_handler(method, path, handler)
+
+    def _handle(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[dict],
+        params: Any,
+        data: Any,
+        files: Any,
+    ) -> httpx.Response:
+        request = httpx.Request(
+            method, url, headers=headers, params=params, data=data,
+            files=files
+        )
+        self.num_requests += 1
+        path = request.url.path
+        for route_method, route_path, handler in self._routes:
+            if route_method != method.upper():
+                continue
+
+            if (
+                route_path == path if isinstance(route_path, str)
+                else route_path.fullmatch(path)
+            ):
+                response = handler(request)
+                break
+        else:
+            response = httpx.Response(
+                404, json={"message": f"no route for {method} {path}"}
+            )
+
+        response.request = request
+        return response
+
+
+class InMemoryTransport(_InMemoryRoutes, Transport):
+    """Transport for `Firecrest` that serves canned responses from memory,
+    without opening any socket. It can be used for tests and for measuring
+    the overhead of the client.
+
+    .. code-block:: Python
+
+        transport = InMemoryTransport()
+        transport.add_response(
+            "GET", "/status/systems", json={"out": [...]}
+        )
+        client = Firecrest("http://firecrest", auth, transport=transport)
+    """
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[dict] = None,
+        params: Any = None,
+        data: Any = None,
+        files: Any = None,
+        timeout: Any = None,
+    ) -> httpx.Response:
+        return self._handle(method, url, headers, params, data, files)
+
+
+class AsyncInMemoryTransport(_InMemoryRoutes, AsyncTransport):
+    """Transport for `AsyncFirecrest` that serves canned responses from
+    memory, without opening any socket. It has the same methods to register
+    responses as `InMemoryTransport`.
+    """
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[dict] = None,
+        params: Any = None,
+        data: Any = None,
+        files: Any = None,
+        timeout: Any = None,
+    ) -> httpx.Response:
+        return self._handle(method, url, headers, params, data, files)
+
+
+def _json_dumps(obj: Any) -> bytes:
+    return json.dumps(obj).encode()
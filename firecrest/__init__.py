@@ -21,6 +21,7 @@ if sys.version_info[:3] < MIN_PYTHON_VERSION:
 
 from firecrest.BasicClient import Firecrest
 from firecrest.AsyncClient import AsyncFirecrest
+from firecrest.AsyncBackedClient import AsyncBackedFirecrest
 from firecrest.ExternalStorage import ExternalDownload, ExternalUpload, ExternalStorage
 from firecrest.AsyncExternalStorage import (
     AsyncExternalDownload,
@@ -28,7 +29,31 @@ from firecrest.AsyncExternalStorage import (
     AsyncExternalStorage,
 )
 from firecrest.Authorization import ClientCredentialsAuth
+from firecrest.JobHandle import AsyncJobHandle, JobHandle
+from firecrest.JobMonitor import JobMonitor, JobStateChange
+from firecrest.AsyncJobMonitor import AsyncJobMonitor
+from firecrest.CircuitBreaker import CircuitBreaker
+from firecrest.PollingSchedule import AdaptivePollingSchedule
+from firecrest.RateLimiter import (
+    AdaptiveConcurrency,
+    AdaptiveThrottle,
+    FileBuckets,
+    LocalBuckets,
+    Priority,
+    request_priority,
+)
+from firecrest.RetryPolicy import RetryPolicy
+from firecrest.TaskWatcher import TaskWatcher
+from firecrest.Transport import (
+    AsyncInMemoryTransport,
+    AsyncTransport,
+    HttpxTransport,
+    InMemoryTransport,
+    RequestsTransport,
+    Transport,
+)
 from firecrest.FirecrestException import (
+    CircuitOpenException,
     ClientsCredentialsException,
     FirecrestException,
     HeaderException,
@@ -1,9 +1,19 @@
 import email.utils as eut
+import functools
 import logging
+import re
 import time
+import urllib.parse
 from contextlib import contextmanager
 from packaging.version import parse
+from requests.compat import json  # type: ignore
 import firecrest.FirecrestException as fe
+from firecrest.Transport import response_size
+
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore
 
 
 @contextmanager
@@ -62,14 +72,188 @@ def parse_retry_after(retry_after_header, log_func):
         return 10
 
 
+def retry_after(response, log_func):
+    """
+    Return the seconds to wait before retrying a request that hit the rate
+    limit, from the Retry-After or RateLimit-Reset header of the response.
+    """
+    reset = response.headers.get(
+        "Retry-After",
+        default=response.headers.get("RateLimit-Reset", default=10),
+    )
+    return parse_retry_after(reset, log_func)
+
+
+def _uploaded_file(files):
+    if not files or "file" not in files:
+        return None
+
+    f = files["file"]
+    return f[1] if isinstance(f, tuple) else f
+
+
+def uploaded_file_position(files):
+    """
+    Return the position of the file that is uploaded in a request, so that
+    it can be rewinded before a retry, or `None` if there is no file.
+    """
+    f = _uploaded_file(files)
+    return None if f is None else f.tell()
+
+
+def rewind_uploaded_file(files, position, log_func):
+    """Move the pointer of the uploaded file back to `position`."""
+    f = _uploaded_file(files)
+    if f is None:
+        return
+
+    log_func(
+        logging.DEBUG,
+        f"Resetting the file pointer of the uploaded file to {position}"
+    )
+    f.seek(position)
+
+
+def get_request_key(endpoint, additional_headers, params):
+    """
+    Return a hashable key of a GET request, so that identical requests that
+    are made at the same time can share one response.
+    """
+    return (
+        endpoint,
+        tuple(sorted((additional_headers or {}).items())),
+        tuple(sorted((k, str(v)) for k, v in (params or {}).items())),
+    )
+
+
+# Path segments with a digit are IDs, like the job ID in
+# `DELETE /compute/jobs/1234`
+_ID_SEGMENT = re.compile(r"[^/]*\d[^/]*")
+
+
+def task_kind(responses):
+    """
+    Return the kind of a FirecREST task for the polling schedule: the method
+    and the path of the request that created it, which is the first of
+    `responses`, with the IDs replaced by `{id}`, or `None` when it is not
+    known. For example `DELETE /compute/jobs/{id}`.
+    """
+    if not responses:
+        return None
+
+    try:
+        request = responses[0].request
+        url = str(request.url)
+        method = request.method
+    except (AttributeError, RuntimeError):
+        return None
+
+    path = urllib.parse.urlsplit(url).path
+    path = "/".join(
+        "{id}" if _ID_SEGMENT.fullmatch(segment) else segment
+        for segment in path.split("/")
+    )
+    return f"{method} {path}"
+
+
+def default_json_decoder():
+    """
+    Return the function that decodes the JSON body of the responses by
+    default: `orjson.loads` when orjson is installed, otherwise the standard
+    library `json.loads`.
+    """
+    if orjson is not None:
+        return orjson.loads
+
+    return json.loads
+
+
+def log_response_size(method, endpoint, response, log_func):
+    """Log the bytes of the body of a response, as received and decoded."""
+    received, decoded = response_size(response)
+    encoding = response.headers.get("Content-Encoding", "identity")
+    log_func(
+        logging.DEBUG,
+        f"{method} request to {endpoint} received {received} bytes "
+        f"({decoded} bytes decoded, content encoding: {encoding})"
+    )
+
+
+def json_response(responses, expected_status_code, allow_none_result,
+                  log_func, json_decoder=None):
+    """
+    Check the last response of a call and return its JSON body, decoded by
+    `json_decoder` (by default `response.json()`). An exception that
+    contains all the responses is raised if the response has an error
+    header, an error status or an unexpected status.
+    """
+    # Will examine only the last response
+    response = responses[-1]
+    status_code = response.status_code
+    for h in fe.ERROR_HEADERS:
+        if h in response.headers:
+            log_func(
+                logging.CRITICAL,
+                f"Header '{h}' is included in the response"
+            )
+            exc = fe.HeaderException(responses)
+            log_func(logging.CRITICAL, exc)
+            raise exc
+
+    if status_code == 401:
+        log_func(logging.CRITICAL, "Status of the response is 401")
+        exc = fe.UnauthorizedException(responses)
+        log_func(logging.CRITICAL, exc)
+        raise exc
+    elif status_code == 404:
+        log_func(logging.CRITICAL, "Status of the response is 404")
+        exc = fe.NotFound(responses)
+        log_func(logging.CRITICAL, exc)
+        raise exc
+    elif status_code >= 400:
+        log_func(logging.CRITICAL, f"Status of the response is {status_code}")
+        exc = fe.FirecrestException(responses)
+        log_func(logging.CRITICAL, exc)
+        raise exc
+    elif status_code != expected_status_code:
+        log_func(
+            logging.CRITICAL,
+            f"Unexpected status of last request {status_code}, it should "
+            f"have been {expected_status_code}"
+        )
+        exc = fe.UnexpectedStatusException(responses, expected_status_code)
+        log_func(logging.CRITICAL, exc)
+        raise exc
+
+    try:
+        if json_decoder is None:
+            ret = response.json()
+        else:
+            ret = json_decoder(response.content)
+    except ValueError:
+        # `json.JSONDecodeError` and the errors of other decoders, like
+        # `orjson.JSONDecodeError`, are subclasses of `ValueError`
+        if allow_none_result:
+            ret = None
+        else:
+            exc = fe.NoJSONException(responses)
+            log_func(logging.CRITICAL, exc)
+            raise exc
+
+    return ret
+
+
 def validate_api_version_compatibility():
     def decorator(func):
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
             client = args[0]
             if client._query_api_version:
-                # This will set the version in the client as a side
-                # effect
-                client.parameters()
+                with client._api_version_lock:
+                    if client._query_api_version:
+                        # This will set the version in the client as a
+                        # side effect
+                        client.parameters()
 
             function_name = func.__name__
             min_version = missing_api_features.get(
@@ -89,6 +273,7 @@ def validate_api_version_compatibility():
 
 def async_validate_api_version_compatibility():
     def decorator(func):
+        @functools.wraps(func)
         async def wrapper(*args, **kwargs):
 
             client = args[0]
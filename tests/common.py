@@ -1,4 +1,73 @@
+import httpx
 import re
+import time
+
+
+class ValidAuthorization:
+    def get_access_token(self):
+        return "VALID_TOKEN"
+
+
+class TaskServer:
+    """FirecREST tasks in memory, served by `/tasks` for any list of IDs.
+
+    A task is pending (status 100) for its first `polls` polls and for
+    `duration` seconds after it was added, then it has its final `status`
+    and `data`. The IDs of every `/tasks` request are kept in
+    `task_requests`, and the next `failures` requests fail with status 503.
+    """
+
+    def __init__(self, system="cluster1"):
+        self.system = system
+        self.tasks = {}
+        self.task_requests = []
+        self.failures = 0
+
+    def add_task(self, task_id, data=None, status="200", polls=0, duration=0):
+        self.tasks[task_id] = {
+            "data": data,
+            "status": status,
+            "polls": polls,
+            "end": time.time() + duration,
+            "num_polls": 0,
+        }
+
+    def new_task(self, data=None, status_code=200, **kwargs):
+        """Add a task with the next ID and return the response that created
+        it. The keyword arguments are the ones of `add_task`."""
+        task_id = f"task{len(self.tasks)}"
+        self.add_task(task_id, data, **kwargs)
+        return httpx.Response(status_code, json={"task_id": task_id})
+
+    def tasks_handler(self, request):
+        ids = request.url.params["tasks"].split(",")
+        self.task_requests.append(ids)
+        if self.failures > 0:
+            self.failures -= 1
+            return httpx.Response(503, json={"description": "unavailable"})
+
+        tasks = {}
+        for task_id in ids:
+            task = self.tasks.get(task_id)
+            if task is None:
+                continue
+
+            task["num_polls"] += 1
+            done = (
+                task["num_polls"] > task["polls"]
+                and time.time() >= task["end"]
+            )
+            tasks[task_id] = {
+                "hash_id": task_id,
+                "status": task["status"] if done else "100",
+                "data": task["data"] if done else None,
+                "system": self.system,
+            }
+
+        return httpx.Response(200, json={"tasks": tasks})
+
+    def register(self, transport):
+        transport.add_handler("GET", "/tasks", self.tasks_handler)
 
 
 def clean_stdout(input):
@@ -1,4 +1,5 @@
 import common
+import concurrent.futures
 import json
 import pytest
 import re
@@ -1619,6 +1620,39 @@ def test_get_nodes_unknown(valid_client):
         valid_client.nodes(machine="cluster1", nodes=["nidunknown"])
 
 
+def test_get_nodes_shared_client(valid_client):
+    response = [
+        {
+            "ActiveFeatures": ["f7t"],
+            "NodeName": "nid001",
+            "Partitions": ["part01", "part02"],
+            "State": ["IDLE"],
+        }
+    ]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [
+            pool.submit(
+                valid_client.nodes,
+                machine="cluster1",
+                nodes=["nidunknown"] if i % 2 else None
+            )
+            for i in range(16)
+        ]
+
+    for i, future in enumerate(futures):
+        if i % 2:
+            with pytest.raises(firecrest.FirecrestException) as exc_info:
+                future.result()
+
+            # Each exception holds only the responses of its own call
+            responses = exc_info.value.responses
+            assert len(responses) == 2
+            assert responses[0].url.endswith("nodes=nidunknown")
+            assert responses[1].url.endswith("tasks=info_unknown_node")
+        else:
+            assert future.result() == response
+
+
 def test_cli_get_nodes(valid_credentials):
     args = valid_credentials + ["get-nodes", "--system", "cluster1", "nid001"]
     result = runner.invoke(cli.app, args=args)
@@ -0,0 +1,195 @@
+import asyncio
+import common
+import pytest
+
+from context import firecrest
+
+
+class FakeSubmissions(common.TaskServer):
+    """Serves `/compute/jobs/upload` and `/tasks`. The submission tasks
+    are finished the second time that they are polled, and the scripts
+    that contain `fail` are rejected by `sbatch`."""
+
+    def upload_handler(self, request):
+        script = request.read()
+        if b"cancel" in script:
+            raise asyncio.CancelledError()
+
+        if b"fail" in script:
+            return self.new_task(
+                "sbatch: error", status="400", polls=1, status_code=201
+            )
+
+        jobid = len(self.tasks) + 1000
+        return self.new_task({"jobid": jobid}, polls=1, status_code=201)
+
+    def register(self, transport):
+        super().register(transport)
+        transport.add_handler(
+            "POST", "/compute/jobs/upload", self.upload_handler
+        )
+
+
+def test_submit_nowait():
+    server = FakeSubmissions()
+    transport = firecrest.InMemoryTransport()
+    server.register(transport)
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.polling_sleep_times = [0, 0, 0]
+    scripts = [f"#!/bin/bash\necho {i}" for i in range(10)] + ["fail"]
+    handles = [
+        client.submit_nowait("cluster1", script_str=s) for s in scripts
+    ]
+    assert server.task_requests == []
+    assert [h.task_id for h in handles] == [f"task{i}" for i in range(11)]
+    assert not handles[0].done()
+
+    # All the pending handles are resolved together
+    assert handles[0].jobid() == 1000
+    assert all(h.done() for h in handles)
+    assert len(server.task_requests) == 2
+    assert handles[3].result() == {"jobid": 1003, "firecrest_taskid": "task3"}
+    assert len(server.task_requests) == 2
+    with pytest.raises(firecrest.FirecrestException):
+        handles[-1].result()
+
+
+def test_submit_nowait_poll_error():
+    server = FakeSubmissions()
+    transport = firecrest.InMemoryTransport()
+    server.register(transport)
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.polling_sleep_times = [0, 0, 0]
+    handles = [
+        client.submit_nowait("cluster1", script_str=f"echo {i}")
+        for i in range(2)
+    ]
+    server.failures = 1
+    # The error reaches the caller, but the handles are still pending
+    with pytest.raises(firecrest.FirecrestException):
+        handles[0].result()
+
+    assert not any(h.done() for h in handles)
+    assert [h.jobid() for h in handles] == [1000, 1001]
+    # Only the response of the submission is kept
+    assert all(len(h._responses) == 1 for h in handles)
+
+
+@pytest.mark.asyncio
+async def test_async_submit_nowait():
+    server = FakeSubmissions()
+    transport = firecrest.AsyncInMemoryTransport()
+    server.register(transport)
+    client = firecrest.AsyncFirecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.time_between_calls = {k: 0 for k in client.time_between_calls}
+    handles = [
+        await client.submit_nowait("cluster1", script_str=f"echo {i}")
+        for i in range(10)
+    ]
+    assert server.task_requests == []
+
+    jobids = [await h.jobid() for h in handles]
+    assert jobids == list(range(1000, 1010))
+    assert len(server.task_requests) == 2
+
+    handle = await client.submit_nowait("cluster1", script_str="echo")
+    server.failures = 1
+    with pytest.raises(firecrest.FirecrestException):
+        await handle.result()
+
+    assert not handle.done()
+    assert await handle.jobid() == 1010
+
+
+def test_submit_many():
+    server = FakeSubmissions()
+    transport = firecrest.InMemoryTransport()
+    server.register(transport)
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.polling_sleep_times = [0, 0, 0]
+    jobs = [{"script_str": f"echo {i}", "account": "proj"} for i in range(150)]
+    jobs[5] = {"script_str": "fail"}
+    results = client.submit_many("cluster1", jobs, max_workers=4)
+    assert len(results) == 150
+    assert isinstance(results[5], firecrest.FirecrestException)
+    # Every job has its own submission task
+    task_ids = {r["firecrest_taskid"] for i, r in enumerate(results) if i != 5}
+    assert len(task_ids) == 149
+    # Two rounds of polling, with at most 100 tasks per request
+    assert len(server.task_requests) == 4
+    assert max(len(r) for r in server.task_requests) == 100
+
+    with pytest.raises(firecrest.FirecrestException):
+        client.submit_many("cluster1", jobs[:6], return_exceptions=False)
+
+    server.task_requests.clear()
+    missing = {"script_local_path": "/missing/script.sh"}
+    with pytest.raises(FileNotFoundError):
+        client.submit_many(
+            "cluster1", [missing] + jobs[:4], return_exceptions=False
+        )
+
+    # The jobs after the failed upload are still checked
+    assert len(set(sum(server.task_requests, []))) == 4
+    assert client._job_handles._pending == {}
+
+    server.failures = 1
+    with pytest.raises(firecrest.FirecrestException):
+        client.submit_many("cluster1", jobs[:3], return_exceptions=False)
+
+    # The other submissions are no longer polled
+    assert client._job_handles._pending == {}
+
+
+@pytest.mark.asyncio
+async def test_async_submit_many():
+    server = FakeSubmissions()
+    transport = firecrest.AsyncInMemoryTransport()
+    server.register(transport)
+    client = firecrest.AsyncFirecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.time_between_calls = {k: 0 for k in client.time_between_calls}
+    jobs = [{"script_str": f"echo {i}"} for i in range(20)]
+    jobs.append({"script_str": "fail"})
+    results = await client.submit_many("cluster1", jobs, max_workers=5)
+    assert sorted(r["jobid"] for r in results[:20]) == list(range(1000, 1020))
+    assert isinstance(results[20], firecrest.FirecrestException)
+    assert len(server.task_requests) <= 4
+
+    with pytest.raises(firecrest.FirecrestException):
+        await client.submit_many("cluster1", jobs[::-1], return_exceptions=False)
+
+    server.failures = 1
+    results = await client.submit_many("cluster1", jobs[:3])
+    # Only the coroutine that made the failed request gets the error
+    errors = [r for r in results if isinstance(r, Exception)]
+    assert len(errors) == 1
+    assert client._job_handles._pending == {}
+
+    # A cancellation is raised even with `return_exceptions`
+    with pytest.raises(asyncio.CancelledError):
+        await client.submit_many("cluster1", [{"script_str": "cancel"}])
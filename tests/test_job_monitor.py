@@ -0,0 +1,272 @@
+import asyncio
+import common
+import concurrent.futures
+import httpx
+import pytest
+
+from context import firecrest
+
+
+class FakeScheduler(common.TaskServer):
+    """Serves `/compute/jobs`, `/compute/acct` and their tasks from a list
+    of snapshots of the queue and of the accounting database. Every call
+    of `squeue` moves to the next snapshot."""
+
+    def __init__(self, snapshots):
+        super().__init__()
+        self.snapshots = snapshots
+        self.round = -1
+        self.requests = []
+
+    def queue(self):
+        return self.snapshots[min(self.round, len(self.snapshots) - 1)]
+
+    def jobs_handler(self, request):
+        self.round += 1
+        self.requests.append(("squeue", request.url.params.get("jobs")))
+        queue, _ = self.queue()
+        return self.new_task({
+            str(i): {"jobid": jobid, "state": state}
+            for i, (jobid, state) in enumerate(queue.items())
+        })
+
+    def acct_handler(self, request):
+        self.requests.append(("sacct", request.url.params.get("jobs")))
+        _, acct = self.queue()
+        jobs = request.url.params["jobs"].split(",")
+        return self.new_task([
+            {"jobid": jobid, "state": state}
+            for jobid, state in acct.items() if jobid in jobs
+        ])
+
+    def register(self, transport):
+        super().register(transport)
+        transport.add_handler("GET", "/compute/jobs", self.jobs_handler)
+        transport.add_handler("GET", "/compute/acct", self.acct_handler)
+
+
+SNAPSHOTS = [
+    ({"1": "PENDING", "2": "RUNNING"}, {}),
+    ({"1": "RUNNING"}, {"2": "COMPLETED"}),
+    ({"1": "RUNNING"}, {"2": "COMPLETED"}),
+    ({}, {"1": "FAILED", "2": "COMPLETED"}),
+]
+
+
+def test_job_monitor():
+    scheduler = FakeScheduler(SNAPSHOTS)
+    transport = firecrest.InMemoryTransport()
+    scheduler.register(transport)
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.polling_sleep_times = [0]
+    changes = []
+    monitor = firecrest.JobMonitor(client, callback=changes.append)
+    monitor.add("cluster1", [1, 2])
+    assert len(monitor) == 2
+
+    monitor.check()
+    assert [(c.jobid, c.old_state, c.new_state) for c in changes] == [
+        ("1", None, "PENDING"), ("2", None, "RUNNING")
+    ]
+    changes.clear()
+    monitor.check()
+    assert [(c.jobid, c.new_state, c.finished) for c in changes] == [
+        ("1", "RUNNING", False), ("2", "COMPLETED", True)
+    ]
+    assert monitor.wait("cluster1", 2, timeout=0)["state"] == "COMPLETED"
+    assert list(monitor.jobs("cluster1")) == ["1"]
+
+    # No change, no callback
+    changes.clear()
+    monitor.check()
+    assert changes == []
+
+    monitor.check()
+    assert [(c.jobid, c.old_state, c.new_state) for c in changes] == [
+        ("1", "RUNNING", "FAILED")
+    ]
+    assert len(monitor) == 0
+    assert monitor.wait_all(timeout=0)
+
+    # One squeue request per check, with all the jobs, and sacct only for
+    # the jobs that have left the queue
+    assert scheduler.requests == [
+        ("squeue", "1,2"),
+        ("squeue", "1,2"),
+        ("sacct", "2"),
+        ("squeue", "1"),
+        ("squeue", "1"),
+        ("sacct", "1"),
+    ]
+
+
+def test_job_monitor_remove():
+    scheduler = FakeScheduler([({"1": "RUNNING", "3": "RUNNING"}, {})])
+    transport = firecrest.InMemoryTransport()
+    scheduler.register(transport)
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.polling_sleep_times = [0]
+    changes = []
+    monitor = firecrest.JobMonitor(
+        client, callback=changes.append, max_misses=2
+    )
+    monitor.add("cluster1", [1, 2, 3])
+    with concurrent.futures.ThreadPoolExecutor(2) as pool:
+        waiter = pool.submit(monitor.wait, "cluster1", 1, 5)
+        all_waiter = pool.submit(monitor.wait_all, 5)
+        # Removing a job wakes up its waiters
+        monitor.remove("cluster1", 1)
+        assert waiter.result() is None
+
+        # Job 2 is found by neither squeue nor sacct
+        monitor.check()
+        monitor.check()
+        assert [(c.jobid, c.new_state, c.finished) for c in changes] == [
+            ("3", "RUNNING", False), ("2", "UNKNOWN", True)
+        ]
+        assert monitor.wait("cluster1", 2)["state"] == "UNKNOWN"
+        assert list(monitor.jobs("cluster1")) == ["3"]
+
+        monitor.remove("cluster1", 3)
+        assert all_waiter.result()
+
+
+@pytest.mark.asyncio
+async def test_async_job_monitor():
+    scheduler = FakeScheduler(SNAPSHOTS)
+    transport = firecrest.AsyncInMemoryTransport()
+    scheduler.register(transport)
+    client = firecrest.AsyncFirecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.time_between_calls = {k: 0 for k in client.time_between_calls}
+    changes = []
+
+    async def callback(change):
+        changes.append((change.jobid, change.new_state))
+
+    async with firecrest.AsyncJobMonitor(
+        client, interval=0.01, callback=callback
+    ) as monitor:
+        monitor.add("cluster1", ["1", "2"])
+        job = await monitor.wait("cluster1", "1")
+        await monitor.wait_all()
+
+    assert job["state"] == "FAILED"
+    assert changes == [
+        ("1", "PENDING"),
+        ("2", "RUNNING"),
+        ("1", "RUNNING"),
+        ("2", "COMPLETED"),
+        ("1", "FAILED"),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_async_job_monitor_remove():
+    scheduler = FakeScheduler([({}, {})])
+    transport = firecrest.AsyncInMemoryTransport()
+    scheduler.register(transport)
+    client = firecrest.AsyncFirecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    monitor = firecrest.AsyncJobMonitor(client)
+    monitor.add("cluster1", ["1", "2"])
+    job = asyncio.create_task(monitor.wait("cluster1", "1"))
+    all_jobs = asyncio.create_task(monitor.wait_all())
+    await asyncio.sleep(0)
+    monitor.remove("cluster1", "1")
+    assert await asyncio.wait_for(job, 1) is None
+    assert not all_jobs.done()
+    monitor.remove("cluster1", "2")
+    await asyncio.wait_for(all_jobs, 1)
+
+
+@pytest.mark.asyncio
+async def test_watch_jobs():
+    scheduler = FakeScheduler(SNAPSHOTS)
+    transport = firecrest.AsyncInMemoryTransport()
+    scheduler.register(transport)
+    client = firecrest.AsyncFirecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.time_between_calls = {k: 0 for k in client.time_between_calls}
+    changes = [
+        (c.jobid, c.new_state, c.finished)
+        async for c in client.watch_jobs("cluster1", [1, 2], interval=0)
+    ]
+    assert changes == [
+        ("1", "PENDING", False),
+        ("2", "RUNNING", False),
+        ("1", "RUNNING", False),
+        ("2", "COMPLETED", True),
+        ("1", "FAILED", True),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_watch_tasks():
+    statuses = {
+        "a": iter(["100", "100", "101", "200"]),
+        "b": iter(["100", "400"]),
+    }
+    last = {}
+    requests = []
+
+    def tasks_handler(request):
+        ids = request.url.params["tasks"].split(",")
+        requests.append(sorted(ids))
+        tasks = {}
+        for i in ids:
+            if i in statuses:
+                last[i] = next(statuses[i], last.get(i))
+                tasks[i] = {"hash_id": i, "status": last[i]}
+
+        return httpx.Response(200, json={"tasks": tasks})
+
+    transport = firecrest.AsyncInMemoryTransport()
+    transport.add_handler("GET", "/tasks", tasks_handler)
+    client = firecrest.AsyncFirecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.time_between_calls = {k: 0 for k in client.time_between_calls}
+    updates = [
+        (task["hash_id"], task["status"])
+        async for task in client.watch_tasks(["a", "b", "unknown"], interval=0)
+    ]
+    assert updates == [
+        ("a", "100"),
+        ("b", "100"),
+        ("b", "400"),
+        ("a", "101"),
+        ("a", "200"),
+    ]
+    # One request for all the tasks that are followed
+    assert requests == [
+        ["a", "b", "unknown"],
+        ["a", "b"],
+        ["a"],
+        ["a"],
+    ]
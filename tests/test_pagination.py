@@ -0,0 +1,127 @@
+import asyncio
+import common
+import pytest
+import time
+
+from context import firecrest
+
+
+class PagedScheduler(common.TaskServer):
+    """Serves the pages of `/compute/acct` and `/compute/jobs` from a list
+    of jobs and records the pages that were requested."""
+
+    def __init__(self, num_jobs):
+        super().__init__()
+        self.jobs = [
+            {"jobid": str(i), "state": "COMPLETED"} for i in range(num_jobs)
+        ]
+        self.pages = []
+
+    def page(self, request):
+        size = int(request.url.params["pageSize"])
+        number = int(request.url.params["pageNumber"])
+        self.pages.append(number)
+        return self.jobs[number * size:(number + 1) * size]
+
+    def acct_handler(self, request):
+        return self.new_task(self.page(request))
+
+    def jobs_handler(self, request):
+        return self.new_task({
+            str(i): job for i, job in enumerate(self.page(request))
+        })
+
+    def register(self, transport):
+        super().register(transport)
+        transport.add_handler("GET", "/compute/acct", self.acct_handler)
+        transport.add_handler("GET", "/compute/jobs", self.jobs_handler)
+
+
+def sync_client(scheduler):
+    transport = firecrest.InMemoryTransport()
+    scheduler.register(transport)
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.polling_sleep_times = [0, 0, 0]
+    return client
+
+
+@pytest.mark.parametrize("num_jobs, pages", [(250, 3), (200, 3), (0, 1)])
+def test_iter_poll(num_jobs, pages):
+    scheduler = PagedScheduler(num_jobs)
+    client = sync_client(scheduler)
+    jobs = list(client.iter_poll("cluster1", page_size=100))
+    assert [j["jobid"] for j in jobs] == [str(i) for i in range(num_jobs)]
+    # It stops after the first page that is not full
+    assert sorted(scheduler.pages) == list(range(pages))
+
+
+def test_iter_poll_prefetch():
+    scheduler = PagedScheduler(250)
+    client = sync_client(scheduler)
+    it = client.iter_poll_active("cluster1", page_size=100)
+    assert scheduler.pages == []
+    assert next(it)["jobid"] == "0"
+    time.sleep(0.1)
+    assert scheduler.pages == [0]
+    # The next page is requested while the first one is consumed
+    assert next(it)["jobid"] == "1"
+    deadline = time.time() + 5
+    while scheduler.pages != [0, 1] and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert scheduler.pages == [0, 1]
+    assert len(list(it)) == 248
+
+    scheduler = PagedScheduler(250)
+    client = sync_client(scheduler)
+    it = client.iter_poll("cluster1", page_size=100, prefetch=False)
+    next(it)
+    assert scheduler.pages == [0]
+
+
+@pytest.mark.asyncio
+async def test_async_iter_poll():
+    scheduler = PagedScheduler(250)
+    transport = firecrest.AsyncInMemoryTransport()
+    scheduler.register(transport)
+    client = firecrest.AsyncFirecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.time_between_calls = {k: 0 for k in client.time_between_calls}
+
+    it = client.iter_poll_active("cluster1", page_size=100)
+    assert (await it.__anext__())["jobid"] == "0"
+    await asyncio.sleep(0.1)
+    assert scheduler.pages == [0]
+    assert (await it.__anext__())["jobid"] == "1"
+    await asyncio.sleep(0.1)
+    assert scheduler.pages == [0, 1]
+    await it.aclose()
+
+    scheduler.pages.clear()
+    jobs = [j async for j in client.iter_poll("cluster1", page_size=100)]
+    assert [j["jobid"] for j in jobs] == [str(i) for i in range(250)]
+    assert scheduler.pages == [0, 1, 2]
+
+
+def test_async_backed_iter_poll():
+    scheduler = PagedScheduler(150)
+    transport = firecrest.AsyncInMemoryTransport()
+    scheduler.register(transport)
+    with firecrest.AsyncBackedFirecrest(
+        "http://firecrest.test", common.ValidAuthorization(), transport=transport
+    ) as client:
+        client.set_api_version("1.16.0")
+        client.time_between_calls = {k: 0 for k in client.time_between_calls}
+        jobs = list(client.iter_poll("cluster1", page_size=100))
+
+    assert len(jobs) == 150
+    assert scheduler.pages == [0, 1]
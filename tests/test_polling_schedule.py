@@ -0,0 +1,123 @@
+import common
+import httpx
+import itertools
+import pytest
+
+from context import firecrest
+
+from firecrest.FirecrestException import PollingIterException
+from firecrest.utilities import task_kind
+
+
+def test_schedule_without_history():
+    schedule = firecrest.AdaptivePollingSchedule(
+        min_sleep=0.1, max_sleep=1, backoff_factor=1.5
+    )
+    sleeps = list(itertools.islice(schedule.sleep_times("/compute/acct"), 8))
+    assert sleeps[:3] == pytest.approx([0.1, 0.1, 0.1])
+    # The wait grows with the elapsed time, up to `max_sleep`
+    assert all(a <= b for a, b in zip(sleeps, sleeps[1:]))
+    assert sleeps[-1] <= 1
+
+
+def test_schedule_quantiles():
+    schedule = firecrest.AdaptivePollingSchedule(
+        quantiles=(0.5, 0.9), min_samples=3, min_sleep=0.1, max_sleep=100
+    )
+    for d in (7, 8, 8, 9, 10):
+        schedule.record("/compute/acct", d)
+
+    assert schedule.quantile("/compute/acct", 0.5) == 8
+    sleeps = schedule.sleep_times("/compute/acct")
+    assert next(sleeps) == pytest.approx(8)
+    assert next(sleeps) == pytest.approx(9.6 - 8)
+    # Then it backs off from the elapsed time
+    assert next(sleeps) == pytest.approx(0.5 * 9.6)
+    # The task finished during the last wait
+    assert sleeps.completion_time(14.4) == pytest.approx(12)
+
+    # Other kinds of tasks are not affected
+    assert next(schedule.sleep_times("/compute/jobs")) == pytest.approx(0.1)
+
+
+def test_schedule_max_elapsed():
+    schedule = firecrest.AdaptivePollingSchedule(
+        min_sleep=1, max_sleep=1, max_elapsed=3
+    )
+    assert list(schedule.sleep_times(None)) == [1, 1, 1]
+
+
+def test_task_kind():
+    def response(method, url):
+        return httpx.Response(201, request=httpx.Request(method, url))
+
+    assert task_kind([]) is None
+    assert task_kind([
+        response("GET", "http://firecrest.test/compute/acct?jobs=1,2")
+    ]) == "GET /compute/acct"
+    # The tasks that cancel different jobs are of the same kind
+    assert task_kind([
+        response("DELETE", "http://firecrest.test/compute/jobs/1234")
+    ]) == "DELETE /compute/jobs/{id}"
+    assert task_kind([
+        response("DELETE", "http://firecrest.test/compute/jobs/1234_5")
+    ]) == "DELETE /compute/jobs/{id}"
+    assert task_kind([
+        response("POST", "http://firecrest.test/storage/xfer-internal/mv")
+    ]) == "POST /storage/xfer-internal/mv"
+
+
+def test_client_polling_schedule():
+    task_duration = 0.2
+    server = common.TaskServer()
+    transport = firecrest.InMemoryTransport()
+    transport.add_handler(
+        "GET",
+        "/compute/acct",
+        lambda request: server.new_task([], duration=task_duration),
+    )
+    server.register(transport)
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.polling_schedule = firecrest.AdaptivePollingSchedule(
+        min_samples=3, min_sleep=0.02
+    )
+    for _ in range(3):
+        client.poll("cluster1")
+
+    warmup_requests = transport.num_requests / 3
+    durations = client.polling_schedule.durations("GET /compute/acct")
+    assert len(durations) == 3
+    for d in durations:
+        assert task_duration - 0.05 < d < task_duration + 0.05
+
+    # With the history, the task is polled at about the time it finishes
+    transport.num_requests = 0
+    client.poll("cluster1")
+    assert transport.num_requests <= 5
+    assert transport.num_requests < warmup_requests
+
+
+def test_client_polling_schedule_timeout():
+    transport = firecrest.InMemoryTransport()
+    transport.add_response("GET", "/compute/acct", json={"task_id": "acct"})
+    transport.add_response(
+        "GET",
+        "/tasks",
+        json={"tasks": {"acct": {"hash_id": "acct", "status": "100"}}},
+    )
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.polling_schedule = firecrest.AdaptivePollingSchedule(
+        min_sleep=0.01, max_elapsed=0.05
+    )
+    with pytest.raises(PollingIterException):
+        client.poll("cluster1")
@@ -0,0 +1,408 @@
+import asyncio
+import common
+import concurrent.futures
+import httpx
+import math
+import os
+import pytest
+import time
+
+from context import firecrest
+
+from firecrest.RateLimiter import AsyncRateLimiter, TokenBucket
+
+
+class FakeClock:
+    """Clock for `LocalBuckets` that only moves when the rate limiter
+    sleeps, so that the tests see the exact waits."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+
+def test_token_bucket():
+    bucket = TokenBucket(capacity=2, now=0)
+    assert bucket.try_acquire(rate=1, capacity=2, now=0) == 0
+    assert bucket.try_acquire(rate=1, capacity=2, now=0) == 0
+    assert bucket.try_acquire(rate=1, capacity=2, now=0) == pytest.approx(1)
+    assert bucket.try_acquire(rate=1, capacity=2, now=0.5) == pytest.approx(0.5)
+    assert bucket.try_acquire(rate=1, capacity=2, now=1) == 0
+    # The bucket doesn't fill over its capacity
+    assert bucket.try_acquire(rate=1, capacity=2, now=100) == 0
+    assert bucket.try_acquire(rate=1, capacity=2, now=100) == 0
+    assert bucket.try_acquire(rate=1, capacity=2, now=100) > 0
+
+    bucket.pause(until=110)
+    assert bucket.try_acquire(rate=1, capacity=2, now=105) == pytest.approx(5)
+    assert bucket.try_acquire(rate=1, capacity=2, now=110) == 0
+    assert bucket.try_acquire(rate=1, capacity=2, now=110) == pytest.approx(1)
+
+
+@pytest.mark.asyncio
+async def test_async_rate_limiter_fifo(monkeypatch):
+    clock = FakeClock()
+    asyncio_sleep = asyncio.sleep
+
+    async def sleep(seconds):
+        clock.sleep(seconds)
+        await asyncio_sleep(0)
+
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    limiter = AsyncRateLimiter(firecrest.LocalBuckets(clock))
+    order = []
+
+    async def request(i):
+        await limiter.acquire("tasks", rate=32, capacity=3)
+        order.append(i)
+
+    tasks = [asyncio.create_task(request(i)) for i in range(8)]
+    await asyncio.sleep(0)
+    assert limiter.queue_depth("tasks") == 5
+    await asyncio.gather(*tasks)
+    # 3 requests in a burst, the rest 1/32 s apart
+    assert clock.sleeps == [1 / 32] * 5
+    assert order == list(range(8))
+    assert limiter.queue_depth("tasks") == 0
+
+
+@pytest.mark.asyncio
+async def test_async_rate_limiter_cancel():
+    limiter = AsyncRateLimiter()
+    await limiter.acquire("compute", rate=10)
+    first = asyncio.create_task(limiter.acquire("compute", rate=10))
+    second = asyncio.create_task(limiter.acquire("compute", rate=10))
+    await asyncio.sleep(0)
+    first.cancel()
+    await asyncio.wait_for(second, 1)
+    assert limiter.queue_depth("compute") == 0
+
+
+@pytest.mark.asyncio
+async def test_async_rate_limiter_priority():
+    limiter = AsyncRateLimiter()
+    await limiter.acquire("tasks", rate=50)
+    order = []
+
+    async def request(name, priority):
+        await limiter.acquire("tasks", rate=50, priority=priority)
+        order.append(name)
+
+    tasks = [
+        asyncio.create_task(request(f"poll{i}", firecrest.Priority.LOW))
+        for i in range(3)
+    ]
+    await asyncio.sleep(0)
+    with firecrest.request_priority(firecrest.Priority.HIGH):
+        # The priority of the context is inherited by the task
+        tasks += [
+            asyncio.create_task(request(f"submit{i}", None))
+            for i in range(2)
+        ]
+
+    await asyncio.sleep(0)
+    assert limiter.queue_depth("tasks") == 5
+    assert limiter.queue_depth("tasks", firecrest.Priority.LOW) == 3
+    assert limiter.queue_depths() == {
+        "tasks": {"HIGH": 2, "NORMAL": 0, "LOW": 3}
+    }
+    await asyncio.gather(*tasks)
+    # The high priority requests overtake the polls that were already
+    # waiting, and each level keeps its order
+    assert order == ["submit0", "submit1", "poll0", "poll1", "poll2"]
+    assert limiter.queue_depth("tasks") == 0
+
+
+def test_adaptive_throttle():
+    throttle = firecrest.AdaptiveThrottle(
+        decrease_interval=0, increase_step=0, min_rate=1
+    )
+    ok = httpx.Response(
+        200, headers={"RateLimit-Limit": "100", "RateLimit-Remaining": "90"}
+    )
+    low = httpx.Response(
+        200,
+        headers={
+            "RateLimit-Limit": "100",
+            "RateLimit-Remaining": "10",
+            "RateLimit-Reset": "2",
+        },
+    )
+    throttle.observe("compute", ok)
+    assert throttle.rate("compute") == math.inf
+
+    # The remaining requests are spread until the reset of the quota
+    throttle.observe("compute", low)
+    assert throttle.rate("compute") == pytest.approx(5)
+    throttle.observe("compute", low)
+    assert throttle.rate("compute") == pytest.approx(2.5)
+    throttle.observe("compute", httpx.Response(429))
+    assert throttle.rate("compute") == pytest.approx(1.25)
+    throttle.observe("compute", httpx.Response(429))
+    assert throttle.rate("compute") == 1
+    assert throttle.rate("utilities") == math.inf
+
+    # The rate grows back while there is no pressure
+    throttle.increase_step = 100
+    throttle._last_update["compute"] -= 1
+    throttle.observe("compute", ok)
+    assert throttle.rate("compute") == math.inf
+
+
+def test_throttled_client(monkeypatch):
+    transport = firecrest.InMemoryTransport()
+    transport.add_response(
+        "GET",
+        "/status/services",
+        json={"out": []},
+        headers={
+            "RateLimit-Limit": "100",
+            "RateLimit-Remaining": "0",
+            "RateLimit-Reset": "1",
+        },
+    )
+    clock = FakeClock()
+    monkeypatch.setattr(time, "sleep", clock.sleep)
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+        rate_limit_backend=firecrest.LocalBuckets(clock),
+    )
+    assert client.adaptive_throttle is None
+    client.adaptive_throttle = firecrest.AdaptiveThrottle(min_rate=10)
+    for _ in range(3):
+        client.all_services()
+
+    assert client.adaptive_throttle.rate("status") == 10
+    # The second request takes the token that is in the bucket and the
+    # third one waits for the next
+    assert clock.sleeps == pytest.approx([0.1])
+
+
+def test_merged_task_requests():
+    server = common.TaskServer()
+    for i in range(5):
+        server.add_task(str(i), str(i))
+
+    transport = firecrest.InMemoryTransport()
+    server.register(transport)
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.time_between_calls["tasks"] = 0.2
+    client.merge_get_requests = True
+    # Use the first token, so that the next requests wait and get merged
+    client._stall_request("tasks")
+    with concurrent.futures.ThreadPoolExecutor(5) as pool:
+        tasks = list(pool.map(lambda i: client._tasks([str(i)]), range(5)))
+
+    for i, task in enumerate(tasks):
+        assert task[str(i)]["data"] == str(i)
+
+    assert transport.num_requests < 5
+    assert sorted(sum(server.task_requests, [])) == [str(i) for i in range(5)]
+
+
+@pytest.mark.parametrize("client_class", [
+    firecrest.Firecrest, firecrest.AsyncFirecrest
+])
+def test_merge_only_without_filters(client_class):
+    client = client_class(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+    )
+    client.time_between_calls["compute"] = 1
+    client.merge_get_requests = True
+
+    def can_merge(endpoint, params):
+        return client._can_merge_request("GET", endpoint, params)
+
+    assert can_merge("/compute/acct", {"jobs": "1"})
+    assert not can_merge("/compute/acct", {"jobs": "1", "starttime": "1"})
+    assert not can_merge("/compute/acct", {"endtime": "1"})
+    assert not can_merge("/compute/acct", {"pageNumber": "1"})
+    assert can_merge("/compute/jobs", {"jobs": "1"})
+    assert not can_merge("/compute/jobs", {"jobs": "1", "pageSize": "1"})
+
+
+def test_merged_request_interrupted():
+    transport = firecrest.InMemoryTransport()
+
+    def interrupt(request):
+        raise KeyboardInterrupt
+
+    transport.add_handler("GET", "/tasks", interrupt)
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.time_between_calls["tasks"] = 0.2
+    client.merge_get_requests = True
+    client._stall_request("tasks")
+    with concurrent.futures.ThreadPoolExecutor(3) as pool:
+        futures = [
+            pool.submit(client._tasks, [str(i)]) for i in range(3)
+        ]
+        for future in futures:
+            # None of the merged requests is left with an empty response
+            with pytest.raises(KeyboardInterrupt):
+                future.result(timeout=10)
+
+
+@pytest.mark.asyncio
+async def test_merged_requests_per_machine():
+    requested = []
+
+    def jobs_handler(request):
+        machine = request.headers["X-Machine-Name"]
+        jobs = sorted(request.url.params["jobs"].split(","))
+        requested.append((machine, jobs))
+        return httpx.Response(200, json={"machine": machine, "jobs": jobs})
+
+    transport = firecrest.AsyncInMemoryTransport()
+    transport.add_handler("GET", "/compute/jobs", jobs_handler)
+    client = firecrest.AsyncFirecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.time_between_calls["compute"] = 0.01
+    client.burst_size["compute"] = 2
+    client.merge_get_requests = True
+    calls = [("daint", "1"), ("daint", "2"), ("eiger", "3"), ("eiger", "4")]
+    responses = await asyncio.gather(*(
+        client._get_request(
+            endpoint="/compute/jobs",
+            additional_headers={"X-Machine-Name": machine},
+            params={"jobs": job},
+        )
+        for machine, job in calls
+    ))
+    for (machine, job), resp in zip(calls, responses):
+        assert resp.json()["machine"] == machine
+        assert job in resp.json()["jobs"]
+
+    assert sorted(requested) == [
+        ("daint", ["1", "2"]),
+        ("eiger", ["3", "4"]),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_adaptive_concurrency():
+    limiter = firecrest.AdaptiveConcurrency(adaptive=False, limits={"a": 2})
+    await limiter.acquire("a")
+    await limiter.acquire("a")
+    third = asyncio.create_task(limiter.acquire("a"))
+    await asyncio.sleep(0)
+    assert limiter.queue_depth("a") == 1
+    # Other keys are not affected
+    assert await limiter.acquire("b") == 0
+    limiter.release("a")
+    await asyncio.wait_for(third, 1)
+    assert limiter.in_flight("a") == 2
+
+    limiter = firecrest.AdaptiveConcurrency(initial_limit=10, smoothing=1)
+    for _ in range(10):
+        await limiter.acquire("a")
+
+    for _ in range(10):
+        limiter.release("a", latency=0.1)
+
+    assert limiter.limit("a") > 10
+    # Ten times slower responses lower the limit
+    limit = limiter.limit("a")
+    for _ in range(limit):
+        await limiter.acquire("a")
+
+    for _ in range(limit):
+        limiter.release("a", latency=1)
+
+    assert limiter.limit("a") < limit
+    limit = limiter.limit("a")
+    await limiter.acquire("a")
+    limiter.release("a", failed=True)
+    assert limiter.limit("a") < limit
+
+
+@pytest.mark.asyncio
+async def test_machine_concurrency():
+    class SlowMachineTransport(firecrest.AsyncTransport):
+        def __init__(self):
+            self.in_flight = {"daint": 0, "eiger": 0}
+            self.max_in_flight = {"daint": 0, "eiger": 0}
+
+        async def request(self, method, url, headers=None, **kwargs):
+            machine = headers["X-Machine-Name"]
+            self.in_flight[machine] += 1
+            self.max_in_flight[machine] = max(
+                self.max_in_flight[machine], self.in_flight[machine]
+            )
+            await asyncio.sleep(0.2 if machine == "daint" else 0.01)
+            self.in_flight[machine] -= 1
+            return httpx.Response(
+                200,
+                json={"description": "success", "output": []},
+                request=httpx.Request(method, url),
+            )
+
+    transport = SlowMachineTransport()
+    client = firecrest.AsyncFirecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.time_between_calls["utilities"] = 0
+    client.set_api_version("1.16.0")
+    client.machine_concurrency = firecrest.AdaptiveConcurrency(
+        adaptive=False, limits={"daint": 2}
+    )
+    daint = [
+        asyncio.create_task(client.list_files("daint", "/home"))
+        for _ in range(6)
+    ]
+    await asyncio.sleep(0.01)
+    start = time.time()
+    await client.list_files("eiger", "/home")
+    # The request to eiger doesn't wait behind the requests to daint
+    assert time.time() - start < 0.15
+    assert client.machine_concurrency.queue_depth("daint") > 0
+    await asyncio.gather(*daint)
+    assert transport.max_in_flight["daint"] == 2
+
+
+def take_tokens(directory):
+    buckets = firecrest.FileBuckets(directory)
+    return sum(
+        buckets.try_acquire("compute", rate=0.001, capacity=10) == 0
+        for _ in range(10)
+    )
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "fork"), reason="FileBuckets requires a POSIX system"
+)
+def test_file_buckets(tmp_path):
+    with concurrent.futures.ProcessPoolExecutor(4) as pool:
+        taken = list(pool.map(take_tokens, 4 * [tmp_path]))
+
+    # The processes share the 10 tokens of the bucket
+    assert sum(taken) == 10
+
+    buckets = firecrest.FileBuckets(tmp_path)
+    buckets.pause("utilities", time.time() + 60)
+    other = firecrest.FileBuckets(tmp_path)
+    assert other.try_acquire("utilities", rate=1, capacity=1) > 59
+    assert other.try_acquire("tasks", rate=1, capacity=1) == 0
@@ -1,9 +1,14 @@
 import common
+import concurrent.futures
+import gzip
+import httpx
 import json
+import logging
 import pytest
 import re
 import os
 import test_authorisation as auth
+import time
 
 from context import firecrest
 from firecrest import __app_name__, __version__, cli
@@ -453,3 +458,240 @@ def test_cli_filesystems(valid_credentials):
 def test_filesystems_invalid(invalid_client):
     with pytest.raises(firecrest.UnauthorizedException):
         invalid_client.filesystems()
+
+
+def test_session_pool_settings(fc_server):
+    client = firecrest.Firecrest(
+        firecrest_url=fc_server.url_for("/"),
+        authorization=common.ValidAuthorization(),
+        pool_connections=2,
+        pool_maxsize=32,
+        pool_block=True,
+    )
+    adapter = client._transport.session.get_adapter(fc_server.url_for("/"))
+    assert adapter._pool_connections == 2
+    assert adapter._pool_maxsize == 32
+    assert adapter._pool_block
+    assert len(client.all_services()) == 2
+
+
+def test_in_memory_transport():
+    services = [{"service": "utilities", "status": "available"}]
+    transport = firecrest.InMemoryTransport()
+    transport.add_response("GET", "/status/services", json={"out": services})
+    transport.add_handler(
+        "GET",
+        re.compile(r"/status/services/\w+"),
+        lambda request: httpx.Response(
+            200, json={"service": request.url.path.split("/")[-1]}
+        ),
+    )
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    assert client.all_services() == services
+    assert client.service("compute") == {"service": "compute"}
+    with pytest.raises(firecrest.FirecrestException):
+        client.all_systems()
+
+    assert transport.num_requests == 3
+
+
+def compressed_services_handler(request: Request):
+    if "gzip" not in request.headers.get("Accept-Encoding", ""):
+        return Response(
+            json.dumps({"out": []}),
+            status=200,
+            content_type="application/json",
+        )
+
+    body = gzip.compress(json.dumps({"out": [{"service": "utilities"}]}).encode())
+    return Response(
+        body,
+        status=200,
+        headers={"Content-Encoding": "gzip"},
+        content_type="application/json",
+    )
+
+
+def test_deduplicate_get_requests():
+    services = [{"service": "utilities", "status": "available"}]
+
+    def slow_services(request):
+        time.sleep(0.2)
+        return httpx.Response(200, json={"out": services})
+
+    transport = firecrest.InMemoryTransport()
+    transport.add_handler("GET", "/status/services", slow_services)
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.deduplicate_get_requests = True
+    with concurrent.futures.ThreadPoolExecutor(5) as pool:
+        futures = [pool.submit(client.all_services) for _ in range(5)]
+        results = [f.result() for f in futures]
+
+    assert results == 5 * [services]
+    assert transport.num_requests < 5
+    assert (
+        transport.num_requests +
+        client.deduplicated_requests["/status/services"]
+    ) == 5
+
+
+def test_compressed_response(httpserver, caplog):
+    httpserver.expect_request(
+        "/status/services", method="GET"
+    ).respond_with_handler(compressed_services_handler)
+    client = firecrest.Firecrest(
+        firecrest_url=httpserver.url_for("/"),
+        authorization=common.ValidAuthorization(),
+    )
+    with caplog.at_level(logging.DEBUG, logger="firecrest"):
+        assert client.all_services() == [{"service": "utilities"}]
+
+    assert "bytes decoded, content encoding: gzip" in caplog.text
+
+
+def test_json_decoder():
+    transport = firecrest.InMemoryTransport()
+    transport.add_response("GET", "/status/services", json={"out": []})
+    transport.add_response("GET", "/status/systems", content=b"not json")
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    decoded = []
+
+    def decoder(content):
+        decoded.append(content)
+        return json.loads(content)
+
+    client.json_decoder = decoder
+    assert client.all_services() == []
+    assert decoded == [b'{"out": []}']
+    with pytest.raises(firecrest.FirecrestException):
+        client.all_systems()
+
+
+def test_retry_policy():
+    attempts = {"services": 0, "systems": 0}
+
+    def services_handler(request):
+        attempts["services"] += 1
+        if attempts["services"] == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+
+        if attempts["services"] == 2:
+            return httpx.Response(503)
+
+        return httpx.Response(200, json={"out": []})
+
+    def systems_handler(request):
+        attempts["systems"] += 1
+        return httpx.Response(502)
+
+    transport = firecrest.InMemoryTransport()
+    transport.add_handler("GET", "/status/services", services_handler)
+    transport.add_handler("GET", "/status/systems", systems_handler)
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    # Transient errors are not retried by default
+    with pytest.raises(firecrest.FirecrestException):
+        client.all_systems()
+
+    assert attempts["systems"] == 1
+
+    attempts["systems"] = 0
+    client.retry_policy = firecrest.RetryPolicy(
+        max_retries=2, backoff_factor=0
+    )
+    assert client.all_services() == []
+    assert attempts["services"] == 3
+
+    with pytest.raises(firecrest.FirecrestException):
+        client.all_systems()
+
+    assert attempts["systems"] == 3
+
+    client.retry_policy = firecrest.RetryPolicy.never()
+    attempts["systems"] = 0
+    with pytest.raises(firecrest.FirecrestException):
+        client.all_systems()
+
+    assert attempts["systems"] == 1
+
+
+def test_retry_policy_not_idempotent():
+    policy = firecrest.RetryPolicy()
+    request = httpx.Request("POST", "http://firecrest.test")
+    assert policy.is_retryable_exception(
+        "POST", httpx.ConnectError("refused", request=request)
+    )
+    assert not policy.is_retryable_exception(
+        "POST", httpx.ReadTimeout("timeout", request=request)
+    )
+    assert policy.is_retryable_exception(
+        "GET", httpx.ReadTimeout("timeout", request=request)
+    )
+    assert not policy.is_retryable_response("POST", httpx.Response(503))
+    assert policy.is_retryable_response("PUT", httpx.Response(503))
+    assert 0 <= policy.backoff(10) <= policy.max_backoff
+
+
+def test_circuit_breaker():
+    state = {"up": False, "ls_requests": 0}
+
+    def ls_handler(request):
+        state["ls_requests"] += 1
+        if state["up"]:
+            return httpx.Response(200, json={"output": []})
+
+        return httpx.Response(503)
+
+    def service_handler(request):
+        status = "available" if state["up"] else "unavailable"
+        return httpx.Response(
+            200, json={"service": "utilities", "status": status}
+        )
+
+    transport = firecrest.InMemoryTransport()
+    transport.add_handler("GET", "/utilities/ls", ls_handler)
+    transport.add_handler("GET", "/status/services/utilities", service_handler)
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.retry_policy = firecrest.RetryPolicy.never()
+    client.circuit_breaker = firecrest.CircuitBreaker(
+        failure_threshold=2, recovery_timeout=60
+    )
+    for _ in range(2):
+        with pytest.raises(firecrest.FirecrestException):
+            client.list_files("cluster1", "/path/to/dir")
+
+    with pytest.raises(firecrest.CircuitOpenException):
+        client.list_files("cluster1", "/path/to/dir")
+
+    assert state["ls_requests"] == 2
+
+    # The service is still down when the client checks it
+    client.circuit_breaker.recovery_timeout = 0
+    with pytest.raises(firecrest.CircuitOpenException):
+        client.list_files("cluster1", "/path/to/dir")
+
+    assert state["ls_requests"] == 2
+
+    state["up"] = True
+    assert client.list_files("cluster1", "/path/to/dir") == []
+    assert client.circuit_breaker.state("utilities") == "closed"
@@ -1,3 +1,8 @@
+import asyncio
+import common
+import concurrent.futures
+import httpx
+import logging
 import pytest
 import re
 import test_status as basic_status
@@ -220,3 +225,145 @@ async def test_filesystems(valid_client):
 async def test_filesystems_invalid(invalid_client):
     with pytest.raises(firecrest.UnauthorizedException):
         await invalid_client.filesystems()
+
+
+@pytest.mark.asyncio
+async def test_session_settings(fc_server):
+    client = firecrest.AsyncFirecrest(
+        firecrest_url=fc_server.url_for("/"),
+        authorization=common.ValidAuthorization(),
+        limits=httpx.Limits(max_connections=2, max_keepalive_connections=1),
+    )
+    client.time_between_calls = {
+        "compute": 0,
+        "reservations": 0,
+        "status": 0,
+        "storage": 0,
+        "tasks": 0,
+        "utilities": 0,
+    }
+    pool = client._transport.session._transport._pool
+    assert pool._max_connections == 2
+    assert pool._max_keepalive_connections == 1
+
+    await client.create_new_session()
+    pool = client._transport.session._transport._pool
+    assert pool._max_connections == 2
+    assert pool._max_keepalive_connections == 1
+    assert len(await client.all_services()) == 2
+
+
+def test_async_backed_client(fc_server):
+    with firecrest.AsyncBackedFirecrest(
+        firecrest_url=fc_server.url_for("/"),
+        authorization=common.ValidAuthorization()
+    ) as client:
+        client.time_between_calls = {
+            "compute": 0,
+            "reservations": 0,
+            "status": 0,
+            "storage": 0,
+            "tasks": 0,
+            "utilities": 0,
+        }
+        assert client.async_client.time_between_calls["status"] == 0
+        assert client.system("cluster1") == {
+            "description": "System ready",
+            "status": "available",
+            "system": "cluster1",
+        }
+        with pytest.raises(firecrest.FirecrestException):
+            client.system("invalid_system")
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(
+                pool.map(lambda _: client.service("utilities"), range(16))
+            )
+
+        assert results == 16 * [{
+            "description": "server up & flask running",
+            "service": "utilities",
+            "status": "available",
+        }]
+
+    assert client.is_closed
+
+
+@pytest.mark.asyncio
+async def test_in_memory_transport():
+    services = [{"service": "utilities", "status": "available"}]
+    transport = firecrest.AsyncInMemoryTransport()
+    transport.add_response("GET", "/status/services", json={"out": services})
+    client = firecrest.AsyncFirecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.time_between_calls["status"] = 0
+    assert await client.all_services() == services
+    with pytest.raises(firecrest.FirecrestException):
+        await client.all_systems()
+
+    assert transport.num_requests == 2
+
+
+@pytest.mark.asyncio
+async def test_deduplicate_get_requests():
+    services = [{"service": "utilities", "status": "available"}]
+    transport = firecrest.AsyncInMemoryTransport()
+    transport.add_response("GET", "/status/services", json={"out": services})
+    client = firecrest.AsyncFirecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.time_between_calls["status"] = 0
+    client.deduplicate_get_requests = True
+    results = await asyncio.gather(*(client.all_services() for _ in range(5)))
+    assert results == 5 * [services]
+    assert transport.num_requests == 1
+    assert client.deduplicated_requests["/status/services"] == 4
+
+    # Requests that are not at the same time are not deduplicated
+    await client.all_services()
+    assert transport.num_requests == 2
+
+
+@pytest.mark.asyncio
+async def test_compressed_response(httpserver, caplog):
+    httpserver.expect_request(
+        "/status/services", method="GET"
+    ).respond_with_handler(basic_status.compressed_services_handler)
+    client = firecrest.AsyncFirecrest(
+        firecrest_url=httpserver.url_for("/"),
+        authorization=common.ValidAuthorization(),
+    )
+    client.time_between_calls["status"] = 0
+    with caplog.at_level(logging.DEBUG, logger="firecrest"):
+        assert await client.all_services() == [{"service": "utilities"}]
+
+    assert "bytes decoded, content encoding: gzip" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_retry_policy():
+    attempts = []
+
+    def services_handler(request):
+        attempts.append(request)
+        if len(attempts) == 1:
+            raise httpx.ReadTimeout("timeout", request=request)
+
+        return httpx.Response(200, json={"out": []})
+
+    transport = firecrest.AsyncInMemoryTransport()
+    transport.add_handler("GET", "/status/services", services_handler)
+    client = firecrest.AsyncFirecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.time_between_calls["status"] = 0
+    client.retry_policy = firecrest.RetryPolicy(backoff_factor=0)
+    assert await client.all_services() == []
+    assert len(attempts) == 2
@@ -0,0 +1,77 @@
+import common
+import concurrent.futures
+import pytest
+
+from context import firecrest
+
+from firecrest.FirecrestException import PollingIterException
+
+
+def new_client(server):
+    transport = firecrest.InMemoryTransport()
+    server.register(transport)
+    client = firecrest.Firecrest(
+        firecrest_url="http://firecrest.test",
+        authorization=common.ValidAuthorization(),
+        transport=transport,
+    )
+    client.set_api_version("1.16.0")
+    client.task_watcher = firecrest.TaskWatcher(client, batch_window=0.1)
+    return client
+
+
+def test_task_watcher_batches_tasks():
+    server = common.TaskServer()
+    task_ids = [str(i) for i in range(10)]
+    for task_id in task_ids:
+        server.add_task(task_id, f"result of {task_id}", polls=2)
+
+    client = new_client(server)
+    with concurrent.futures.ThreadPoolExecutor(10) as pool:
+        results = list(pool.map(
+            lambda task_id: client._poll_tasks(
+                task_id, "200", iter(10 * [0.05])
+            ),
+            task_ids
+        ))
+
+    assert results == [(f"result of {i}", "cluster1") for i in task_ids]
+    # 10 tasks that are polled 3 times each, in much fewer requests
+    assert len(server.task_requests) < 10
+    assert client.task_watcher.pending() == 0
+
+
+def test_task_watcher_errors():
+    server = common.TaskServer()
+    server.add_task("error", status="400")
+    server.add_task("slow", polls=100)
+    client = new_client(server)
+    with pytest.raises(firecrest.FirecrestException) as exc_info:
+        client._poll_tasks("error", "200", iter([0.01]))
+
+    assert exc_info.value.responses[0].status_code == 200
+
+    with pytest.raises(PollingIterException):
+        client._poll_tasks("slow", "200", iter(3 * [0.01]))
+
+    assert client.task_watcher.pending() == 0
+
+
+def test_task_watcher_unexpected_error(monkeypatch):
+    server = common.TaskServer()
+    server.add_task("task", "result", polls=2)
+    client = new_client(server)
+
+    def broken_sleep_times():
+        raise RuntimeError("broken iterator")
+        yield
+
+    with pytest.raises(RuntimeError, match="broken iterator"):
+        client._poll_tasks("task", "200", broken_sleep_times())
+
+    assert client.task_watcher.pending() == 0
+    # The watcher starts a new thread for the next tasks
+    server.add_task("other", "result")
+    assert client._poll_tasks("other", "200", iter([0.01])) == (
+        "result", "cluster1"
+    )
@@ -1374,6 +1374,34 @@ def test_stat_invalid_client(invalid_client):
         invalid_client.stat("cluster1", "/path/to/file")
 
 
+def test_map_stat(valid_client):
+    results = valid_client.map(
+        "stat",
+        "cluster1",
+        ["/path/to/link", "/path/to/invalid/file", ("/path/to/link", True)],
+        max_workers=3,
+    )
+    assert len(results) == 3
+    assert results[0]["ino"] == 648577971375854279
+    assert isinstance(results[1], firecrest.HeaderException)
+    assert results[2]["ino"] == 648577914584968738
+
+    assert valid_client.map(
+        "stat", "cluster1", ["/path/to/link"] * 4, dereference=True
+    ) == [valid_client.stat("cluster1", "/path/to/link", dereference=True)] * 4
+
+    with pytest.raises(firecrest.HeaderException):
+        valid_client.map(
+            "stat",
+            "cluster1",
+            ["/path/to/link", "/path/to/invalid/file"],
+            return_exceptions=False,
+        )
+
+    with pytest.raises(ValueError):
+        valid_client.map("_get_request", "cluster1", ["/path/to/link"])
+
+
 def test_symlink(valid_client):
     # Make sure this doesn't raise an error
     valid_client.symlink("cluster1", "/path/to/file", "/path/to/link")